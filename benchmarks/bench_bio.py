@@ -0,0 +1,166 @@
+"""
+Instagram bio fallback: whole-body innerText + emails[0] vs capped bio text + ranked emails.
+
+    python -m benchmarks.bench_bio --posts 300 --repeat 20
+    python -m benchmarks.bench_bio --offline     # selectolax twins only, no browser
+
+Renders synthetic Instagram profiles (no metas, so the fallback runs) with
+page.set_content: a header bio, a post grid of --posts captions, nav, a footer
+with the platform's own addresses and a few inline scripts. The bio email is
+plain, bracketed ("[at]"/"[dot]") or spelled out ("at"/"dot"); "prose" bios
+have no email, only sentences with a bare " at " ("Founder at acme.io").
+
+Reported per approach: bytes of text sent back over the browser connection,
+median ms per profile, and how many profiles came out right: the creator's
+email found, or for "prose" bios no address made up.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from collabstr.emails import best_email
+from collabstr.extract import extract_bio_text, parse_bio_text
+from collabstr.utils import extract_emails
+
+BIO_EMAILS = [
+    ("plain", "Business: {h}@example.com"),
+    ("bracketed", "📧 {h} [at] example [dot] com"),
+    ("spelled", "collabs: {h} at example dot com"),
+]
+# no address here: none of these may come out as one
+PROSE_BIOS = [
+    "Shop my looks at shopmy.us/{h}",
+    "I work at google.com",
+    "DM me at {h}.doe",
+    "Founder at acme.io",
+    "Shop at mystore dot com",
+    "Living at home dot com style",
+]
+
+
+def profile_html(handle: str, bio: str, posts: int) -> str:
+    grid = "".join(
+        f"<article><a href='/p/{handle}{i}/'><img alt='Photo by {handle}'></a>"
+        f"<span>Post {i}: new drop, link in bio, use code {handle.upper()}{i} for 10% off</span></article>"
+        for i in range(posts)
+    )
+    return (
+        "<html><head><script>window.__cfg = {endpoint: 'graphql@2x.js', key: 'abc'}</script></head><body>"
+        "<nav><a href='/'>Home</a><a href='/explore/'>Explore</a><a href='/reels/'>Reels</a></nav>"
+        "<main>"
+        f"<header><h2>{handle}</h2><span>1,204 posts · 88.1K followers · 512 following</span>"
+        f"<div><span>Travel + food creator ✈️ Lisbon</span><span>{bio}</span></div></header>"
+        f"<div class='grid'>{grid}</div>"
+        "</main>"
+        "<footer><a href='mailto:press@instagram.com'>Press</a> <span>help: support@instagram.com</span>"
+        " <span>About · API · Jobs · Privacy · Terms</span></footer>"
+        "<script>" + "var x='" + "a" * 20000 + "';" + "</script>"
+        "</body></html>"
+    )
+
+
+def cases(n: int, posts: int):
+    for i in range(n):
+        handle = f"creator{i:03d}"
+        if i % (len(BIO_EMAILS) + 1) == len(BIO_EMAILS):
+            bio = PROSE_BIOS[i // (len(BIO_EMAILS) + 1) % len(PROSE_BIOS)]
+            yield "prose", None, profile_html(handle, bio.format(h=handle), posts)
+            continue
+        kind, tmpl = BIO_EMAILS[i % (len(BIO_EMAILS) + 1)]
+        yield kind, f"{handle}@example.com", profile_html(handle, tmpl.format(h=handle), posts)
+
+
+def first_email(text: str):
+    emails = extract_emails(text)
+    return emails[0] if emails else None
+
+
+def report(label: str, rows) -> None:
+    """rows: [(kind, expected, bytes, ms, found)] of one approach."""
+    n = len(rows)
+    by_kind = {}
+    for kind, expected, _, _, found in rows:
+        ok, total = by_kind.get(kind, (0, 0))
+        by_kind[kind] = (ok + (found == expected), total + 1)
+    hits = " ".join(f"{k}={ok}/{t}" for k, (ok, t) in by_kind.items())
+    print(f"{label:<10} {sum(r[2] for r in rows) / n:>10.0f} {statistics.median(r[3] for r in rows):>9.2f}  {hits}")
+
+
+async def _time(fn, repeat):
+    samples, result = [], None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = await fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples), result
+
+
+async def browser_run(profiles, repeat: int, cap: int):
+    from playwright.async_api import async_playwright
+
+    old_rows, new_rows = [], []
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        page = await browser.new_page()
+        for kind, expected, html in profiles:
+            await page.set_content(html)
+
+            async def old():
+                return await page.inner_text("body") or ""
+
+            async def new():
+                return await extract_bio_text(page, cap) or ""
+
+            old_ms, old_text = await _time(old, repeat)
+            new_ms, new_text = await _time(new, repeat)
+            old_rows.append((kind, expected, len(old_text.encode()), old_ms, first_email(old_text)))
+            new_rows.append((kind, expected, len(new_text.encode()), new_ms, best_email(new_text)))
+        await browser.close()
+    return old_rows, new_rows
+
+
+def offline_run(profiles, repeat: int, cap: int):
+    from selectolax.lexbor import LexborHTMLParser
+
+    def old_text(html):   # ~ body innerText: all rendered text, scripts excluded
+        tree = LexborHTMLParser(html)
+        for node in tree.css("script, style"):
+            node.decompose()
+        return tree.body.text(separator=" ") if tree.body else ""
+
+    old_rows, new_rows = [], []
+    for kind, expected, html in profiles:
+        for rows, text_of, pick in ((old_rows, old_text, first_email),
+                                    (new_rows, lambda h: parse_bio_text(h, cap), best_email)):
+            samples = []
+            for _ in range(repeat):
+                t = time.perf_counter()
+                text = text_of(html)
+                found = pick(text)
+                samples.append((time.perf_counter() - t) * 1000)
+            rows.append((kind, expected, len(text.encode()), statistics.median(samples), found))
+    return old_rows, new_rows
+
+
+def main(args) -> None:
+    profiles = list(cases(args.profiles, args.posts))
+    print(f"{args.profiles} profiles, {args.posts} posts each, cap {args.cap} chars"
+          + (" (offline: selectolax, no browser)" if args.offline else ""))
+    if args.offline:
+        old_rows, new_rows = offline_run(profiles, args.repeat, args.cap)
+    else:
+        old_rows, new_rows = asyncio.run(browser_run(profiles, args.repeat, args.cap))
+    print(f"{'approach':<10} {'bytes/page':>10} {'ms/page':>9}  right (email found / none made up)")
+    report("body", old_rows)
+    report("bio", new_rows)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--profiles", type=int, default=30)
+    ap.add_argument("--posts", type=int, default=300, help="post captions in each profile's grid")
+    ap.add_argument("--repeat", type=int, default=20, help="timed runs per profile (median reported)")
+    ap.add_argument("--cap", type=int, default=4000, help="BIO_TEXT_MAX_CHARS")
+    ap.add_argument("--offline", action="store_true", help="time the selectolax equivalents instead")
+    main(ap.parse_args())
@@ -0,0 +1,99 @@
+"""
+Brand-name classification throughput: the original per-call is_brand_like_fuzzy
+vs BrandClassifier.classify_many (cold = empty memo, warm = memo filled).
+
+    python -m benchmarks.bench_brand --names 20000
+
+Parity is checked first against benchmarks/brand_names.json, labels recorded
+from the original implementation.
+"""
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+from rapidfuzz import fuzz, process
+
+from collabstr.brand import BRAND_KEYWORDS, BrandClassifier
+
+FIXTURE = Path(__file__).with_name("brand_names.json")
+
+
+def legacy_is_brand_like_fuzzy(name: str, threshold: int = 85) -> bool:
+    """The original implementation, kept verbatim as the baseline."""
+    if not name:
+        return False
+    n = re.sub(r"[\W_]+", " ", name).strip().lower()
+
+    if n.startswith("the "):
+        return True
+    if re.search(r"\b(" + "|".join(BRAND_KEYWORDS) + r")\b", n):
+        return True
+
+    tokens = n.split()
+    for t in tokens:
+        score = process.extractOne(
+            t,
+            BRAND_KEYWORDS,
+            scorer=fuzz.WRatio   # robust combined scorer
+        )
+        if score and score[1] >= threshold:
+            return True
+    return False
+
+
+def synthetic_names(n: int, seed: int = 16):
+    rnd = random.Random(seed)
+    syll = ["ka", "ri", "mo", "lee", "san", "dra", "to", "vi", "na", "el", "jo", "ber", "cha", "lu", "mi", "ra"]
+    extra = ["studio", "media", "films", "official", "co", "ugc", "creates", "tv", "daily", "vlogs"]
+
+    def word():
+        return "".join(rnd.choice(syll) for _ in range(rnd.randint(2, 3))).title()
+
+    out = []
+    for _ in range(n):
+        parts = [word(), word()]
+        if rnd.random() < 0.2:
+            parts.append(rnd.choice(extra))
+        out.append(" ".join(parts))
+    return out
+
+
+def check_parity() -> int:
+    fixture = json.loads(FIXTURE.read_text(encoding="utf-8"))
+    names = [x["name"] for x in fixture]
+    got = BrandClassifier().classify_many(names)
+    bad = [(x["name"], x["brand"], g) for x, g in zip(fixture, got) if x["brand"] != g]
+    legacy_bad = [x["name"] for x in fixture if legacy_is_brand_like_fuzzy(x["name"]) != x["brand"]]
+    if bad or legacy_bad:
+        raise SystemExit(f"classifications differ: {bad[:10]} (baseline drift: {legacy_bad[:10]})")
+    return len(fixture)
+
+
+def _rate(fn, names) -> float:
+    t = time.perf_counter()
+    fn(names)
+    return len(names) / max(time.perf_counter() - t, 1e-9)
+
+
+def main(n: int) -> None:
+    print(f"parity: {check_parity()} fixture names match")
+    names = synthetic_names(n)
+    # real listings repeat names across pages/categories; replay a quarter of them
+    names += names[: n // 4]
+    legacy = _rate(lambda ns: [legacy_is_brand_like_fuzzy(x) for x in ns], names)
+    clf = BrandClassifier()
+    cold = _rate(clf.classify_many, names)
+    warm = _rate(clf.classify_many, names)
+    print(f"{'implementation':<22} {'names/s':>12} {'speedup':>8}")
+    for label, r in (("legacy per-name", legacy), ("classifier (cold)", cold), ("classifier (memo)", warm)):
+        print(f"{label:<22} {r:>12,.0f} {r / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--names", type=int, default=20000, help="synthetic names to classify")
+    args = ap.parse_args()
+    main(args.names)
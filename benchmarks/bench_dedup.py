@@ -0,0 +1,62 @@
+"""
+Dedup index at scale: append, cold load and lookup cost for millions of keys.
+
+    python -m benchmarks.bench_dedup --creators 1000000
+
+Each creator adds three keys (profile URL, email, Instagram handle). Lookups
+are measured for both hits and misses.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from collabstr.dedup import DedupIndex
+
+
+def creator(i: int):
+    return (f"https://collabstr.com/c{i:08d}", f"creator{i}@example.com", f"https://www.instagram.com/ig{i:08d}/")
+
+
+def main(n: int, lookups: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "dedup.idx")
+    index = DedupIndex(path)
+    t = time.perf_counter()
+    for i in range(n):
+        index.add(*creator(i))
+        if i % 10_000 == 9_999:
+            index.flush()   # the engine flushes with every output flush
+    index.flush()
+    add_s = time.perf_counter() - t
+    size_mb = os.path.getsize(path) / 1e6
+
+    del index
+    t = time.perf_counter()
+    cold = DedupIndex(path)
+    keys = cold.size()
+    load_s = time.perf_counter() - t
+    # set table + one int object per key
+    mem_mb = (sys.getsizeof(cold._keys) + keys * sys.getsizeof(2 ** 62)) / 1e6
+
+    step = max(1, n // lookups)
+    t = time.perf_counter()
+    hits = sum(cold.seen_email(creator(i)[1]) for i in range(0, n, step))
+    hit_us = (time.perf_counter() - t) / max(1, len(range(0, n, step))) * 1e6
+    t = time.perf_counter()
+    misses = sum(not cold.seen_profile(creator(n + i)[0]) for i in range(lookups))
+    miss_us = (time.perf_counter() - t) / lookups * 1e6
+
+    print(f"{n:,} creators -> {keys:,} keys, {size_mb:.1f} MB on disk")
+    print(f"add+flush  {n / add_s:>12,.0f} creators/s")
+    print(f"cold load  {load_s:>12.2f} s   ({mem_mb:.0f} MB in memory)")
+    print(f"lookup hit {hit_us:>12.2f} us  ({hits} hits)")
+    print(f"lookup miss{miss_us:>12.2f} us  ({misses} misses)")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--creators", type=int, default=1_000_000)
+    ap.add_argument("--lookups", type=int, default=100_000)
+    args = ap.parse_args()
+    main(args.creators, args.lookups)
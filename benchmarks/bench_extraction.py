@@ -0,0 +1,116 @@
+"""
+Per-page extraction cost: element-handle calls vs one page.evaluate() round trip.
+
+    python -m benchmarks.bench_extraction --cards 60 --repeat 20
+
+Renders synthetic listing / profile / Instagram pages with page.set_content, so
+no network is involved and only the extraction itself is timed.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from playwright.async_api import async_playwright
+
+from collabstr.extract import extract_listing_cards, extract_profile, extract_bio_metas
+from collabstr.selectors import LISTING_ITEM, PROFILE_LINK_REL, NAME_ON_PROFILE, INSTAGRAM_LINK
+
+
+def listing_html(n: int) -> str:
+    cards = "\n".join(
+        f'<div class="profile-listing-holder"><a href="/creator{i}"><img alt=""></a>'
+        f'<div class="profile-listing-name">Creator {i}</div></div>'
+        for i in range(n)
+    )
+    return f"<html><body><div class='listing'>{cards}</div></body></html>"
+
+
+def profile_html() -> str:
+    return ("<html><body><span class='profile-name-desktop'>Jane Doe</span>"
+            "<a data-platform='instagram' href='https://www.instagram.com/janedoe/'>ig</a></body></html>")
+
+
+def instagram_html(n_meta: int = 25) -> str:
+    metas = "".join(f"<meta name='x-{i}' content='{i}'>" for i in range(n_meta))
+    return ("<html><head>" + metas +
+            "<meta name='description' content='Creator. Contact: jane@example.com'>"
+            "<meta property='og:description' content='Creator. Contact: jane@example.com'>"
+            "</head><body></body></html>")
+
+
+# ---------- previous handle-based extraction ----------
+async def legacy_listing(page):
+    out = []
+    for el in await page.query_selector_all(LISTING_ITEM):
+        link_el = await el.query_selector(PROFILE_LINK_REL)
+        if not link_el:
+            continue
+        href = await link_el.get_attribute("href")
+        if href:
+            out.append(href)
+    return out
+
+
+async def legacy_profile(page):
+    name, insta = "", ""
+    n = await page.query_selector(NAME_ON_PROFILE)
+    if n:
+        name = (await n.inner_text() or "").strip()
+    link = await page.query_selector(INSTAGRAM_LINK)
+    if link:
+        insta = await link.get_attribute("href") or ""
+    return name, insta
+
+
+async def legacy_metas(page):
+    parts = []
+    for m in await page.query_selector_all("meta"):
+        name = (await m.get_attribute("name") or await m.get_attribute("property") or "").lower()
+        if name in ("description", "og:description", "twitter:description"):
+            c = await m.get_attribute("content") or ""
+            if c:
+                parts.append(c)
+    return parts
+
+
+async def batched_listing(page):
+    return [href for href, _ in (await extract_listing_cards(page))[1]]
+
+
+async def _time(fn, page, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = await fn(page)
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples), result
+
+
+async def main(cards: int, repeat: int):
+    cases = [
+        ("listing", listing_html(cards), legacy_listing, batched_listing),
+        ("profile", profile_html(), legacy_profile, extract_profile),
+        ("instagram", instagram_html(), legacy_metas, extract_bio_metas),
+    ]
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        page = await browser.new_page()
+        print(f"{'page':<10} {'handles ms':>11} {'evaluate ms':>12} {'speedup':>8}")
+        for label, html, old, new in cases:
+            await page.set_content(html)
+            old_ms, old_res = await _time(old, page, repeat)
+            new_ms, new_res = await _time(new, page, repeat)
+            if list(old_res) != list(new_res):
+                raise SystemExit(f"{label}: results differ\n  old={old_res}\n  new={new_res}")
+            print(f"{label:<10} {old_ms:>11.2f} {new_ms:>12.2f} {old_ms / max(new_ms, 1e-6):>7.1f}x")
+        await browser.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--cards", type=int, default=60, help="cards per synthetic listing page")
+    ap.add_argument("--repeat", type=int, default=20, help="timed runs per case (median reported)")
+    args = ap.parse_args()
+    asyncio.run(main(args.cards, args.repeat))
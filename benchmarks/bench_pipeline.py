@@ -0,0 +1,203 @@
+"""
+End-to-end throughput against the local stand-in site (benchmarks/sim_site.py).
+
+    python -m benchmarks.bench_pipeline --profiles 5000 --latency-ms 80 --http
+    python -m benchmarks.bench_pipeline --challenge-rate 0.05 --rate-429 0.02 --save base.json
+    python -m benchmarks.bench_pipeline --baseline base.json      # exit 1 on a regression
+
+Drives CollabstrListingScraper -> get_profile_details -> InstagramEmailFinder as
+a pipeline (same queues and worker counts as the engine) and reports profiles/min,
+emails/min and p50/p95/p99 latency per stage. The browser path needs Playwright's
+Chromium; --http --no-instagram runs without a browser.
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import sys
+import time
+from typing import Dict, List
+
+from collabstr.brand import BRAND_CLASSIFIER
+from collabstr.browser import BrowserMgr
+from collabstr.collabstr_scraper import CollabstrListingScraper
+from collabstr.config import Settings
+from collabstr.http_client import HttpFetcher
+from collabstr.instagram_scraper import InstagramEmailFinder
+from collabstr.metrics import percentile
+from collabstr.pool import PagePool
+from collabstr.ratelimit import RateController
+from collabstr.utils import log
+
+from .sim_site import add_site_args, site_from_args
+
+_DONE = object()
+
+
+def _stage(samples: List[float]) -> dict:
+    return {"n": len(samples), **{f"p{p}": round(percentile(samples, p), 1) for p in (50, 95, 99)}}
+
+
+class Timed:
+    """Wraps an async callable, recording each call's wall time in ms."""
+
+    def __init__(self, fn, samples: List[float]):
+        self.fn = fn
+        self.samples = samples
+
+    async def __call__(self, *a, **kw):
+        t = time.perf_counter()
+        try:
+            return await self.fn(*a, **kw)
+        finally:
+            self.samples.append((time.perf_counter() - t) * 1000)
+
+
+async def run(args) -> dict:
+    site = site_from_args(args)
+    base = site.start()
+    rate = f"{args.rate}:{args.rate}:1"
+    cfg = dataclasses.replace(
+        Settings.ugc_config_load(),
+        START_URL=f"{base}/influencers?c=UGC", HEADLESS=True, HTTP_FETCH=args.http,
+        CACHE_ENABLED=False, RATE_LIMITS=f"127.0.0.1={rate},instagram.com={rate}", RATE_JITTER=0.0,
+        PROFILE_CONCURRENCY=args.profile_workers, INSTAGRAM_CONCURRENCY=args.ig_workers,
+        LISTING_PREFETCH=args.prefetch,
+    )
+    lat: Dict[str, List[float]] = {"listing": [], "profile": [], "instagram": []}
+    counts = {"profiles": 0, "brand_skipped": 0, "with_instagram": 0, "emails": 0, "wrong_emails": 0}
+    limiter = RateController.from_cfg(cfg)
+    http = HttpFetcher(cfg, limiter=limiter) if cfg.HTTP_FETCH else None
+    need_browser = not (args.http and args.no_instagram)
+    bm = BrowserMgr(cfg, extra_args=site.chromium_args()) if need_browser else None
+    if bm:
+        await bm.__aenter__()
+    try:
+        pages = PagePool(bm, cfg.PROFILE_CONCURRENCY + cfg.INSTAGRAM_CONCURRENCY + 1) if bm else None
+        listing = CollabstrListingScraper(cfg, pages, http=http, limiter=limiter)
+        listing._fetch_page = Timed(listing._fetch_page, lat["listing"])
+        profile_details = Timed(listing.get_profile_details, lat["profile"])
+        ig = InstagramEmailFinder(cfg, pages, limiter=limiter) if pages else None
+        try_get_email = Timed(ig.try_get_email, lat["instagram"]) if ig else None
+        profile_q: asyncio.Queue = asyncio.Queue(maxsize=cfg.PROFILE_QUEUE_SIZE)
+        ig_q: asyncio.Queue = asyncio.Queue(maxsize=cfg.INSTAGRAM_QUEUE_SIZE)
+
+        async def producer():
+            queued = 0
+            async for _, rows in listing.iter_pages(1, None):
+                for lp, brand in zip(rows, BRAND_CLASSIFIER.classify_many([lp.name for lp in rows])):
+                    if brand:
+                        counts["brand_skipped"] += 1
+                        continue
+                    if args.max_profiles and queued >= args.max_profiles:
+                        return
+                    queued += 1
+                    await profile_q.put(lp)
+
+        async def profile_worker():
+            while (lp := await profile_q.get()) is not _DONE:
+                name, insta = await profile_details(lp.profile_url)
+                counts["profiles"] += 1
+                if insta:
+                    counts["with_instagram"] += 1
+                    if ig:
+                        await ig_q.put((lp, insta))
+
+        async def ig_worker():
+            while (item := await ig_q.get()) is not _DONE:
+                lp, insta = item
+                email = await try_get_email(insta)
+                if email:
+                    counts["emails"] += 1
+                    want = site.creator(int(lp.username[1:])).email
+                    if email != want:
+                        counts["wrong_emails"] += 1
+
+        t0 = time.perf_counter()
+        profile_tasks = [asyncio.create_task(profile_worker()) for _ in range(cfg.PROFILE_CONCURRENCY)]
+        ig_tasks = [asyncio.create_task(ig_worker()) for _ in range(cfg.INSTAGRAM_CONCURRENCY)]
+        await producer()
+        for _ in profile_tasks:
+            await profile_q.put(_DONE)
+        await asyncio.gather(*profile_tasks)
+        for _ in ig_tasks:
+            await ig_q.put(_DONE)
+        await asyncio.gather(*ig_tasks)
+        elapsed = time.perf_counter() - t0
+    finally:
+        if http:
+            await http.aclose()
+        if bm:
+            await bm.__aexit__(None, None, None)
+        site.stop()
+
+    minutes = elapsed / 60
+    return {
+        "config": {k: getattr(args, k) for k in ("profiles", "latency_ms", "challenge_rate", "rate_429",
+                                                 "ig_wall_rate", "http", "no_instagram", "rate",
+                                                 "profile_workers", "ig_workers", "prefetch", "max_profiles")},
+        "elapsed_s": round(elapsed, 2),
+        **counts,
+        "profiles_per_min": round(counts["profiles"] / minutes, 1),
+        "emails_per_min": round(counts["emails"] / minutes, 1),
+        "stages_ms": {name: _stage(s) for name, s in lat.items()},
+        "site_hits": dict(site.hits),
+        "rate": limiter.stats(),
+    }
+
+
+def report(res: dict) -> None:
+    print(f"{res['profiles']} profiles in {res['elapsed_s']}s -> {res['profiles_per_min']}/min, "
+          f"{res['emails']} emails -> {res['emails_per_min']}/min "
+          f"(brand-skipped {res['brand_skipped']}, wrong emails {res['wrong_emails']})")
+    print(f"{'stage':<10} {'n':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, st in res["stages_ms"].items():
+        print(f"{name:<10} {st['n']:>7} {st['p50']:>9.1f} {st['p95']:>9.1f} {st['p99']:>9.1f}")
+    print("site hits: " + ", ".join(f"{k}={v}" for k, v in sorted(res["site_hits"].items())))
+
+
+def regressions(res: dict, base: dict, tolerance: float, latency_tolerance: float) -> List[str]:
+    out = []
+    for key in ("profiles_per_min", "emails_per_min"):
+        if base.get(key) and res[key] < base[key] * (1 - tolerance):
+            out.append(f"{key} {res[key]} < baseline {base[key]} (-{tolerance:.0%} allowed)")
+    for name, st in res["stages_ms"].items():
+        b = base.get("stages_ms", {}).get(name, {})
+        if b.get("p95") and st["p95"] > b["p95"] * (1 + latency_tolerance):
+            out.append(f"{name} p95 {st['p95']}ms > baseline {b['p95']}ms")
+    if res["wrong_emails"]:
+        out.append(f"{res['wrong_emails']} emails did not match the generated creator")
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_site_args(ap)
+    ap.add_argument("--http", action="store_true", help="use the httpx fast path for Collabstr pages")
+    ap.add_argument("--no-instagram", action="store_true", help="stop after profile pages")
+    ap.add_argument("--rate", type=float, default=200.0, help="req/s allowed per host")
+    ap.add_argument("--profile-workers", type=int, default=4)
+    ap.add_argument("--ig-workers", type=int, default=2)
+    ap.add_argument("--prefetch", type=int, default=4, help="LISTING_PREFETCH")
+    ap.add_argument("--max-profiles", type=int, default=0, help="stop queueing after this many (0 = all)")
+    ap.add_argument("--save", help="write the results as JSON")
+    ap.add_argument("--baseline", help="compare against a saved result; exit 1 on regression")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="allowed throughput drop vs the baseline")
+    ap.add_argument("--latency-tolerance", type=float, default=0.25, help="allowed p95 growth vs the baseline")
+    ap.add_argument("--verbose", action="store_true", help="keep the scraper's INFO logs")
+    args = ap.parse_args()
+    if not args.verbose:
+        log.setLevel(logging.WARNING)
+
+    res = asyncio.run(run(args))
+    report(res)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = regressions(res, json.load(f), args.tolerance, args.latency_tolerance)
+        for p in problems:
+            print("REGRESSION:", p)
+        sys.exit(1 if problems else 0)
@@ -0,0 +1,216 @@
+"""
+Instagram lookups on a bad day: fixed timeouts vs the resilience layer.
+
+    python -m benchmarks.bench_resilience --lookups 600 --bad-from 0.2 --bad-to 0.5
+
+Runs the real InstagramEmailFinder / goto_paced / RateController against fake
+tabs on a virtual clock (simulated hours take a second or two). The simulated
+host answers in lognormal time with occasional stalls, and between --bad-from
+and --bad-to of the run it stops answering (--bad-mode hang) or redirects every
+request to the login wall (--bad-mode wall). Workers park lookups refused by an
+open circuit and retry them later, as the engine does.
+
+Reported per policy: lookups that found their email, p50/p95/p99 lookup time,
+worker-seconds spent on lookups that failed, and simulated makespan.
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+from collabstr.config import Settings
+from collabstr.instagram_scraper import InstagramEmailFinder
+from collabstr.ratelimit import RateController, parse_rates
+from collabstr.resilience import CircuitOpen, HealthPolicy
+from collabstr.utils import log
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock jumps to the next timer whenever nothing is ready to run."""
+
+    def __init__(self):
+        super().__init__()
+        self.now = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def _run_once(self):
+        if not self._ready:
+            live = [h._when for h in self._scheduled if not h._cancelled]
+            if live:
+                self.now = max(self.now, min(live))
+        super()._run_once()
+
+
+class Host:
+    """Simulated Instagram: latency model plus a bad window."""
+
+    def __init__(self, args, rnd: random.Random):
+        self.args = args
+        self.rnd = rnd
+        self.bad = (0.0, 0.0)   # simulated seconds, set once the run length is estimated
+
+    def answer(self, now: float):
+        """Seconds until the page answers (inf = never) and whether it is a login wall."""
+        if self.bad[0] <= now < self.bad[1]:
+            if self.args.bad_mode == "wall":
+                return self.rnd.uniform(0.3, 1.0), True
+            return math.inf, False
+        if self.rnd.random() < self.args.stall_rate:
+            return math.inf, False   # a stuck connection; a retry usually goes through
+        return self.rnd.lognormvariate(math.log(self.args.median_s), 0.5), False
+
+
+class FakeResponse:
+    status = 200
+
+
+class FakePage:
+    def __init__(self, host: Host, emails: dict):
+        self.host = host
+        self.emails = emails
+        self.url = "about:blank"
+
+    async def goto(self, url, wait_until=None, timeout=30000):
+        loop = asyncio.get_running_loop()
+        wait, wall = self.host.answer(loop.time())
+        if wait * 1000 > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise PlaywrightTimeout(f"Timeout {timeout:.0f}ms exceeded")
+        await asyncio.sleep(wait)
+        self.url = "https://www.instagram.com/accounts/login/" if wall else url
+        return FakeResponse()
+
+    async def evaluate(self, js, arg=None):
+        handle = self.url.rstrip("/").rsplit("/", 1)[-1]
+        email = self.emails.get(handle)
+        return [f"creator bio {handle}" + (f" contact {email}" if email else "")]
+
+    async def content(self):
+        return "<html></html>"
+
+
+class FakePool:
+    def __init__(self, host: Host, emails: dict):
+        self.host = host
+        self.emails = emails
+
+    @asynccontextmanager
+    async def page(self):
+        yield FakePage(self.host, self.emails)
+
+
+async def run_policy(args, policy: HealthPolicy) -> dict:
+    rnd = random.Random(args.seed)
+    handles = [f"ig{i:06d}" for i in range(args.lookups)]
+    emails = {h: f"{h}@example.com" for h in handles if rnd.random() < args.email_rate}
+    host = Host(args, rnd)
+    # the bad window is placed on the expected clean-run length
+    expected = args.lookups * args.median_s * 1.2 / args.workers
+    host.bad = (args.bad_from * expected, args.bad_to * expected)
+
+    cfg = Settings.ugc_config_load()
+    limiter = RateController(parse_rates(args.rates), jitter=0.3, policy=policy)
+    finder = InstagramEmailFinder(cfg, FakePool(host, emails), limiter=limiter)
+    loop = asyncio.get_running_loop()
+    q: asyncio.Queue = asyncio.Queue()
+    for h in handles:
+        q.put_nowait(h)
+    durations, wasted, outcome = [], 0.0, Counter()
+    parked = [0]   # lookups waiting out an open circuit
+    give_up = [math.inf]
+
+    def unpark(h):
+        parked[0] -= 1
+        q.put_nowait(h)
+
+    async def worker():
+        nonlocal wasted
+        while True:
+            if q.empty() and parked[0] == 0:
+                return
+            try:
+                h = await asyncio.wait_for(q.get(), timeout=5.0)
+            except asyncio.TimeoutError:
+                if loop.time() > give_up[0]:
+                    return
+                continue
+            t = loop.time()
+            try:
+                email = await finder.try_get_email(f"https://www.instagram.com/{h}/")
+            except CircuitOpen as e:
+                outcome["parked"] += 1
+                if give_up[0] == math.inf:
+                    give_up[0] = loop.time() + args.park_max
+                if loop.time() + e.retry_in < give_up[0]:
+                    parked[0] += 1
+                    loop.call_later(e.retry_in, unpark, h)
+                else:
+                    outcome["abandoned"] += 1
+                continue
+            took = loop.time() - t
+            durations.append(took)
+            if email:
+                outcome["email"] += 1
+            elif h in emails:
+                outcome["failed"] += 1
+                wasted += took
+            else:
+                outcome["no_email"] += 1
+
+    await asyncio.gather(*(worker() for _ in range(args.workers)))
+    durations.sort()
+
+    def pct(p):
+        return durations[min(len(durations) - 1, int(p * len(durations)))] if durations else 0.0
+
+    return {"emails": outcome["email"], "of": len(emails), "failed": outcome["failed"],
+            "parked": outcome["parked"], "abandoned": outcome["abandoned"],
+            "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+            "wasted": wasted, "makespan": loop.time(), "limiter": limiter.summary()}
+
+
+def main(args) -> None:
+    log.setLevel("ERROR")
+    fixed = HealthPolicy(adaptive_timeouts=False, retries=0, hedge=False, breaker_failures=0)
+    policies = {"fixed": fixed, "resilient": HealthPolicy()}
+    real_monotonic = time.monotonic
+    print(f"{args.lookups} lookups, {args.workers} workers, bad window {args.bad_from:.0%}-{args.bad_to:.0%} "
+          f"({args.bad_mode}), stall rate {args.stall_rate:.0%}")
+    print(f"{'policy':<10} {'emails':>11} {'failed':>7} {'parks':>7} {'p50 s':>7} {'p95 s':>7} "
+          f"{'p99 s':>7} {'wasted s':>9} {'makespan s':>11}")
+    for name, policy in policies.items():
+        loop = VirtualClockLoop()
+        time.monotonic = loop.time   # limiter, breaker and latency windows follow the virtual clock
+        try:
+            r = loop.run_until_complete(run_policy(args, policy))
+        finally:
+            time.monotonic = real_monotonic
+            loop.close()
+        print(f"{name:<10} {r['emails']:>5}/{r['of']:<5} {r['failed']:>7} {r['parked']:>7} {r['p50']:>7.1f} "
+              f"{r['p95']:>7.1f} {r['p99']:>7.1f} {r['wasted']:>9.0f} {r['makespan']:>11.0f}")
+        if args.verbose:
+            print(f"           {r['limiter']}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--lookups", type=int, default=600)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--email-rate", type=float, default=0.4)
+    ap.add_argument("--median-s", type=float, default=2.0, help="median page latency (simulated seconds)")
+    ap.add_argument("--stall-rate", type=float, default=0.02, help="share of requests that never answer")
+    ap.add_argument("--bad-from", type=float, default=0.2, help="bad window start, as a share of a clean run")
+    ap.add_argument("--bad-to", type=float, default=0.5)
+    ap.add_argument("--bad-mode", choices=("hang", "wall"), default="hang")
+    ap.add_argument("--park-max", type=float, default=1800.0, help="seconds parked lookups are retried for")
+    ap.add_argument("--rates", default="instagram.com=20:40:5", help="high enough that pacing does not hide the timeouts")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--verbose", action="store_true")
+    main(ap.parse_args())
@@ -0,0 +1,121 @@
+"""
+Work-queue semantics and throughput with simulated nodes, no browser needed.
+
+    python -m benchmarks.bench_workqueue --nodes 8 --tasks 5000
+    python -m benchmarks.bench_workqueue --backend sqlite --crash-rate 0.02
+
+Every node leases profile tasks, "works" for --work-ms, then emits a row for
+--email-rate of them against a global --target. Some leases are abandoned
+(--crash-rate) to exercise the visibility timeout. Checks run afterwards:
+- every task is done
+- no row is emitted twice
+- the emitted count never passes the target
+The HTTP backend talks to an in-process WorkQueueServer, the same server
+`python -m collabstr.workqueue` runs.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+from collabstr.workqueue import HttpWorkQueue, QueueStore, SqliteWorkQueue, WorkQueueServer
+
+
+async def node(wq, args, rnd: random.Random, leased: Counter, emitted: Counter, crashed: list) -> None:
+    while True:
+        tasks = await wq.lease("profile", args.batch)
+        if not tasks:
+            if (await wq.pending("profile"))["open"] == 0:
+                return
+            await asyncio.sleep(0.05)
+            continue
+        for key, _ in tasks:
+            leased[key] += 1
+            await asyncio.sleep(args.work_ms / 1000)
+            if rnd.random() < args.crash_rate:
+                crashed.append(key)   # never acked: comes back after the lease expires
+                continue
+            if rnd.random() < args.email_rate:
+                ok, _ = await wq.emit(key, args.target)
+                if ok:
+                    emitted[key] += 1
+            await wq.ack("profile", [key])
+
+
+async def run(args) -> dict:
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "wq.sqlite3")
+    queue = "https://collabstr.com/influencers?c=bench"
+    server = None
+    if args.backend == "http":
+        server = WorkQueueServer(QueueStore(path))
+        url = server.start()
+        make = lambda: HttpWorkQueue(url, queue, ttl=args.lease)
+    else:
+        make = lambda: SqliteWorkQueue(path, queue, ttl=args.lease)
+
+    seed = make()
+    added = await seed.put("profile", [(f"https://collabstr.com/c{i:06d}", {"username": f"c{i:06d}"})
+                                       for i in range(args.tasks)])
+    again = await seed.put("profile", [(f"https://collabstr.com/c{i:06d}", {}) for i in range(args.tasks)])
+    nodes = [make() for _ in range(args.nodes)]
+    leased, emitted, crashed = Counter(), Counter(), []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(node(wq, args, random.Random(i), leased, emitted, crashed)
+                           for i, wq in enumerate(nodes)))
+    elapsed = time.perf_counter() - t0
+    pending = await seed.pending("profile")
+    count = await seed.counter("emails")
+    for wq in [seed, *nodes]:
+        await wq.aclose()
+    if server:
+        server.stop()
+
+    problems = []
+    if added != args.tasks or again:
+        problems.append(f"put added {added} then {again} (expected {args.tasks} then 0)")
+    # dead = out of attempts after repeated crashes: finished, by the queue's rules
+    if pending["open"] or pending["done"] + pending["dead"] != args.tasks:
+        problems.append(f"{args.tasks - pending['done'] - pending['dead']} tasks unfinished: {pending}")
+    if any(v > 1 for v in emitted.values()):
+        problems.append("a row was emitted twice")
+    if args.target and count > args.target:
+        problems.append(f"{count} rows emitted past the target {args.target}")
+    if count != sum(emitted.values()):
+        problems.append(f"global counter {count} != rows emitted {sum(emitted.values())}")
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "tasks_per_s": round(args.tasks / elapsed, 1),
+        "leases": sum(leased.values()),
+        "re_leased_after_crash": sum(1 for k in crashed if leased[k] > 1),
+        "crashed": len(crashed),
+        "dead": pending["dead"],
+        "emitted": count,
+        "problems": problems,
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--backend", choices=("http", "sqlite"), default="http")
+    ap.add_argument("--nodes", type=int, default=8)
+    ap.add_argument("--tasks", type=int, default=2000)
+    ap.add_argument("--batch", type=int, default=4, help="tasks leased per call")
+    ap.add_argument("--work-ms", type=float, default=2.0, help="simulated work per task")
+    ap.add_argument("--email-rate", type=float, default=0.4)
+    ap.add_argument("--target", type=int, default=500, help="global email target (0 = none)")
+    ap.add_argument("--crash-rate", type=float, default=0.01, help="share of leases abandoned without an ack")
+    ap.add_argument("--lease", type=float, default=1.0, help="visibility timeout in seconds")
+    args = ap.parse_args()
+
+    res = asyncio.run(run(args))
+    print(f"{args.tasks} tasks on {args.nodes} {args.backend} nodes in {res['elapsed_s']}s "
+          f"-> {res['tasks_per_s']}/s, {res['leases']} leases, {res['crashed']} abandoned "
+          f"({res['re_leased_after_crash']} picked up again, {res['dead']} dead after max attempts), "
+          f"{res['emitted']} rows emitted")
+    for p in res["problems"]:
+        print("PROBLEM:", p)
+    raise SystemExit(1 if res["problems"] else 0)
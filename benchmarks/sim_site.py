@@ -0,0 +1,278 @@
+"""
+Local stand-in for Collabstr and Instagram, for offline benchmarks.
+
+    python -m benchmarks.sim_site --profiles 20000 --latency-ms 80 --port 8765
+
+Everything is generated from (seed, index), so tens of thousands of profiles cost
+no memory. Routes:
+- /influencers?c=...&pg=N   listing pages of div.profile-listing-holder cards + pager
+- /<username>               profile page (span.profile-name-desktop, a[data-platform=instagram])
+- Host instagram.com /<handle>/   bio page with meta descriptions (email for some)
+Instagram links point at http://www.instagram.com/<handle>/; a browser reaches
+them through --host-resolver-rules (see SimSite.chromium_args).
+
+Injected faults: latency (+/- jitter), Cloudflare-style challenges that clear
+in-page after --solve-ms, HTTP 429s, and Instagram login-wall redirects.
+"""
+import argparse
+import html
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+FIRST = ["Jane", "Carlos", "Aisha", "Mei", "Liam", "Sofia", "Noah", "Olivia", "Mateo", "Zoe",
+         "Priya", "Kenji", "Emma", "Lucas", "Ana", "Ivan", "Fatima", "Leo", "Maya", "Omar"]
+# none of these trip the brand filter on their own, so --brand-rate is the real brand share
+LAST = ["Doe", "Smith", "Garcia", "Nguyen", "Kim", "Brown", "Rossi", "Muller", "Singh", "Park",
+        "Lopez", "Ito", "Khan", "Baker", "Silva", "Taylor", "Evans", "Hall", "Ward", "Reyes"]
+BRANDS = ["Studio", "Media", "Agency", "Productions", "Official", "Co"]
+
+CHALLENGE_PAGE = """<html><head><title>Just a moment...</title></head><body>
+<div id="challenge-running">Checking your browser before accessing the site.</div>
+<template id="real">{body}</template>
+<script>setTimeout(function () {{
+  document.title = {title};
+  document.body.innerHTML = document.getElementById('real').innerHTML;
+}}, {solve_ms});</script></body></html>"""
+
+
+class Creator:
+    __slots__ = ("index", "username", "name", "handle", "email")
+
+    def __init__(self, index: int, username: str, name: str, handle: Optional[str], email: Optional[str]):
+        self.index = index
+        self.username = username
+        self.name = name
+        self.handle = handle
+        self.email = email
+
+
+class SimSite:
+    def __init__(self, profiles: int = 10000, per_page: int = 24, latency_ms: float = 0.0,
+                 jitter: float = 0.5, challenge_rate: float = 0.0, solve_ms: int = 800,
+                 rate_429: float = 0.0, ig_wall_rate: float = 0.0, ig_rate: float = 0.8,
+                 email_rate: float = 0.35, brand_rate: float = 0.05, seed: int = 17):
+        self.profiles = profiles
+        self.per_page = per_page
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.challenge_rate = challenge_rate
+        self.solve_ms = solve_ms
+        self.rate_429 = rate_429
+        self.ig_wall_rate = ig_wall_rate
+        self.ig_rate = ig_rate
+        self.email_rate = email_rate
+        self.brand_rate = brand_rate
+        self.seed = seed
+        self.hits: Counter = Counter()
+        self._lock = threading.Lock()
+        self._rnd = random.Random(seed)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # ---------- data ----------
+    @property
+    def pages(self) -> int:
+        return -(-self.profiles // self.per_page)
+
+    def creator(self, i: int) -> Creator:
+        r = random.Random(self.seed * 1_000_003 + i)
+        name = f"{r.choice(FIRST)} {r.choice(LAST)}"
+        if r.random() < self.brand_rate:
+            name = f"{r.choice(LAST)} {r.choice(BRANDS)}"
+        handle = f"ig{i:06d}" if r.random() < self.ig_rate else None
+        email = f"{handle}@example.com" if handle and r.random() < self.email_rate else None
+        return Creator(i, f"c{i:06d}", name, handle, email)
+
+    def expected_emails(self) -> int:
+        return sum(1 for i in range(self.profiles) if self.creator(i).email)
+
+    # ---------- pages ----------
+    def listing_body(self, pg: int) -> str:
+        start = (pg - 1) * self.per_page
+        cards = "".join(
+            f'<div class="profile-listing-holder"><a href="/{c.username}"><img alt="" src="/img/{c.username}.jpg"></a>'
+            f'<div class="profile-listing-name">{html.escape(c.name)}</div></div>'
+            for c in (self.creator(i) for i in range(start, min(start + self.per_page, self.profiles)))
+        ) if 1 <= pg <= self.pages else ""
+        window = sorted({1, *range(max(1, pg - 2), min(self.pages, pg + 2) + 1), self.pages})
+        pager = "".join(f'<a href="/influencers?pg={n}">{n}</a>' for n in window)
+        return f'<div class="listing">{cards}</div><nav class="pager">{pager}</nav>'
+
+    def profile_body(self, c: Creator) -> str:
+        ig = (f'<a data-platform="instagram" href="http://www.instagram.com/{c.handle}/">Instagram</a>'
+              if c.handle else "")
+        return (f'<span class="profile-name-desktop">{html.escape(c.name)}</span>'
+                f'<div class="bio">UGC creator #{c.index}</div>{ig}')
+
+    def instagram_page(self, c: Creator) -> str:
+        bio = f"{c.name} | content creator"
+        if c.email:
+            bio += f" | collabs: {c.email}"
+        bio = html.escape(bio, quote=True)
+        return (f'<html><head><title>{html.escape(c.name)} (@{c.handle})</title>'
+                f'<meta property="og:description" content="{bio}">'
+                f'<meta name="description" content="{bio}"></head>'
+                f'<body><main>{bio}</main></body></html>')
+
+    def wrap(self, title: str, body: str, challenge: bool) -> str:
+        if challenge:
+            return CHALLENGE_PAGE.format(body=body, title=repr(title), solve_ms=self.solve_ms)
+        return f"<html><head><title>{html.escape(title)}</title></head><body>{body}</body></html>"
+
+    # ---------- server ----------
+    def roll(self, p: float) -> bool:
+        with self._lock:
+            return p > 0 and self._rnd.random() < p
+
+    def delay(self) -> None:
+        if self.latency_ms > 0:
+            with self._lock:
+                f = self._rnd.uniform(1 - self.jitter, 1 + self.jitter)
+            time.sleep(self.latency_ms * f / 1000)
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.hits[key] += 1
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True   # headers and body go out as separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                site.route(self)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def chromium_args(self) -> List[str]:
+        """Send the browser's instagram.com requests to this server."""
+        return [f"--host-resolver-rules=MAP instagram.com 127.0.0.1:{self.port},"
+                f"MAP *.instagram.com 127.0.0.1:{self.port}"]
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def route(self, req: BaseHTTPRequestHandler) -> None:
+        parts = urlsplit(req.path)
+        host = (req.headers.get("Host") or "").split(":")[0].lower()
+        segs = [s for s in parts.path.split("/") if s]
+        self.delay()
+        if parts.path.startswith("/img/"):
+            self.count("image")
+            return self.send(req, 200, "", ctype="image/jpeg")
+        if self.roll(self.rate_429):
+            self.count("429")
+            return self.send(req, 429, "<html><body>Too Many Requests</body></html>")
+
+        if host.endswith("instagram.com"):
+            if segs[:2] == ["accounts", "login"]:
+                self.count("ig:login")
+                return self.send(req, 200, self.wrap("Login • Instagram", "<form>Log in</form>", False))
+            c = self._by_key(segs[0] if segs else "", "ig")
+            if c is None or not c.handle:
+                self.count("ig:404")
+                return self.send(req, 404, "<html><body>Sorry, this page isn't available.</body></html>")
+            if self.roll(self.ig_wall_rate):
+                self.count("ig:wall")
+                return self.redirect(req, f"/accounts/login/?next=/{c.handle}/")
+            self.count("ig:bio")
+            return self.send(req, 200, self.instagram_page(c))
+
+        challenge = self.roll(self.challenge_rate)
+        if challenge:
+            self.count("challenge")
+        if parts.path.rstrip("/") == "/influencers":
+            pg = parse_qs(parts.query).get("pg", ["1"])[0]
+            pg = int(pg) if pg.isdigit() else 1
+            self.count("listing" if pg <= self.pages else "listing:past-end")
+            return self.send(req, 200, self.wrap("Find Influencers | Collabstr", self.listing_body(pg), challenge))
+        c = self._by_key(segs[0] if len(segs) == 1 else "", "c")
+        if c is None:
+            self.count("404")
+            return self.send(req, 404, self.wrap("Not found", "Not found", False))
+        self.count("profile")
+        return self.send(req, 200, self.wrap(f"{c.name} | Collabstr", self.profile_body(c), challenge))
+
+    def _by_key(self, key: str, prefix: str) -> Optional[Creator]:
+        digits = key[len(prefix):]
+        if not key.startswith(prefix) or not digits.isdigit() or int(digits) >= self.profiles:
+            return None
+        return self.creator(int(digits))
+
+    @staticmethod
+    def send(req, status: int, body: str, ctype: str = "text/html; charset=utf-8") -> None:
+        data = body.encode("utf-8")
+        req.send_response(status)
+        req.send_header("Content-Type", ctype)
+        req.send_header("Content-Length", str(len(data)))
+        req.end_headers()
+        try:
+            req.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass   # the client gave up on it (e.g. a hedged request that lost the race)
+
+    @staticmethod
+    def redirect(req, location: str) -> None:
+        req.send_response(302)
+        req.send_header("Location", location)
+        req.send_header("Content-Length", "0")
+        req.end_headers()
+
+
+def add_site_args(ap: argparse.ArgumentParser) -> None:
+    g = ap.add_argument_group("simulated site")
+    g.add_argument("--profiles", type=int, default=2000, help="creators in the catalog")
+    g.add_argument("--per-page", type=int, default=24, help="cards per listing page")
+    g.add_argument("--latency-ms", type=float, default=50.0, help="mean server latency")
+    g.add_argument("--jitter", type=float, default=0.5, help="latency spread, as a fraction of the mean")
+    g.add_argument("--challenge-rate", type=float, default=0.0, help="share of Collabstr pages served as a challenge")
+    g.add_argument("--solve-ms", type=int, default=800, help="time until an injected challenge clears")
+    g.add_argument("--rate-429", type=float, default=0.0, help="share of requests answered with 429")
+    g.add_argument("--ig-wall-rate", type=float, default=0.0, help="share of Instagram pages redirected to login")
+    g.add_argument("--brand-rate", type=float, default=0.05, help="share of brand-named creators")
+    g.add_argument("--seed", type=int, default=17)
+
+
+def site_from_args(args) -> SimSite:
+    return SimSite(profiles=args.profiles, per_page=args.per_page, latency_ms=args.latency_ms,
+                   jitter=args.jitter, challenge_rate=args.challenge_rate, solve_ms=args.solve_ms,
+                   rate_429=args.rate_429, ig_wall_rate=args.ig_wall_rate,
+                   brand_rate=args.brand_rate, seed=args.seed)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--port", type=int, default=8765)
+    add_site_args(ap)
+    args = ap.parse_args()
+    site = site_from_args(args)
+    print(f"serving {site.profiles} creators on {site.pages} listing pages at "
+          f"{site.start(port=args.port)}/influencers?c=UGC  (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
@@ -0,0 +1,161 @@
+"""
+Opt-in raw page archive (ARCHIVE_ENABLED): the HTML of every listing, profile and
+Instagram page, so broken selectors can be fixed and the output regenerated
+offline (python -m collabstr.reparse) instead of re-crawling.
+
+Layout of ARCHIVE_DIR:
+- seg-<host>-<pid>-<n>.z   append-only segments, one writer process each; a
+  record is a 4-byte length + zlib(JSON header line + HTML), so segments are
+  readable without the index
+- index.sqlite3            kind, url, role, fetched_at -> segment, offset, length
+"""
+import json
+import os
+import socket
+import sqlite3
+import struct
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .utils import log
+
+_LEN = struct.Struct("<I")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    kind       TEXT NOT NULL,
+    url        TEXT NOT NULL,
+    role       TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    segment    TEXT NOT NULL,
+    offset     INTEGER NOT NULL,
+    length     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_kind ON pages (kind, url);
+"""
+
+LISTING = "listing"
+PROFILE = "profile"
+INSTAGRAM = "instagram"
+
+
+def read_record(f, offset: int, length: int) -> Tuple[dict, str]:
+    """(header, html) of the record at offset in an open segment."""
+    f.seek(offset)
+    raw = zlib.decompress(f.read(length)[_LEN.size:])
+    head, _, body = raw.partition(b"\n")
+    return json.loads(head), body.decode("utf-8", errors="replace")
+
+
+def iter_segment(path: str) -> Iterator[Tuple[dict, str]]:
+    """Every record of a segment, in order, without the index (stops at a torn tail)."""
+    with open(path, "rb") as f:
+        while True:
+            n = f.read(_LEN.size)
+            if len(n) < _LEN.size:
+                return
+            blob = f.read(_LEN.unpack(n)[0])
+            try:
+                raw = zlib.decompress(blob)
+            except zlib.error:
+                return
+            head, _, body = raw.partition(b"\n")
+            yield json.loads(head), body.decode("utf-8", errors="replace")
+
+
+class PageArchive:
+    def __init__(self, root: str, segment_bytes: int = 256 << 20, level: int = 6,
+                 flush_every: int = 50, flush_interval: float = 5.0):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.level = level
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        os.makedirs(root, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, "index.sqlite3"), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(_SCHEMA)
+        self._prefix = f"seg-{socket.gethostname()}-{os.getpid()}-"
+        self._n = 0
+        self._seg: Optional[str] = None
+        self._f = None
+        self._rows: List[tuple] = []
+        self._last_flush = time.monotonic()
+        self.counts: Counter = Counter()
+
+    def _segment(self):
+        if self._f is None or self._f.tell() >= self.segment_bytes:
+            if self._f:
+                self._f.close()
+            self._n += 1
+            self._seg = f"{self._prefix}{self._n:04d}.z"
+            self._f = open(os.path.join(self.root, self._seg), "ab")
+        return self._f
+
+    def put(self, kind: str, url: str, html: str, role: str = "") -> None:
+        """Append one page; errors are logged, never raised (the archive is best-effort)."""
+        if not html:
+            return
+        try:
+            now = time.time()
+            head = json.dumps({"kind": kind, "url": url, "role": role, "fetched_at": now})
+            blob = zlib.compress(head.encode("utf-8") + b"\n" + html.encode("utf-8"), self.level)
+            f = self._segment()
+            offset = f.tell()
+            f.write(_LEN.pack(len(blob)) + blob)
+            f.flush()
+            self._rows.append((kind, url, role, now, self._seg, offset, _LEN.size + len(blob)))
+            self.counts[kind] += 1
+            self.counts["bytes"] += _LEN.size + len(blob)
+            if (len(self._rows) >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+        except Exception as e:
+            log.warning(f"[archive] could not store {url}: {e}")
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        with self.db:
+            self.db.executemany("INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)", self._rows)
+        self._rows.clear()
+        self._last_flush = time.monotonic()
+
+    def summary(self) -> str:
+        mb = self.counts["bytes"] / 1e6
+        pages = ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items()) if k != "bytes")
+        return f"{pages or 'no pages'} ({mb:.1f} MB compressed)"
+
+    def close(self) -> None:
+        self.flush()
+        if self._f:
+            self._f.close()
+        self.db.close()
+
+
+def latest_records(root: str, kinds: Tuple[str, ...] = (LISTING, PROFILE, INSTAGRAM)) -> Dict[str, List[tuple]]:
+    """segment -> [(offset, length)] of the newest record per (kind, url), in file order."""
+    db = sqlite3.connect(os.path.join(root, "index.sqlite3"))
+    try:
+        rows = db.execute(
+            f"SELECT segment, offset, length, kind, url, MAX(fetched_at) FROM pages "
+            f"WHERE kind IN ({','.join('?' * len(kinds))}) GROUP BY kind, url",
+            kinds,
+        ).fetchall()
+    finally:
+        db.close()
+    out: Dict[str, List[tuple]] = {}
+    for seg, offset, length, *_ in rows:
+        out.setdefault(seg, []).append((offset, length))
+    for recs in out.values():
+        recs.sort()
+    return out
+
+
+def open_archive(cfg) -> Optional[PageArchive]:
+    if not cfg.ARCHIVE_ENABLED:
+        return None
+    log.info(f"[archive] storing raw pages under {cfg.ARCHIVE_DIR}")
+    return PageArchive(cfg.ARCHIVE_DIR, segment_bytes=int(cfg.ARCHIVE_SEGMENT_MB * (1 << 20)))
@@ -1,63 +1,78 @@
 from pathlib import Path
-from .selectors import USERNAME_INPUT, PASSWORD_INPUT, LOGIN_BUTTON
+from selectolax.lexbor import LexborHTMLParser
+from .metrics import METRICS
+from .selectors import USERNAME_INPUT, PASSWORD_INPUT, LOGIN_BUTTON, LOGGED_IN
 from .utils import load_cookies, save_cookies, wait_for_cloudflare, log
 
-def _is_logged_in(page) -> bool:
+async def is_logged_in(page) -> bool:
     try:
-        if (page.query_selector(".dashboard-menu-holder")
-            or page.query_selector(".dashboard-img")
-            or page.query_selector("a.header-btn.dashboard-btn")
-            or page.query_selector("a[href='/dashboard']")
-            or page.query_selector("button:has-text('Logout')")
-            or page.query_selector(".profile-avatar")):
+        if (await page.query_selector(LOGGED_IN)
+            or await page.query_selector("button:has-text('Logout')")):
             return True
         url = page.url.lower()
         if any(k in url for k in ["/dashboard", "/account", "/home"]):
             return True
-        title = (page.title() or "").lower()
+        title = (await page.title() or "").lower()
         if any(k in title for k in ["dashboard", "account", "profile"]):
             return True
         return False
     except Exception:
         return False
 
-def login_if_needed(context, cfg):
+def is_logged_in_html(html: str) -> bool:
+    """
+    is_logged_in for a page fetched over plain HTTP. Markup only: the URL and title
+    checks would pass any profile page, logged in or not.
+    """
+    tree = LexborHTMLParser(html)
+    return bool(tree.css_first(LOGGED_IN)) or any("logout" in b.text(strip=True).lower() for b in tree.css("button"))
+
+async def login_if_needed(context, cfg, try_cookies: bool = True):
     if not cfg.COLLABSTR_EMAIL or not cfg.COLLABSTR_PASSWORD:
         raise RuntimeError("COLLABSTR_EMAIL/COLLABSTR_PASSWORD missing (see .env).")
 
     cookie_path = Path(cfg.COOKIES_PATH)
-    page = context.new_page()
+    page = await context.new_page()
 
     # Try cookies
-    if load_cookies(context, cookie_path):
-        page.goto("https://collabstr.com", wait_until="domcontentloaded", timeout=30000)
-        if _is_logged_in(page):
+    if try_cookies and await load_cookies(context, cookie_path):
+        with METRICS.timer("login", method="cookies"):
+            await page.goto("https://collabstr.com", wait_until="domcontentloaded", timeout=30000)
+            ok = await is_logged_in(page)
+        METRICS.inc("login", method="cookies", result="ok" if ok else "expired")
+        if ok:
             log.info("Already logged in via cookies.")
-            page.close()
+            await page.close()
             return
 
     # Fresh login
-    page.goto(cfg.LOGIN_URL, wait_until="domcontentloaded", timeout=60000)
-    if not wait_for_cloudflare(page):
-        page.close()
+    with METRICS.timer("login", method="form"):
+        await _form_login(page, cfg)
+    METRICS.inc("login", method="form", result="ok")
+    await save_cookies(context, cookie_path)
+    await page.close()
+
+
+async def _form_login(page, cfg):
+    await page.goto(cfg.LOGIN_URL, wait_until="domcontentloaded", timeout=60000)
+    if not await wait_for_cloudflare(page):
+        await page.close()
         raise RuntimeError("Cloudflare/challenge on login page—manual solve needed.")
 
-    page.fill(USERNAME_INPUT, cfg.COLLABSTR_EMAIL, timeout=7000)
-    page.fill(PASSWORD_INPUT, cfg.COLLABSTR_PASSWORD, timeout=7000)
+    await page.fill(USERNAME_INPUT, cfg.COLLABSTR_EMAIL, timeout=7000)
+    await page.fill(PASSWORD_INPUT, cfg.COLLABSTR_PASSWORD, timeout=7000)
 
-    if page.query_selector(LOGIN_BUTTON):
-        page.click(LOGIN_BUTTON)
+    if await page.query_selector(LOGIN_BUTTON):
+        await page.click(LOGIN_BUTTON)
     else:
-        page.keyboard.press("Enter")
+        await page.keyboard.press("Enter")
 
     try:
-        page.wait_for_load_state("networkidle", timeout=15000)
+        await page.wait_for_load_state("networkidle", timeout=15000)
     except Exception:
         pass
 
-    if _is_logged_in(page):
+    if await is_logged_in(page):
         log.info("Login succeeded.")
-        save_cookies(context, cookie_path)
     else:
         raise RuntimeError("Login failed or requires verification (2FA/CAPTCHA).")
-    page.close()
@@ -0,0 +1,111 @@
+from collections import Counter
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+from .utils import log
+
+DEFAULT_BLOCK_TYPES = ("image", "media", "font")
+DEFAULT_DENY_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "connect.facebook.net", "hotjar.com", "segment.io", "segment.com", "mixpanel.com",
+    "intercom.io", "intercomcdn.com", "clarity.ms", "tiktok.com", "analytics.tiktok.com",
+    "bat.bing.com", "sentry.io", "fullstory.com",
+)
+# never blocked, whatever the type/domain rules say (Cloudflare's challenge assets)
+DEFAULT_ALLOW_DOMAINS = ("challenges.cloudflare.com",)
+
+# rough transfer sizes, used to estimate bytes saved (blocked requests are never downloaded)
+_EST_BYTES = {"image": 60_000, "media": 500_000, "font": 40_000, "stylesheet": 30_000,
+              "script": 50_000, "xhr": 5_000, "fetch": 5_000}
+
+
+def _host_in(host: str, domains) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class ResourceBlocker:
+    """
+    Context-wide request interception:
+    - allow_domains always pass (keeps Cloudflare checks working)
+    - deny_domains and block_types are aborted
+    Blocked requests / estimated bytes are counted per page and in total.
+    """
+
+    def __init__(self, block_types=DEFAULT_BLOCK_TYPES, deny_domains=DEFAULT_DENY_DOMAINS,
+                 allow_domains=DEFAULT_ALLOW_DOMAINS):
+        self.block_types = set(block_types)
+        self.deny_domains = tuple(deny_domains)
+        self.allow_domains = tuple(allow_domains)
+        self.totals: Counter = Counter()
+        self._pages: Dict[int, Counter] = {}
+
+    @classmethod
+    def from_cfg(cls, cfg) -> "ResourceBlocker":
+        return cls(cfg.BLOCK_RESOURCE_TYPES, cfg.BLOCK_DOMAINS, cfg.ALLOW_DOMAINS)
+
+    async def install(self, context) -> None:
+        context.on("page", self._track_page)
+        await context.route("**/*", self._handle)
+
+    def decide(self, url: str, resource_type: str) -> Tuple[bool, str]:
+        """(block?, reason)"""
+        host = (urlsplit(url).hostname or "").lower()
+        if _host_in(host, self.allow_domains):
+            return False, "allowed"
+        if _host_in(host, self.deny_domains):
+            return True, "domain"
+        if resource_type in self.block_types:
+            return True, resource_type
+        return False, "pass"
+
+    async def _handle(self, route) -> None:
+        req = route.request
+        try:
+            top_nav = req.is_navigation_request() and req.frame.parent_frame is None
+        except Exception:
+            top_nav = False
+        # the page we asked for always loads; rules only apply to what it pulls in
+        block, reason = (False, "navigation") if top_nav else self.decide(req.url, req.resource_type)
+        if not block:
+            self.totals["allowed"] += 1
+            await route.continue_()
+            return
+        est = _EST_BYTES.get(req.resource_type, 10_000)
+        self.totals["blocked"] += 1
+        self.totals[f"blocked:{reason}"] += 1
+        self.totals["blocked_bytes_est"] += est
+        try:
+            stats = self._pages.get(id(req.frame.page))
+        except Exception:   # service-worker requests have no frame
+            stats = None
+        if stats is not None:
+            stats["blocked"] += 1
+            stats["blocked_bytes_est"] += est
+        await route.abort("blockedbyclient")
+
+    def _track_page(self, page) -> None:
+        self._pages[id(page)] = Counter()
+        page.on("close", lambda p=page: self._finish_page(p))
+
+    def _finish_page(self, page) -> None:
+        stats = self._pages.pop(id(page), None)
+        if stats and stats["blocked"]:
+            log.debug(f"[block] {page.url} blocked {stats['blocked']} requests "
+                      f"(~{stats['blocked_bytes_est'] // 1024} KB)")
+
+    def page_stats(self, page) -> Counter:
+        return self._pages.get(id(page), Counter())
+
+    def take_page_stats(self, page) -> Counter:
+        """Counts since the last call; pooled tabs are reused, so close events come late."""
+        stats = self._pages.get(id(page))
+        if stats is None:
+            return Counter()
+        self._pages[id(page)] = Counter()
+        return stats
+
+    def summary(self) -> str:
+        t = self.totals
+        return (f"blocked {t['blocked']} of {t['blocked'] + t['allowed']} requests "
+                f"(~{t['blocked_bytes_est'] // (1024 * 1024)} MB est.) "
+                + " ".join(f"{k}={v}" for k, v in sorted(t.items()) if k.startswith("blocked:")))
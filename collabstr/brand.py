@@ -0,0 +1,79 @@
+"""
+Brand-vs-creator name check, compiled once and memoized per normalized name.
+Same decisions as the original per-call version: a leading "the", an exact
+keyword, or any token whose WRatio against a keyword reaches the threshold.
+"""
+import re
+from typing import Dict, Iterable, List
+
+from rapidfuzz import fuzz, process
+
+BRAND_KEYWORDS = [
+    "studio","media","agency","productions","designs","labs","official",
+    "channel","team","llc","inc","ltd","pvt","gmbh","plc","co","company","group"
+]
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_name(name: str) -> str:
+    return _NON_WORD.sub(" ", name or "").strip().lower()
+
+
+class BrandClassifier:
+    """
+    classify_many(names) scores every not-yet-seen token of a batch against the
+    keywords in one rapidfuzz cdist call (numpy needed; otherwise one extractOne
+    per new token). Verdicts are memoized per normalized name and per token.
+    """
+
+    MAX_MEMO = 200_000
+
+    def __init__(self, keywords: Iterable[str] = BRAND_KEYWORDS, threshold: int = 85):
+        self.keywords = list(keywords)
+        self.threshold = threshold
+        self._exact = re.compile(r"\b(" + "|".join(map(re.escape, self.keywords)) + r")\b")
+        self._names: Dict[str, bool] = {}
+        self._tokens: Dict[str, bool] = {}
+
+    def is_brand(self, name: str) -> bool:
+        return self.classify_many([name])[0]
+
+    def classify_many(self, names: List[str]) -> List[bool]:
+        norm = [normalize_name(n) for n in names]
+        todo = {n for n in norm if n not in self._names}
+        if todo:
+            fuzzy = []
+            for n in todo:
+                if not n:
+                    self._names[n] = False
+                elif n.startswith("the ") or self._exact.search(n):
+                    self._names[n] = True
+                else:
+                    fuzzy.append(n)
+            self._score_tokens({t for n in fuzzy for t in n.split()} - self._tokens.keys())
+            for n in fuzzy:
+                self._names[n] = any(self._tokens[t] for t in n.split())
+        out = [self._names[n] for n in norm]
+        if len(self._names) > self.MAX_MEMO:
+            self._names.clear()
+            self._tokens.clear()
+        return out
+
+    def _score_tokens(self, tokens) -> None:
+        if not tokens:
+            return
+        tokens = list(tokens)
+        try:
+            scores = process.cdist(tokens, self.keywords, scorer=fuzz.WRatio,
+                                   score_cutoff=self.threshold, workers=1)
+        except ImportError:   # rapidfuzz's cdist returns a numpy array
+            for t in tokens:
+                best = process.extractOne(t, self.keywords, scorer=fuzz.WRatio)
+                self._tokens[t] = bool(best and best[1] >= self.threshold)
+            return
+        for t, row in zip(tokens, scores.max(axis=1)):
+            self._tokens[t] = bool(row >= self.threshold)
+
+
+BRAND_CLASSIFIER = BrandClassifier()
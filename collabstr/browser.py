@@ -1,40 +1,77 @@
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
+
+from .blocking import ResourceBlocker
+from .metrics import METRICS
+from .utils import log
+
+def _count_response_bytes(response) -> None:
+    # Content-Length only: reading bodies would cost more than the metric is worth
+    n = response.headers.get("content-length")
+    if n and n.isdigit():
+        METRICS.inc("bytes", int(n), source="browser")
+
 
 class BrowserMgr:
-    def __init__(self, cfg):
+    def __init__(self, cfg, extra_args=(), storage_state=None):
         self.cfg = cfg
+        self.extra_args = list(extra_args)   # extra Chromium switches (benchmarks map hosts with these)
+        self.storage_state = storage_state   # saved session to boot the first context with
         self._pw = None
         self._browser = None
         self.context = None
+        self.blocker = ResourceBlocker.from_cfg(cfg) if cfg.BLOCK_RESOURCES else None
 
-    def __enter__(self):
-        self._pw = sync_playwright().start()
-        self._browser = self._pw.chromium.launch(
+    async def __aenter__(self):
+        self._pw = await async_playwright().start()
+        self._browser = await self._pw.chromium.launch(
             headless=self.cfg.HEADLESS,
-            args=['--no-sandbox', '--disable-dev-shm-usage', '--disable-blink-features=AutomationControlled']
+            args=['--no-sandbox', '--disable-dev-shm-usage', '--disable-blink-features=AutomationControlled',
+                  *self.extra_args]
         )
-        self.context = self._browser.new_context(
+        self.context = await self._new_context(storage_state=self.storage_state)
+        return self
+
+    async def _new_context(self, storage_state=None):
+        context = await self._browser.new_context(
             viewport={'width': 1280, 'height': 800},
             user_agent=self.cfg.USER_AGENT,
             locale='en-US',
-            timezone_id=self.cfg.TIMEZONE
+            timezone_id=self.cfg.TIMEZONE,
+            storage_state=storage_state
         )
         # stealth-ish
-        self.context.add_init_script("""            Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+        await context.add_init_script("""            Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
             Object.defineProperty(navigator, 'plugins', { get: () => [1,2,3,4,5] });
             Object.defineProperty(navigator, 'languages', { get: () => ['en-US', 'en'] });
             window.chrome = { runtime: {} };
         """)
-        return self
+        if self.blocker:
+            await self.blocker.install(context)
+        if METRICS.enabled:
+            context.on("response", _count_response_bytes)
+        return context
+
+    async def recycle_context(self):
+        """Swap in a fresh context carrying over cookies + localStorage (keeps the login)."""
+        state = await self.context.storage_state()
+        old = self.context
+        self.context = await self._new_context(storage_state=state)
+        try:
+            await old.close()
+        except Exception as e:
+            log.warning(f"Closing recycled context failed: {e}")
+        return self.context
 
-    def __exit__(self, exc_type, exc, tb):
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.blocker:
+            log.info(f"[block] {self.blocker.summary()}")
         try:
             if self.context:
-                self.context.close()
+                await self.context.close()
         finally:
             try:
                 if self._browser:
-                    self._browser.close()
+                    await self._browser.close()
             finally:
                 if self._pw:
-                    self._pw.stop()
+                    await self._pw.stop()
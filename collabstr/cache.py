@@ -0,0 +1,152 @@
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    url         TEXT NOT NULL,
+    payload     BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    negative    INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    expires_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at);
+"""
+
+# query strings on these hosts are tracking noise (igshid, utm_*, hl)
+_DROP_QUERY_HOSTS = ("instagram.com",)
+
+
+def normalize_url(url: str) -> str:
+    """Stable cache key form: lowercase host without www, no fragment, sorted query, no trailing slash."""
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if any(host == h or host.endswith("." + h) for h in _DROP_QUERY_HOSTS):
+        query = ""
+    else:
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(((parts.scheme or "https").lower(), host, path, query, ""))
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of extracted page fields, keyed by sha256(kind + normalized URL).
+    - payloads are zlib-compressed JSON
+    - entries expire after their TTL; negative results ("no email here") get their own TTL
+    - total payload size is capped; least recently used entries are evicted first
+    Safe to share between role processes (SQLite WAL). Reads never write: hits are
+    noted in memory and their access times are written with the next put, before
+    an eviction, and on close, so a busy writer can't stall a lookup.
+    """
+
+    def __init__(self, path: str, ttl: float, negative_ttl: float, max_bytes: int):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_bytes = max_bytes
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self.counts: Counter = Counter()
+        self._touched: Dict[str, float] = {}   # key -> last hit, not yet written to accessed_at
+        # running estimate; other processes' writes are picked up when eviction recounts
+        self._total = self._size()
+
+    def _size(self) -> int:
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def key(kind: str, url: str) -> str:
+        return hashlib.sha256(f"{kind}|{normalize_url(url)}".encode("utf-8")).hexdigest()
+
+    def get(self, kind: str, url: str, max_age: Optional[float] = None) -> Optional[dict]:
+        """Cached value, or None; with max_age (seconds) older entries count as misses too."""
+        k = self.key(kind, url)
+        now = time.time()
+        row = self.db.execute(
+            "SELECT payload, negative, expires_at, created_at FROM entries WHERE key=?", (k,)
+        ).fetchone()
+        if not row or row[2] <= now:
+            self.counts[f"{kind}:miss"] += 1
+            return None
+        if max_age is not None and now - row[3] > max_age:
+            self.counts[f"{kind}:too_old"] += 1
+            return None
+        self._touched[k] = now
+        self.counts[f"{kind}:{'negative_hit' if row[1] else 'hit'}"] += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, kind: str, url: str, value: dict, negative: bool = False) -> None:
+        blob = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        now = time.time()
+        ttl = self.negative_ttl if negative else self.ttl
+        with self.db:
+            self._write_touches()
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(kind, url), kind, normalize_url(url), blob, len(blob),
+                 int(negative), now, now + ttl, now),
+            )
+        self.counts[f"{kind}:store"] += 1
+        self._total += len(blob)
+        if self._total > self.max_bytes:
+            self._evict()
+
+    def _write_touches(self) -> None:
+        """Record buffered hits in accessed_at (inside the caller's transaction)."""
+        if self._touched:
+            self.db.executemany("UPDATE entries SET accessed_at=? WHERE key=? AND accessed_at<?",
+                                [(t, k, t) for k, t in self._touched.items()])
+            self._touched = {}
+
+    def _evict(self) -> None:
+        now = time.time()
+        with self.db:
+            self._write_touches()
+            expired = self.db.execute("DELETE FROM entries WHERE expires_at <= ?", (now,)).rowcount
+            self.counts["evicted"] += max(expired, 0)
+            total = self._size()
+            # trim to 90% of the cap so eviction doesn't run on every put
+            target = int(self.max_bytes * 0.9)
+            for k, size in self.db.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall():
+                if total <= target:
+                    break
+                self.db.execute("DELETE FROM entries WHERE key=?", (k,))
+                total -= size
+                self.counts["evicted"] += 1
+        self._total = total
+
+    def summary(self) -> str:
+        return ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items())) or "unused"
+
+    def close(self) -> None:
+        try:
+            with self.db:
+                self._write_touches()
+        except sqlite3.Error:
+            self.counts["touch_errors"] += 1   # LRU order only; nothing is lost
+        self.db.close()
+
+
+def open_cache(cfg) -> Optional[ResponseCache]:
+    if not cfg.CACHE_ENABLED:
+        return None
+    return ResponseCache(
+        cfg.CACHE_PATH,
+        ttl=cfg.CACHE_TTL_HOURS * 3600,
+        negative_ttl=cfg.CACHE_NEGATIVE_TTL_HOURS * 3600,
+        max_bytes=int(cfg.CACHE_MAX_MB * 1024 * 1024),
+    )
@@ -0,0 +1,66 @@
+"""
+Challenge detection without polling: one in-page check right after navigation,
+and only when a challenge is showing, a mutation-driven wait_for_function that
+resolves the moment the real page replaces it.
+"""
+import time
+from typing import Optional
+
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeout
+
+CLEAN = "clean"
+SOLVED = "challenge-solved"
+STUCK = "challenge-stuck"
+BLOCKED = "blocked"
+
+# interstitial markers only: a Turnstile widget (#turnstile-wrapper, the challenges.cloudflare.com
+# script) also sits on ordinary login/signup forms and its script never leaves the DOM
+_IS_CHALLENGE = """
+    (document.title && /just a moment|attention required|cloudflare/i.test(document.title))
+    || !!document.querySelector('#challenge-form, #challenge-running, #cf-challenge-running, '
+                                + '.cf-browser-verification')
+"""
+CHALLENGE_JS = "() => (" + _IS_CHALLENGE + ")"
+CLEARED_JS = "() => document.readyState !== 'loading' && !(" + _IS_CHALLENGE + ")"
+
+
+async def _eval_until(page, fn: str, deadline: float, wait: bool):
+    """
+    page.evaluate / wait_for_function that survives the navigation a solved
+    challenge triggers. Returns None when the deadline passes.
+    """
+    while True:
+        remaining_ms = (deadline - time.monotonic()) * 1000
+        if remaining_ms <= 0:
+            return None
+        try:
+            if wait:
+                await page.wait_for_function(fn, polling="mutation", timeout=remaining_ms)
+                return True
+            return await page.evaluate(fn)
+        except PlaywrightTimeout:
+            return None
+        except PlaywrightError as e:
+            msg = str(e).lower()
+            if "context was destroyed" not in msg and "navigat" not in msg:
+                raise
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=max(remaining_ms, 1))
+            except PlaywrightTimeout:
+                return None
+
+
+async def detect_challenge(page, status: Optional[int] = None, max_wait: float = 45) -> str:
+    """
+    Classify a freshly navigated page:
+    - clean: real content straight away
+    - challenge-solved: a challenge showed and cleared within max_wait
+    - challenge-stuck: still on the challenge after max_wait
+    - blocked: no challenge, but the server refused us (403/429)
+    """
+    deadline = time.monotonic() + max_wait
+    challenged = await _eval_until(page, CHALLENGE_JS, deadline, wait=False)
+    if not challenged:
+        return BLOCKED if status in (403, 429) else CLEAN
+    cleared = await _eval_until(page, CLEARED_JS, deadline, wait=True)
+    return SOLVED if cleared else STUCK
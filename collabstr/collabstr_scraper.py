@@ -1,20 +1,53 @@
-from typing import List, Tuple, Iterator
-from urllib.parse import urlencode, urlparse, parse_qs, urlunparse
-import time, random
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse, parse_qs, urlunparse, urljoin
 
 from .models import ListingProfile
-from .selectors import LISTING_ITEM, PROFILE_LINK_REL, NAME_ON_PROFILE, INSTAGRAM_LINK
-from .utils import log, wait_for_cloudflare, jitter, is_brand_like_fuzzy
+from .extract import extract_listing_cards, extract_profile
+from .challenge import STUCK, BLOCKED
+from .brand import BRAND_CLASSIFIER
+from .metrics import METRICS
+from .utils import log, cloudflare_problem, goto_paced
 
 
-def _normalize_profile(href: str) -> str:
-    return ("https://collabstr.com" + href) if href and href.startswith("/") else href
+_MAX_PAGES_UNBOUNDED = 10_000
+_MAX_FAILED_IN_A_ROW = 5   # unplanned listings: stop (for --resume) once this many pages fail in a row
+
+
+class ListingFetchError(Exception):
+    """A listing page could not be loaded (navigation failure, Cloudflare): unknown, not empty."""
+
+
+def _normalize_profile(href: str, base_url: str = "https://collabstr.com") -> str:
+    return urljoin(base_url, href) if href and href.startswith("/") else href
+
+
+def _fingerprint(profiles: List[ListingProfile]) -> str:
+    """Identity of a listing page: every card, in order ('' for an empty page)."""
+    if not profiles:
+        return ""
+    return hashlib.sha1("\n".join(p.profile_url for p in profiles).encode("utf-8")).hexdigest()
+
+
+@asynccontextmanager
+async def _no_gate():
+    yield
 
 class CollabstrListingScraper:
-    def __init__(self, cfg, context):
+    def __init__(self, cfg, pages, http=None, cache=None, limiter=None, gate=None, session=None, archive=None):
         self.cfg = cfg
-        self.context = context
-        self._last_first_profile_url: str  = None
+        self.pages = pages       # PagePool leasing reusable tabs
+        self.http = http         # optional HttpFetcher; browser is the fallback
+        self.cache = cache       # optional ResponseCache of extracted profile fields
+        self.limiter = limiter   # optional RateController pacing every navigation
+        self._gate = gate or _no_gate   # () -> async ctx held around each listing fetch (fair share)
+        self.session = session   # optional SessionManager; validates the login on the first page
+        self.archive = archive   # optional PageArchive of the raw pages
+        self._last_first_profile_url: str  = None   # resume seed: first card of the last page done
+        self._fetched: Dict[int, Tuple[List[ListingProfile], int]] = {}
+        self._fingerprints: Dict[str, int] = {}   # page fingerprint -> first page it was seen on
 
     # ---------- helpers ----------
     def _page_url(self, base_url: str, page_num: int) -> str:
@@ -27,140 +60,251 @@ class CollabstrListingScraper:
         new_query = urlencode(qs, doseq=True)
         return urlunparse(parts._replace(query=new_query))
 
-    def _get_listing_items(self, page):
-        items = page.query_selector_all(LISTING_ITEM)
-        if items:
-            return items
-        # tolerant fallback
-        for s in ("div[class*='profile']", "div[class*='listing']", "div[class*='card']", "a[href*='/']"):
-            cand = page.query_selector_all(s)
-            if cand and len(cand) > 5:
-                return cand
-        return []
-
-    def _scrape_page_profiles(self, page_num: int) -> List[ListingProfile]:
-        """Fetch a single listing page and return parsed ListingProfile rows."""
-        url = self._page_url(self.cfg.START_URL, page_num)
-        log.info(f"[list:{page_num}] GET {url}")
-        page = self.context.new_page()
-        try:
-            page.goto(url, wait_until="domcontentloaded", timeout=60000)
-            if not wait_for_cloudflare(page):
-                log.warning(f"Cloudflare on listing page {page_num}; results may be partial.")
-            jitter(1.0, 1.8)
+    async def _goto(self, page, url: str):
+        problem = await goto_paced(page, url, self.limiter, check=cloudflare_problem)
+        if problem is None and self.session and await self.session.verify(page):
+            # loaded before a re-login: load it again with the new session
+            problem = await goto_paced(page, url, self.limiter, check=cloudflare_problem)
+        return problem
 
-            items = self._get_listing_items(page)
+    async def _listing_page_browser(self, url: str, page_num: int) -> Tuple[List[Tuple[str, str]], int]:
+        async with self.pages.page() as page:
+            problem = await self._goto(page, url)
+            if problem in (STUCK, BLOCKED):
+                log.warning(f"Cloudflare on listing page {page_num} ({problem}); results may be partial.")
+            elif problem is None and self.archive:
+                self.archive.put("listing", url, await page.content(), self.cfg.ROLE_TYPE)
+
+            # one round trip: card lookup (with fallback chain) + hrefs/names + pager
+            with METRICS.timer("extract", kind="listing"):
+                items, cards, last_page = await extract_listing_cards(page)
+            if not items and problem is not None:
+                raise ListingFetchError(problem)   # a challenge page, not the end of the listing
             if not items:
                 # keep a snapshot once for debugging
                 if page_num == 1:
-                    open("debug_listing.html", "w", encoding="utf-8").write(page.content())
-                log.info(f"[list:{page_num}] No items found.")
-                return []
-
-            profiles: List[ListingProfile] = []
-            for el in items:
-                link_el = el.query_selector(PROFILE_LINK_REL)
-                if not link_el:
-                    continue
-                href = link_el.get_attribute("href")
-                if not href:
-                    continue
-                prof_url = _normalize_profile(href)
-                username = href.strip("/").split("/")[-1]
-                profiles.append(ListingProfile(username=username, profile_url=prof_url))
-
-            # duplicate-page guard: if first profile matches previous page, skip ahead
-            if profiles:
-                first_url = profiles[0].profile_url
-                if self._last_first_profile_url == first_url:
-                    log.warning(f"[list:{page_num}] Looks identical to previous page (first card = {first_url}). "
-                                f"Will attempt to skip to next page.")
-                    # mark as empty so caller advances page_num again
-                    return []
-                self._last_first_profile_url = first_url
-
-            log.info(f"[list:{page_num}] Parsed {len(profiles)} cards.")
-            return profiles
-        finally:
-            try:
-                page.close()
-            except:
-                pass
+                    open("debug_listing.html", "w", encoding="utf-8").write(await page.content())
+                return [], last_page
+            return cards, last_page
 
-    def get_profiles(self, batch_size: int = 50, start_page: int = 1, max_pages: int = None) -> Iterator[List[ListingProfile]]:
+    async def _fetch_page(self, page_num: int) -> Tuple[List[ListingProfile], int]:
+        """Fetch one listing page -> (profiles, highest pager page); raises ListingFetchError."""
+        url = self._page_url(self.cfg.START_URL, page_num)
+        log.info(f"[list:{page_num}] GET {url}")
+        try:
+            async with self._gate():
+                res = None
+                if self.http:
+                    with METRICS.timer("fetch", kind="listing", via="http"):
+                        res = await self.http.listing_page(url, self.cfg.ROLE_TYPE, empty_ok=page_num > 1)
+                if res is None:
+                    with METRICS.timer("fetch", kind="listing", via="browser"):
+                        res = await self._listing_page_browser(url, page_num)
+        except Exception as e:
+            log.warning(f"[list:{page_num}] fetch failed: {e}")
+            METRICS.inc("fetch_errors", kind="listing")
+            raise ListingFetchError(f"page {page_num}: {e}") from e
+        cards, last_page = res
+        profiles = [ListingProfile(username=href.strip("/").split("/")[-1],
+                                   profile_url=_normalize_profile(href, url), name=name)
+                    for href, name in cards]
+        fp = _fingerprint(profiles)
+        if fp and page_num < self._fingerprints.get(fp, page_num + 1):
+            self._fingerprints[fp] = page_num
+        log.info(f"[list:{page_num}] Parsed {len(profiles)} cards.")
+        return profiles, last_page
+
+    async def fetch_page(self, page_num: int) -> List[ListingProfile]:
+        """One listing page, unplanned (distributed crawls lease pages one at a time); raises ListingFetchError."""
+        return (await self._fetch_page(page_num))[0]
+
+    async def _page_fp(self, page_num: int) -> str:
         """
-        Yield batches of profiles (≈ batch_size each).
-        Each batch is produced by visiting as many pages as needed to fill it.
-        The next iteration continues from the next page.
+        Fingerprint of page_num; fetched pages are kept for iter_pages. A page that
+        fails twice raises ListingFetchError: it says nothing about where the listing ends.
         """
-        assert batch_size > 0, "batch_size must be > 0"
-        page_num = start_page
-        pages_seen = 0
-
-        while True:
-            if max_pages is not None and pages_seen >= max_pages:
-                return
-
-            batch: List[ListingProfile] = []
-
-            while len(batch) < batch_size:
-                if max_pages is not None and pages_seen >= max_pages:
-                    break
-
-                page_rows = self._scrape_page_profiles(page_num)
-                # if page returns empty, assume no more results (or duplicate); advance and try once
-                if not page_rows:
-                    page_num += 1
-                    pages_seen += 1
-                    # optional small sleep to avoid hammering
-                    jitter(0.4, 0.8)
-                    # try the next page; if max_pages hit, outer loop will stop
-                    # to continue the while to see if we can fill the batch
-                    if max_pages is not None and pages_seen >= max_pages:
-                        break
-                    # we don't break yet; attempt to fill a remainder from future pages
-                    continue
+        if page_num not in self._fetched:
+            try:
+                self._fetched[page_num] = await self._fetch_page(page_num)
+            except ListingFetchError:
+                self._fetched[page_num] = await self._fetch_page(page_num)
+        return _fingerprint(self._fetched[page_num][0])
 
-                batch.extend(page_rows)
-                page_num += 1
-                pages_seen += 1
-                jitter(0.6, 1.2)
+    async def _probe(self, page_num: int) -> bool:
+        """Is page_num a real listing page (cards, and not a repeat of a lower page)?"""
+        fp = await self._page_fp(page_num)
+        return bool(fp) and self._fingerprints.get(fp) == page_num
 
-                # safety: if the site shows huge pages, we still respect batch size
-                if len(batch) >= batch_size:
-                    break
+    async def plan_last_page(self, start: int, limit: int) -> Optional[int]:
+        """
+        Last listing page in [start, limit], or start - 1 if start itself is empty;
+        None if a probe could not be fetched (the caller then pages without a plan).
+        The pager's highest link is checked first; from there (or from start) gallop
+        +1, +2, +4... until a page is empty or repeats a lower one, then binary-search
+        the gap. If the site keeps serving its last page past the end, the boundary
+        found is a repeat, so a second search finds the first page showing it.
+        """
+        try:
+            return await self._plan_last_page(start, limit)
+        except ListingFetchError as e:
+            log.warning(f"[list] could not plan the listing ({e}); paging until the first empty page")
+            return None
 
-            if not batch:
-                return
+    async def _plan_last_page(self, start: int, limit: int) -> int:
+        if not await self._probe(start):
+            log.warning(f"[list:{start}] No items on the first page; nothing to plan.")
+            return start - 1
+        good = start
+        hint = self._fetched[start][1]
+        if good < hint <= limit and await self._probe(hint):
+            good = hint
+        step = 1
+        while good < limit:
+            probe = min(good + step, limit)
+            if not await self._probe(probe):
+                bad = probe
+                break
+            good = probe
+            step *= 2
+        else:
+            return good
+        while bad - good > 1:
+            mid = (good + bad) // 2
+            if await self._probe(mid):
+                good = mid
+            else:
+                bad = mid
 
-            # exact size
-            if len(batch) > batch_size:
-                batch = batch[:batch_size]
+        repeated = await self._page_fp(bad)
+        if not repeated or self._fingerprints[repeated] != good:
+            return good   # ends with empty pages, or wraps around to an earlier page
+        lo = max((n for n, (rows, _) in self._fetched.items()
+                  if n < good and _fingerprint(rows) not in ("", repeated)), default=start - 1)
+        hi = good
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if await self._page_fp(mid) == repeated:
+                hi = mid
+            else:
+                lo = mid
+        return hi
 
-            yield batch
+    async def iter_pages(self, start_page: int = 1, max_pages: int = None, plan: bool = True,
+                         retry: Iterable[int] = (), on_failed: Optional[Callable[[int], None]] = None,
+                         ) -> AsyncIterator[Tuple[int, List[ListingProfile]]]:
+        """
+        Yield (page_num, profiles) for every non-empty listing page, in order.
+        The last page is planned up front (see plan_last_page), then pages are
+        prefetched LISTING_PREFETCH at a time; pacing still comes from the rate limiter.
+        Empty pages and pages whose full card list repeats an earlier one are skipped.
+        With plan=False (callers that expect to stop early, e.g. incremental runs),
+        or if planning failed, the first empty or repeated page ends the listing.
+        Pages that fail to load are skipped, reported to on_failed and tried once more at
+        the end, together with `retry` (pages an earlier run failed on); they never end the
+        listing, except that an unplanned one stops after _MAX_FAILED_IN_A_ROW failures
+        in a row (an outage: --resume continues after the last good page and re-fetches
+        the failed ones).
+        """
+        limit = start_page + (max_pages if max_pages else _MAX_PAGES_UNBOUNDED) - 1
+        self._fetched, self._fingerprints = {}, {}
+        last = await self.plan_last_page(start_page, limit) if plan else None
+        if last is not None:
+            log.info(f"[list] last page {last} ({len(self._fetched)} pages fetched while planning)")
+        else:
+            plan, last = False, limit
 
-    def get_profile_details(self, profile_url: str) -> Tuple[str, str]:
-        p = self.context.new_page()
-        p.goto(profile_url, wait_until="domcontentloaded", timeout=60000)
-        if not wait_for_cloudflare(p):
-            log.warning("Cloudflare on profile page—skipping extras.")
-        jitter(1.0, 1.8)
+        window = max(1, self.cfg.LISTING_PREFETCH)
+        tasks: Dict[int, asyncio.Task] = {}
+        seen = set()
+        failed: List[int] = sorted(set(retry))   # pages that did not load, retried at the end
+        in_a_row = 0
+        scheduled = start_page
+        try:
+            for page_num in range(start_page, last + 1):
+                while scheduled <= last and scheduled < page_num + window:
+                    if scheduled not in self._fetched:
+                        tasks[scheduled] = asyncio.create_task(self._fetch_page(scheduled))
+                    scheduled += 1
+                try:
+                    if page_num in self._fetched:
+                        profiles, _ = self._fetched.pop(page_num)
+                    else:
+                        profiles, _ = await tasks.pop(page_num)
+                except ListingFetchError:
+                    failed.append(page_num)
+                    if on_failed:
+                        on_failed(page_num)
+                    in_a_row += 1
+                    if not plan and in_a_row >= _MAX_FAILED_IN_A_ROW:
+                        log.warning(f"[list:{page_num}] {in_a_row} pages failed in a row; stopping here "
+                                    f"(--resume continues after the last page that loaded)")
+                        del failed[-in_a_row:]
+                        break
+                    continue
+                in_a_row = 0
+                if not profiles:
+                    log.info(f"[list:{page_num}] No items found.")
+                    if not plan:
+                        break
+                    continue
+                fp = _fingerprint(profiles)
+                if fp in seen or (page_num == start_page
+                                  and profiles[0].profile_url == self._last_first_profile_url):
+                    log.warning(f"[list:{page_num}] Same cards as an earlier page; skipping.")
+                    if not plan:
+                        break
+                    continue
+                seen.add(fp)
+                self._last_first_profile_url = profiles[0].profile_url
+                yield page_num, profiles
 
-        name = ""
-        n = p.query_selector(NAME_ON_PROFILE)
-        if n:
-            try:
-                name = (n.inner_text() or "").strip()
-            except:
-                name = ""
-        if is_brand_like_fuzzy(name):
-            p.close()
+            for page_num in failed:   # one more try each, after the rest of the listing
+                try:
+                    profiles, _ = await self._fetch_page(page_num)
+                except ListingFetchError:
+                    log.warning(f"[list:{page_num}] failed twice; skipped")
+                    continue
+                fp = _fingerprint(profiles)
+                if fp and fp not in seen:
+                    seen.add(fp)
+                    yield page_num, profiles
+        finally:
+            for t in tasks.values():
+                t.cancel()
+            self._fetched = {}
+
+    async def get_profile_details(self, profile_url: str, max_age: Optional[float] = None) -> Tuple[str, str]:
+        """(name, instagram href), (None, None) for a brand; cached fields older than max_age are refetched."""
+        cached = self.cache.get("profile", profile_url, max_age=max_age) if self.cache else None
+        METRICS.inc("cache", kind="profile", result="hit" if cached is not None else "miss")
+        if cached is not None:
+            name, insta = cached["name"], cached["instagram"]
+        else:
+            fields = None
+            if self.http:
+                with METRICS.timer("fetch", kind="profile", via="http"):
+                    fields = await self.http.profile_fields(profile_url, self.cfg.ROLE_TYPE)
+            if fields is None:
+                with METRICS.timer("fetch", kind="profile", via="browser"):
+                    fields = await self._profile_fields_browser(profile_url)
+            name, insta = fields
+            # raw fields are cached, the brand filter below always re-runs
+            if self.cache and name:
+                self.cache.put("profile", profile_url, {"name": name, "instagram": insta})
+        if BRAND_CLASSIFIER.is_brand(name):
             return None, None
+        return name, insta
 
-        insta = ""
-        link = p.query_selector(INSTAGRAM_LINK)
-        if link:
-            insta = link.get_attribute("href") or ""
+    async def _profile_fields_browser(self, profile_url: str) -> Tuple[str, str]:
+        async with self.pages.page() as p:
+            problem = await self._goto(p, profile_url)
+            if problem in (STUCK, BLOCKED):
+                log.warning(f"Cloudflare on profile page ({problem})—skipping extras.")
+            elif problem is None and self.archive:
+                self.archive.put("profile", profile_url, await p.content(), self.cfg.ROLE_TYPE)
 
-        p.close()
-        return name, insta
+            try:
+                with METRICS.timer("extract", kind="profile"):
+                    return await extract_profile(p)
+            except Exception:
+                return "", ""
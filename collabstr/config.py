@@ -1,7 +1,13 @@
+import json
 import os
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, fields, replace
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
 
+from .blocking import DEFAULT_BLOCK_TYPES, DEFAULT_DENY_DOMAINS, DEFAULT_ALLOW_DOMAINS
+from .ratelimit import DEFAULT_RATES
+
 @dataclass(frozen=True)
 class Settings:
     START_URL: str
@@ -18,12 +24,168 @@ class Settings:
                        "AppleWebKit/537.36 (KHTML, like Gecko) "
                        "Chrome/120.0.0.0 Safari/537.36")
 
+    # run tuning (shared by every role, see _tuning)
+    TARGET_EMAIL_COUNT: int = 50
+    MAX_PAGES: int = 50
+    LISTING_PREFETCH: int = 4   # listing pages fetched ahead of the producer
+    PROFILE_CONCURRENCY: int = 4
+    INSTAGRAM_CONCURRENCY: int = 2
+    PROFILE_QUEUE_SIZE: int = 100
+    INSTAGRAM_QUEUE_SIZE: int = 50
+    PIPELINE_STATS_INTERVAL: float = 30.0
+    HTTP_FETCH: bool = False
+    HTTP_TIMEOUT: float = 20.0
+    HTTP_MAX_CONNECTIONS: int = 10
+    FRONTIER_PATH: str = "crawl_frontier.sqlite3"
+    RESUME: bool = False
+    INCREMENTAL: bool = False
+    INCREMENTAL_OVERLAP: float = 1.0    # share of known profiles that makes a page "already seen"
+    INCREMENTAL_STOP_PAGES: int = 2     # consecutive seen pages before the pass stops
+    RECHECK_AFTER_DAYS: float = 0.0     # re-check email-less profiles this old; 0 = never
+    RECHECK_LIMIT: int = 200            # re-checks per incremental run
+    CACHE_ENABLED: bool = True
+    CACHE_PATH: str = "response_cache.sqlite3"
+    CACHE_TTL_HOURS: float = 72.0
+    CACHE_NEGATIVE_TTL_HOURS: float = 168.0
+    CACHE_MAX_MB: float = 256.0
+    IG_SHARED_LOOKUP: bool = True
+    OUTPUT_FORMATS: Tuple[str, ...] = ("csv",)
+    OUTPUT_FLUSH_ROWS: int = 20
+    OUTPUT_FLUSH_SECONDS: float = 5.0
+    BLOCK_RESOURCES: bool = True
+    BLOCK_RESOURCE_TYPES: Tuple[str, ...] = DEFAULT_BLOCK_TYPES
+    BLOCK_DOMAINS: Tuple[str, ...] = DEFAULT_DENY_DOMAINS
+    ALLOW_DOMAINS: Tuple[str, ...] = DEFAULT_ALLOW_DOMAINS
+    RATE_LIMITS: str = DEFAULT_RATES
+    RATE_JITTER: float = 0.3
+    PAGE_POOL_SIZE: int = 0   # 0 = one tab per worker + 1
+    CONTEXT_MAX_NAVIGATIONS: int = 500
+    CONTEXT_MAX_RSS_MB: float = 1500.0
+    PROCESSES: int = 2         # browser processes the targets are split over
+    WORKER_BUDGET: int = 0     # concurrent browser/network slots per process; 0 = sum of target workers
+    TARGETS_FILE: str = ""
+    METRICS_ENABLED: bool = False
+    METRICS_DIR: str = "metrics"
+    METRICS_INTERVAL: float = 15.0   # seconds between Prometheus file rewrites
+    WORK_QUEUE: str = ""       # shared queue for multi-node crawls: SQLite path or http://host:port
+    WORK_QUEUE_LEASE_SECONDS: float = 300.0
+    WORK_QUEUE_MAX_ATTEMPTS: int = 3
+    NODE_ID: str = ""          # lease owner name; default host-pid-random
+    DEDUP_ENABLED: bool = True
+    DEDUP_PATH: str = "dedup.idx"   # shared by every category: a creator is written once overall
+    SESSION_PATH: str = "collabstr_session.json"
+    SESSION_MAX_AGE_HOURS: float = 12.0   # trust a saved session this long without a login check
+    ARCHIVE_ENABLED: bool = False   # keep the raw HTML of every page for offline re-parsing
+    ARCHIVE_DIR: str = "archive"
+    ARCHIVE_SEGMENT_MB: float = 256.0   # compressed size at which a segment file is rotated
+    ADAPTIVE_TIMEOUTS: bool = True   # per-host timeouts from observed latency (fixed values are the ceiling)
+    TIMEOUT_MULTIPLIER: float = 3.0  # timeout = multiplier x p99 latency
+    TIMEOUT_MIN_SECONDS: float = 5.0
+    RETRY_ATTEMPTS: int = 2          # retries of a timed-out / failed navigation, with jittered backoff
+    RETRY_BACKOFF_SECONDS: float = 2.0
+    HEDGE_ENABLED: bool = True       # second HTTP request for one slower than the host's p95
+    HEDGE_BUDGET: float = 0.1        # max share of a host's requests that may be hedged
+    BREAKER_FAILURES: int = 5        # failures in a row that open a host's circuit (0 = never)
+    BREAKER_COOLDOWN_SECONDS: float = 120.0
+    BREAKER_MAX_COOLDOWN_SECONDS: float = 1800.0
+    IG_PARK_MAX_SECONDS: float = 1800.0   # how long the end of a run waits for parked Instagram lookups
+    BIO_TEXT_MAX_CHARS: int = 4000   # cap on the Instagram bio text pulled out of the page when metas are missing
+
     @staticmethod
     def _bool(v: str, default: bool) -> bool:
         if v is None:
             return default
         return v.lower() in ("1", "true", "yes", "y")
 
+    @staticmethod
+    def _int(v: str, default: int) -> int:
+        if v is None or not v.strip():
+            return default
+        return int(v)
+
+    @staticmethod
+    def _float(v: str, default: float) -> float:
+        if v is None or not v.strip():
+            return default
+        return float(v)
+
+    @staticmethod
+    def _list(v: str, default: Tuple[str, ...]) -> Tuple[str, ...]:
+        if v is None or not v.strip():
+            return default
+        return tuple(x.strip().lower() for x in v.split(",") if x.strip())
+
+    @classmethod
+    def _tuning(cls) -> dict:
+        """Env-driven knobs that do not depend on the role being scraped."""
+        return dict(
+            TARGET_EMAIL_COUNT=cls._int(os.getenv("TARGET_EMAIL_COUNT"), 50),
+            MAX_PAGES=cls._int(os.getenv("MAX_PAGES"), 50),
+            LISTING_PREFETCH=max(1, cls._int(os.getenv("LISTING_PREFETCH"), 4)),
+            PROFILE_CONCURRENCY=max(1, cls._int(os.getenv("PROFILE_CONCURRENCY"), 4)),
+            INSTAGRAM_CONCURRENCY=max(1, cls._int(os.getenv("INSTAGRAM_CONCURRENCY"), 2)),
+            PROFILE_QUEUE_SIZE=max(1, cls._int(os.getenv("PROFILE_QUEUE_SIZE"), 100)),
+            INSTAGRAM_QUEUE_SIZE=max(1, cls._int(os.getenv("INSTAGRAM_QUEUE_SIZE"), 50)),
+            PIPELINE_STATS_INTERVAL=cls._float(os.getenv("PIPELINE_STATS_INTERVAL"), 30.0),
+            HTTP_FETCH=cls._bool(os.getenv("HTTP_FETCH"), False),
+            HTTP_TIMEOUT=cls._float(os.getenv("HTTP_TIMEOUT"), 20.0),
+            HTTP_MAX_CONNECTIONS=max(1, cls._int(os.getenv("HTTP_MAX_CONNECTIONS"), 10)),
+            FRONTIER_PATH=os.getenv("FRONTIER_PATH", "crawl_frontier.sqlite3"),
+            RESUME=cls._bool(os.getenv("RESUME"), False),
+            INCREMENTAL=cls._bool(os.getenv("INCREMENTAL"), False),
+            INCREMENTAL_OVERLAP=min(1.0, max(0.0, cls._float(os.getenv("INCREMENTAL_OVERLAP"), 1.0))),
+            INCREMENTAL_STOP_PAGES=max(1, cls._int(os.getenv("INCREMENTAL_STOP_PAGES"), 2)),
+            RECHECK_AFTER_DAYS=cls._float(os.getenv("RECHECK_AFTER_DAYS"), 0.0),
+            RECHECK_LIMIT=max(0, cls._int(os.getenv("RECHECK_LIMIT"), 200)),
+            CACHE_ENABLED=cls._bool(os.getenv("CACHE_ENABLED"), True),
+            CACHE_PATH=os.getenv("CACHE_PATH", "response_cache.sqlite3"),
+            CACHE_TTL_HOURS=cls._float(os.getenv("CACHE_TTL_HOURS"), 72.0),
+            CACHE_NEGATIVE_TTL_HOURS=cls._float(os.getenv("CACHE_NEGATIVE_TTL_HOURS"), 168.0),
+            CACHE_MAX_MB=cls._float(os.getenv("CACHE_MAX_MB"), 256.0),
+            IG_SHARED_LOOKUP=cls._bool(os.getenv("IG_SHARED_LOOKUP"), True),
+            OUTPUT_FORMATS=cls._list(os.getenv("OUTPUT_FORMATS"), ("csv",)),
+            OUTPUT_FLUSH_ROWS=max(1, cls._int(os.getenv("OUTPUT_FLUSH_ROWS"), 20)),
+            OUTPUT_FLUSH_SECONDS=cls._float(os.getenv("OUTPUT_FLUSH_SECONDS"), 5.0),
+            BLOCK_RESOURCES=cls._bool(os.getenv("BLOCK_RESOURCES"), True),
+            BLOCK_RESOURCE_TYPES=cls._list(os.getenv("BLOCK_RESOURCE_TYPES"), DEFAULT_BLOCK_TYPES),
+            BLOCK_DOMAINS=cls._list(os.getenv("BLOCK_DOMAINS"), DEFAULT_DENY_DOMAINS),
+            ALLOW_DOMAINS=cls._list(os.getenv("ALLOW_DOMAINS"), DEFAULT_ALLOW_DOMAINS),
+            RATE_LIMITS=os.getenv("RATE_LIMITS", DEFAULT_RATES),
+            RATE_JITTER=cls._float(os.getenv("RATE_JITTER"), 0.3),
+            PAGE_POOL_SIZE=max(0, cls._int(os.getenv("PAGE_POOL_SIZE"), 0)),
+            CONTEXT_MAX_NAVIGATIONS=max(0, cls._int(os.getenv("CONTEXT_MAX_NAVIGATIONS"), 500)),
+            CONTEXT_MAX_RSS_MB=cls._float(os.getenv("CONTEXT_MAX_RSS_MB"), 1500.0),
+            PROCESSES=max(1, cls._int(os.getenv("PROCESSES"), 2)),
+            WORKER_BUDGET=max(0, cls._int(os.getenv("WORKER_BUDGET"), 0)),
+            TARGETS_FILE=os.getenv("TARGETS_FILE", ""),
+            METRICS_ENABLED=cls._bool(os.getenv("METRICS_ENABLED"), False),
+            METRICS_DIR=os.getenv("METRICS_DIR", "metrics"),
+            METRICS_INTERVAL=cls._float(os.getenv("METRICS_INTERVAL"), 15.0),
+            WORK_QUEUE=os.getenv("WORK_QUEUE", ""),
+            WORK_QUEUE_LEASE_SECONDS=max(10.0, cls._float(os.getenv("WORK_QUEUE_LEASE_SECONDS"), 300.0)),
+            WORK_QUEUE_MAX_ATTEMPTS=max(1, cls._int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS"), 3)),
+            NODE_ID=os.getenv("NODE_ID", ""),
+            DEDUP_ENABLED=cls._bool(os.getenv("DEDUP_ENABLED"), True),
+            DEDUP_PATH=os.getenv("DEDUP_PATH", "dedup.idx"),
+            SESSION_PATH=os.getenv("SESSION_PATH", "collabstr_session.json"),
+            SESSION_MAX_AGE_HOURS=cls._float(os.getenv("SESSION_MAX_AGE_HOURS"), 12.0),
+            ARCHIVE_ENABLED=cls._bool(os.getenv("ARCHIVE_ENABLED"), False),
+            ARCHIVE_DIR=os.getenv("ARCHIVE_DIR", "archive"),
+            ARCHIVE_SEGMENT_MB=max(1.0, cls._float(os.getenv("ARCHIVE_SEGMENT_MB"), 256.0)),
+            ADAPTIVE_TIMEOUTS=cls._bool(os.getenv("ADAPTIVE_TIMEOUTS"), True),
+            TIMEOUT_MULTIPLIER=max(1.0, cls._float(os.getenv("TIMEOUT_MULTIPLIER"), 3.0)),
+            TIMEOUT_MIN_SECONDS=max(0.5, cls._float(os.getenv("TIMEOUT_MIN_SECONDS"), 5.0)),
+            RETRY_ATTEMPTS=max(0, cls._int(os.getenv("RETRY_ATTEMPTS"), 2)),
+            RETRY_BACKOFF_SECONDS=max(0.0, cls._float(os.getenv("RETRY_BACKOFF_SECONDS"), 2.0)),
+            HEDGE_ENABLED=cls._bool(os.getenv("HEDGE_ENABLED"), True),
+            HEDGE_BUDGET=min(1.0, max(0.0, cls._float(os.getenv("HEDGE_BUDGET"), 0.1))),
+            BREAKER_FAILURES=max(0, cls._int(os.getenv("BREAKER_FAILURES"), 5)),
+            BREAKER_COOLDOWN_SECONDS=max(1.0, cls._float(os.getenv("BREAKER_COOLDOWN_SECONDS"), 120.0)),
+            BREAKER_MAX_COOLDOWN_SECONDS=max(1.0, cls._float(os.getenv("BREAKER_MAX_COOLDOWN_SECONDS"), 1800.0)),
+            IG_PARK_MAX_SECONDS=max(0.0, cls._float(os.getenv("IG_PARK_MAX_SECONDS"), 1800.0)),
+            BIO_TEXT_MAX_CHARS=max(200, cls._int(os.getenv("BIO_TEXT_MAX_CHARS"), 4000)),
+        )
+
     @classmethod
     def ugc_config_load(cls) -> "Settings":
         load_dotenv(override=False)
@@ -37,6 +199,7 @@ class Settings:
             HEADLESS=cls._bool(os.getenv("HEADLESS", "false"), False),
             TIMEZONE=os.getenv("TIMEZONE", "America/New_York"),
             ROLE_TYPE=os.getenv("ROLE_TYPE", "UGC"),
+            **cls._tuning(),
         )
     
     @classmethod
@@ -52,5 +215,38 @@ class Settings:
             HEADLESS=cls._bool(os.getenv("HEADLESS", "false"), False),
             TIMEZONE=os.getenv("TIMEZONE", "America/New_York"),
             ROLE_TYPE=os.getenv("ROLE_TYPE", "Video Editor"),
+            **cls._tuning(),
         )
 
+    @classmethod
+    def targets_load(cls, path: Optional[str] = None) -> List["Settings"]:
+        """
+        One Settings per target. Without a targets file: the UGC and video editor defaults.
+        The file is a JSON list of objects with role_type and start_url, plus optional
+        output_csv and any other Settings field (e.g. "target_email_count": 200).
+        """
+        base = cls.ugc_config_load()
+        path = path or base.TARGETS_FILE
+        if not path:
+            return [base, cls.video_config_load()]
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        known = {fl.name for fl in fields(cls)}
+        targets = []
+        for entry in entries:
+            over = {k.upper(): v for k, v in entry.items()}
+            unknown = set(over) - known
+            if unknown:
+                raise RuntimeError(f"Unknown target setting(s) in {path}: {', '.join(sorted(unknown))}")
+            if not over.get("START_URL") or not over.get("ROLE_TYPE"):
+                raise RuntimeError(f"Every target in {path} needs start_url and role_type.")
+            over.setdefault("OUTPUT_CSV", re.sub(r"\W+", "_", over["ROLE_TYPE"].lower()).strip("_")
+                            + "_creators_list.csv")
+            for k, v in over.items():
+                if isinstance(getattr(base, k), tuple) and isinstance(v, list):
+                    over[k] = tuple(v)
+            targets.append(replace(base, **over))
+        outputs = [t.OUTPUT_CSV for t in targets]
+        if len(set(outputs)) != len(outputs):
+            raise RuntimeError(f"Targets in {path} must write to distinct output_csv files.")
+        return targets
@@ -0,0 +1,184 @@
+"""
+Persistent dedup index of creators already written, shared by every category and run.
+
+Keys are profile URLs, normalized emails and Instagram handles, each stored as
+an 8-byte blake2b digest in an append-only file (DEDUP_PATH). The file is read
+into a set of ints on first use and its tail re-read whenever another process
+has appended, so lookups stay O(1) at millions of entries (~80 MB per million keys).
+"""
+import csv
+import hashlib
+import os
+import sys
+import time
+from array import array
+from collections import Counter
+from typing import Iterable, List, Optional, Set
+from urllib.parse import urlsplit, urlunsplit
+
+from .instagram_lookup import canonical_handle
+from .utils import log
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_REC = 8   # bytes per key
+_SWAP = sys.byteorder != "little"   # the file is little-endian
+_REFRESH_EVERY = 1.0   # seconds between checks for keys appended by other processes
+
+PROFILE = "p"
+EMAIL = "e"
+HANDLE = "h"
+
+
+def normalize_profile(url: str) -> str:
+    """Scheme/host case, query, fragment and trailing slash don't make a new creator."""
+    parts = urlsplit((url or "").strip())
+    return urlunsplit(("https", parts.netloc.lower().removeprefix("www."), parts.path.rstrip("/").lower(), "", ""))
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def digest(kind: str, value: str) -> int:
+    h = hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=_REC)
+    return int.from_bytes(h.digest(), "little")
+
+
+class DedupIndex:
+    """
+    In-memory set over the append-only key file. add() reserves keys at once and
+    returns them; flush(keys) makes those durable (call it after their rows are on
+    disk). Several sinks share one index, so each persists only its own rows' keys.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._keys: Optional[Set[int]] = None   # loaded lazily
+        self._offset = 0
+        self._checked = 0.0
+        self._pending: Set[int] = set()   # reserved, not yet in the file
+        self.counts: Counter = Counter()
+
+    # ---------- lookups ----------
+    def _load(self) -> Set[int]:
+        if self._keys is None:
+            self._keys = set()
+            self._refresh()
+            log.info(f"[dedup] {len(self._keys)} known keys loaded from {self.path}")
+        elif time.monotonic() - self._checked >= _REFRESH_EVERY:
+            self._refresh()
+        return self._keys
+
+    def _refresh(self) -> None:
+        """Pick up keys other processes appended since the last read."""
+        self._checked = time.monotonic()
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        size -= size % _REC   # ignore a torn record from a crash mid-append
+        if size <= self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            arr = array("Q")
+            arr.frombytes(f.read(size - self._offset))
+        if _SWAP:
+            arr.byteswap()
+        self._keys.update(arr)
+        self._offset = size
+
+    def _seen(self, kind: str, value: str) -> bool:
+        if not value:
+            return False
+        hit = digest(kind, value) in self._load()
+        if hit:
+            self.counts[f"hit:{kind}"] += 1
+        return hit
+
+    def seen_profile(self, url: str) -> bool:
+        return self._seen(PROFILE, normalize_profile(url))
+
+    def seen_email(self, email: str) -> bool:
+        return self._seen(EMAIL, normalize_email(email))
+
+    def seen_handle(self, instagram_url: str) -> bool:
+        return self._seen(HANDLE, canonical_handle(instagram_url) or "")
+
+    # ---------- writes ----------
+    def add(self, profile_url: str = "", email: str = "", instagram_url: str = "") -> List[int]:
+        """Reserve the creator's keys; returns the ones that were new (pass them to flush)."""
+        keys = self._load()
+        added = []
+        for kind, value in ((PROFILE, normalize_profile(profile_url) if profile_url else ""),
+                            (EMAIL, normalize_email(email)),
+                            (HANDLE, canonical_handle(instagram_url) or "" if instagram_url else "")):
+            if value:
+                d = digest(kind, value)
+                if d not in keys:
+                    keys.add(d)
+                    self._pending.add(d)
+                    added.append(d)
+        return added
+
+    def flush(self, keys: Optional[Iterable[int]] = None) -> None:
+        """Append reserved keys to the file: the given ones, or every pending key."""
+        todo = self._pending if keys is None else self._pending.intersection(keys)
+        if not todo:
+            return
+        arr = array("Q", sorted(todo))
+        if _SWAP:
+            arr.byteswap()
+        data = arr.tobytes()
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            start = os.fstat(fd).st_size
+            if start % _REC:   # torn record from a crash: drop it so records stay aligned
+                start -= start % _REC
+                os.ftruncate(fd, start)
+            os.write(fd, data)
+            os.fsync(fd)
+            if start == self._offset:   # nobody appended in between: no need to re-read our own keys
+                self._offset = start + len(data)
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        self.counts["added"] += len(todo)
+        self._pending -= todo
+
+    def seed_csv(self, path: str) -> int:
+        """Index rows of an existing output CSV (profile_link, email); returns how many were new."""
+        if not os.path.exists(path):
+            return 0
+        added: List[int] = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                added += self.add(profile_url=row.get("profile_link", ""), email=row.get("email", ""))
+        if added:
+            log.info(f"[dedup] indexed {len(added)} keys from existing {path}")
+        self.flush(added)
+        return len(added)
+
+    def size(self) -> int:
+        return len(self._load())
+
+    def summary(self) -> str:
+        return ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items())) or "no hits"
+
+    def close(self) -> None:
+        """Drop reservations whose rows never reached disk: those creators were not written."""
+        if self._pending:
+            log.warning(f"[dedup] {len(self._pending)} reserved keys dropped: their rows were never flushed")
+            self.counts["dropped"] += len(self._pending)
+            self._pending = set()
+
+
+def open_dedup(cfg) -> Optional[DedupIndex]:
+    return DedupIndex(cfg.DEDUP_PATH) if cfg.DEDUP_ENABLED else None
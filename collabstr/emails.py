@@ -0,0 +1,94 @@
+"""
+Email candidates in bio text, ranked, in one regex pass.
+
+Plain addresses and the usual obfuscations are matched together:
+    jane@example.com   jane [at] example [dot] com   jane (at) example.com
+    jane at example dot com
+Each candidate is scored: plain > bracketed > spelled-out words, a contact
+keyword just before it ("email", "business", "booking", ✉ ...) adds to the score,
+and platform / no-reply addresses (the page footer, not the creator) are dropped.
+A bare " at " is ordinary prose ("Founder at acme.io", "Shop at mystore dot
+com"), so it only counts when the domain has a bracketed "[dot]" or the address
+directly follows a contact keyword ("email: jane at x.com").
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+_OPEN, _CLOSE = r"[\[\(\{<]", r"[\]\)\}>]"
+_AT = rf"(?:@|\s*{_OPEN}\s*at\s*{_CLOSE}\s*|\s+at\s+)"
+_DOT = rf"(?:\.|\s*{_OPEN}\s*dot\s*{_CLOSE}\s*|\s+dot\s+)"
+_LABEL = r"[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?"
+
+EMAIL_SCAN_RE = re.compile(
+    rf"(?<![a-z0-9._%+-])(?P<local>[a-z0-9][a-z0-9._%+-]{{0,63}})(?P<at>{_AT})"
+    rf"(?P<domain>{_LABEL}(?:{_DOT}{_LABEL})*{_DOT}(?P<tld>[a-z]{{2,24}}))(?![a-z0-9-])",
+    re.IGNORECASE,
+)
+_DOT_RE = re.compile(_DOT, re.IGNORECASE)
+_CONTEXT_RE = re.compile(r"(e-?mail|contact|business|inquir|enquir|collab|booking|mgmt|management|📧|✉|📩)",
+                         re.IGNORECASE)
+_CONTEXT_CHARS = 60
+# a contact keyword with nothing but punctuation / spaces between it and the address
+_LEAD_RE = re.compile(_CONTEXT_RE.pattern + r"\w*\W*$", re.IGNORECASE)
+
+# file names that look like addresses (icon@2x.png) are not emails
+_NOT_TLDS = {"png", "jpg", "jpeg", "gif", "webp", "svg", "js", "css", "mp4", "webm"}
+# the page chrome's addresses, never the creator's
+_NOISE_DOMAINS = ("instagram.com", "facebook.com", "meta.com", "fb.com", "cdninstagram.com", "fbcdn.net",
+                  "sentry.io", "w3.org")
+_NOISE_LOCALS = ("noreply", "no-reply", "donotreply", "do-not-reply", "mailer-daemon")
+
+
+@dataclass(frozen=True)
+class EmailCandidate:
+    email: str
+    score: float
+    obfuscated: bool
+    position: int   # offset of the match in the scanned text
+
+
+def _odd_dots(domain: str) -> bool:
+    """Does the matched domain spell a dot out ("dot", "[dot]")?"""
+    return any(d.group() != "." for d in _DOT_RE.finditer(domain))
+
+
+def _base_score(at: str, domain: str) -> float:
+    """1.0 plain, 0.8 bracketed ("[at]", "(dot)"), 0.5 spelled-out words ("at", "dot")."""
+    if at == "@" and not _odd_dots(domain):
+        return 1.0
+    if re.search(_OPEN, at) or re.search(_OPEN, domain):
+        return 0.8
+    return 0.5
+
+
+def rank_emails(text: str) -> List[EmailCandidate]:
+    """Distinct email candidates in `text`, best first."""
+    if not text:
+        return []
+    best: Dict[str, EmailCandidate] = {}
+    for m in EMAIL_SCAN_RE.finditer(text):
+        if m.group("tld").lower() in _NOT_TLDS:
+            continue
+        local = m.group("local").strip(".").lower()
+        domain = _DOT_RE.sub(".", m.group("domain")).lower()
+        email = f"{local}@{domain}"
+        if local.startswith(_NOISE_LOCALS) or any(domain == d or domain.endswith("." + d) for d in _NOISE_DOMAINS):
+            continue
+        at, raw_domain = m.group("at"), m.group("domain")
+        lo = max(0, m.start() - _CONTEXT_CHARS)
+        if (at.strip().lower() == "at" and not re.search(_OPEN, raw_domain)
+                and not _LEAD_RE.search(text[lo:m.start()])):
+            continue   # "work at google.com", "shop at mystore dot com": prose, not an address
+        score = _base_score(at, raw_domain)
+        if _CONTEXT_RE.search(text, lo, m.start()):
+            score += 0.3
+        cand = EmailCandidate(email, round(score, 3), at != "@" or _odd_dots(raw_domain), m.start())
+        if email not in best or cand.score > best[email].score:
+            best[email] = cand
+    return sorted(best.values(), key=lambda c: (-c.score, c.position))
+
+
+def best_email(text: str) -> Optional[str]:
+    ranked = rank_emails(text)
+    return ranked[0].email if ranked else None
@@ -0,0 +1,581 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set
+
+from .brand import BRAND_CLASSIFIER
+from .cache import ResponseCache
+from .collabstr_scraper import CollabstrListingScraper, ListingFetchError
+from .dedup import DedupIndex
+from .frontier import (Frontier, open_frontier, DETAILED, INSTAGRAM_CHECKED,
+                       EMAILED, BRAND_SKIPPED, DUPLICATE, FAILED)
+from .http_client import HttpFetcher
+from .instagram_scraper import InstagramEmailFinder
+from .models import CreatorRow, ListingProfile
+from .pool import PagePool
+from .ratelimit import RateController
+from .resilience import CircuitOpen
+from .storage import Sink, open_sink
+from .utils import log
+from .workqueue import WorkQueue, open_work_queue
+
+_DONE = object()   # end-of-stream marker passed down the queues
+
+
+class StageStats:
+    """Busy-time accounting for one pipeline stage (utilization = busy / (workers * elapsed))."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy_s = 0.0
+        self._active = 0
+        self._t0 = time.monotonic()
+
+    @contextmanager
+    def busy(self):
+        t = time.monotonic()
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self.busy_s += time.monotonic() - t
+            self.items += 1
+
+    def utilization(self) -> float:
+        elapsed = time.monotonic() - self._t0
+        if elapsed <= 0:
+            return 0.0
+        return min(1.0, self.busy_s / (self.workers * elapsed))
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "active": self._active,
+            "items": self.items,
+            "busy_s": round(self.busy_s, 2),
+            "utilization": round(self.utilization(), 3),
+        }
+
+
+class ScrapeEngine:
+    """
+    Listing -> profile -> Instagram pipeline for one target, on a Runtime
+    shared with the other targets of this process (see scheduler.py).
+    - one listing producer pages through START_URL and feeds profile_q
+    - PROFILE_CONCURRENCY workers fetch profile details and feed ig_q
+    - INSTAGRAM_CONCURRENCY workers look up emails and write rows
+    Both queues are bounded, so a slow stage pushes back on the ones before it.
+    Once TARGET_EMAIL_COUNT rows are written, every stage is cancelled.
+    """
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.target_emails = cfg.TARGET_EMAIL_COUNT
+        self.total_with_email = 0
+        self.processed_total = 0
+        # queues are created in run() so they bind to the running loop (py3.9)
+        self.profile_q: Optional[asyncio.Queue] = None
+        self.ig_q: Optional[asyncio.Queue] = None
+        self.stages: Dict[str, StageStats] = self._new_stages()
+        self._tasks: List[asyncio.Task] = []
+        self.listing: Optional[CollabstrListingScraper] = None
+        self.ig: Optional[InstagramEmailFinder] = None
+        self.writer: Optional[Sink] = None
+        self.http: Optional[HttpFetcher] = None
+        self.frontier: Optional[Frontier] = None
+        self.cache: Optional[ResponseCache] = None
+        self.limiter: Optional[RateController] = None
+        self.pages: Optional[PagePool] = None
+        self.fair = None   # scheduler FairShare; a slot is held while a stage does browser/network work
+        self.dedup: Optional[DedupIndex] = None   # creators already written, by any run or category
+        self.wq: Optional[WorkQueue] = None   # shared with other nodes when WORK_QUEUE is set
+        self._leased: Dict[str, set] = {"listing": set(), "profile": set()}
+        self.parked: List[tuple] = []   # (retry at, seq, ig_q item) of lookups whose host circuit is open
+        self._park_seq = 0
+        self._ig_busy = 0   # ig_q items a worker has taken and not finished
+        self._dedup_keys: Dict[str, List[int]] = {}   # profile url -> dedup keys reserved for its buffered row
+        self._rechecks: Set[str] = set()   # stale profiles re-queued by an incremental pass
+
+    def _new_stages(self) -> Dict[str, StageStats]:
+        return {
+            "listing": StageStats("listing", 1),
+            "profile": StageStats("profile", self.cfg.PROFILE_CONCURRENCY),
+            "instagram": StageStats("instagram", self.cfg.INSTAGRAM_CONCURRENCY),
+        }
+
+    def target_reached(self) -> bool:
+        return bool(self.target_emails) and self.total_with_email >= self.target_emails
+
+    def stats(self) -> dict:
+        def depth(q):
+            return {"depth": q.qsize() if q else 0, "max": q.maxsize if q else 0}
+        return {
+            "queues": {"profile": depth(self.profile_q), "instagram": depth(self.ig_q),
+                       "parked": len(self.parked)},
+            "stages": {name: st.snapshot() for name, st in self.stages.items()},
+            "processed": self.processed_total,
+            "emails": self.total_with_email,
+            "rate": self.limiter.stats() if self.limiter else {},
+            "backoff_events": list(self.limiter.events)[-10:] if self.limiter else [],
+            "pages": self.pages.stats() if self.pages else {},
+            "workers": self.fair.stats() if self.fair else {},
+        }
+
+    def _log_stats(self, prefix: str = "") -> None:
+        prefix = prefix or f"[pipeline:{self.cfg.ROLE_TYPE}]"
+        s = self.stats()
+        q = s["queues"]
+        stages = "  ".join(
+            f"{name} {st['utilization']:.0%} ({st['active']}/{st['workers']}w, {st['items']} done)"
+            for name, st in s["stages"].items()
+        )
+        log.info(f"{prefix} profile_q={q['profile']['depth']}/{q['profile']['max']} "
+                 f"ig_q={q['instagram']['depth']}/{q['instagram']['max']}"
+                 + (f" parked={q['parked']}" if q["parked"] else "") + f" | {stages}")
+
+    async def run(self, rt) -> int:
+        """Run this target on a scheduler Runtime (shared browser, login, tabs, rates, cache)."""
+        cfg = self.cfg
+        self.limiter = rt.limiter
+        self.http    = rt.http
+        self.cache   = rt.cache
+        self.pages   = rt.pages
+        self.fair    = rt.fair
+        self.ig      = rt.ig
+        self.dedup   = rt.dedup
+        self.listing = CollabstrListingScraper(cfg, self.pages, http=self.http, cache=self.cache,
+                                               limiter=self.limiter, session=rt.session, archive=rt.archive,
+                                               gate=lambda: self.fair.slot(cfg.ROLE_TYPE))
+        self.profile_q = asyncio.Queue(maxsize=cfg.PROFILE_QUEUE_SIZE)
+        self.ig_q      = asyncio.Queue(maxsize=cfg.INSTAGRAM_QUEUE_SIZE)
+        self.stages    = self._new_stages()   # utilization clock starts after login
+        self.frontier  = open_frontier(cfg)
+        self.writer    = open_sink(cfg, on_flush=self._on_rows_flushed)
+        if self.dedup:
+            # output written before the index existed (or by older versions) counts too
+            self.dedup.seed_csv(cfg.OUTPUT_CSV)
+        if cfg.RESUME:
+            self.total_with_email = self.frontier.count(EMAILED)
+        self.wq = open_work_queue(cfg)
+        if self.wq:
+            self.total_with_email = await self.wq.counter("emails")
+
+        profile_workers = [asyncio.create_task(self._profile_worker())
+                           for _ in range(cfg.PROFILE_CONCURRENCY)]
+        ig_workers = [asyncio.create_task(self._ig_worker())
+                      for _ in range(cfg.INSTAGRAM_CONCURRENCY)]
+        producer = asyncio.create_task(self._queue_producer() if self.wq else self._list_producer())
+        self._tasks = [producer, *profile_workers, *ig_workers]
+        unparker = asyncio.create_task(self._unpark_loop())
+        reporter = asyncio.create_task(self._report_loop())
+        flusher = asyncio.create_task(self._flush_loop())
+        heartbeat = asyncio.create_task(self._heartbeat_loop()) if self.wq else None
+
+        try:
+            await asyncio.gather(producer, return_exceptions=True)
+            await asyncio.gather(*profile_workers, return_exceptions=True)
+            if not self.target_reached():
+                await self._wait_instagram(ig_workers, unparker)
+            if not self.target_reached():
+                for w in ig_workers:
+                    if not w.done():   # a dead worker would never take its sentinel
+                        await self.ig_q.put(_DONE)
+            await asyncio.gather(*ig_workers, return_exceptions=True)
+        finally:
+            unparker.cancel()
+            reporter.cancel()
+            flusher.cancel()
+            if heartbeat:
+                heartbeat.cancel()
+            self._cancel_stages()
+            self._log_stats(f"[pipeline:{cfg.ROLE_TYPE}:final]")
+            self._close_resources()
+            if self.wq:
+                await self._close_work_queue()
+
+        if self.total_with_email == 0:
+            log.warning(f"[{cfg.ROLE_TYPE}] Finished with 0 emails found (rows still written).")
+        else:
+            log.info(f"[{cfg.ROLE_TYPE}] Finished. Emails found: {self.total_with_email}  | Output: {cfg.OUTPUT_CSV}")
+        return self.total_with_email
+
+    def _close_resources(self) -> None:
+        # sink first: its on_flush still updates the frontier
+        try:
+            self.writer.close()
+        except Exception as e:
+            # not marked EMAILED nor persisted in the dedup index, so --resume redoes them
+            log.error(f"Final output flush failed; buffered rows were not written: {e}")
+        log.info(f"[frontier] {self.frontier.summary()}")
+        self.frontier.close()
+
+    async def _close_work_queue(self) -> None:
+        try:
+            # cancelled mid-task (target reached / shutdown): other nodes can take these now
+            for kind, keys in self._leased.items():
+                if keys:
+                    await self.wq.release(kind, list(keys))
+            log.info(f"[workqueue] listing {await self.wq.pending('listing')} | "
+                     f"profiles {await self.wq.pending('profile')}")
+        except Exception as e:
+            log.warning(f"[workqueue] closing failed: {e}")
+        finally:
+            await self.wq.aclose()
+
+    # ---------- stages ----------
+    async def _list_producer(self) -> None:
+        cfg = self.cfg
+        st = self.stages["listing"]
+        fr = self.frontier
+        last_page, last_first_url = fr.last_page()
+        self.listing._last_first_profile_url = last_first_url
+        # incremental passes expect to stop after a few pages, so don't plan the whole listing
+        pages = self.listing.iter_pages(start_page=last_page + 1, max_pages=cfg.MAX_PAGES,
+                                        plan=not cfg.INCREMENTAL,
+                                        retry=fr.failed_pages() if cfg.RESUME else (),
+                                        on_failed=fr.page_failed)
+        overlapping = 0
+        try:
+            if cfg.RESUME or cfg.INCREMENTAL:
+                # finish what the previous run left in flight before paging further
+                backlog_ig = fr.pending_instagram()
+                backlog = fr.pending_profiles()
+                log.info(f"[frontier] re-queueing {len(backlog)} profiles and {len(backlog_ig)} instagram lookups")
+                for item in backlog_ig:
+                    await self.ig_q.put(item)
+                for lp in backlog:
+                    await self.profile_q.put(lp)
+
+            while not self.target_reached():
+                with st.busy():
+                    try:
+                        page_num, rows = await pages.__anext__()
+                    except StopAsyncIteration:
+                        break
+                known = sum(lp.profile_url in fr.known for lp in rows)
+                fresh = fr.add_page(page_num, rows)
+                # card names are enough to drop brands before their profile page is fetched
+                brands = BRAND_CLASSIFIER.classify_many([lp.name for lp in fresh])
+                for lp, is_brand in zip(fresh, brands):
+                    if is_brand:
+                        fr.mark(lp.profile_url, BRAND_SKIPPED, name=lp.name)
+                queued = [lp for lp, is_brand in zip(fresh, brands) if not is_brand]
+                log.info(f"[list:{page_num}] Queued {len(queued)} new profiles"
+                         + (f" ({len(fresh) - len(queued)} brand-like skipped)" if len(queued) < len(fresh) else ""))
+                for lp in queued:
+                    await self.profile_q.put(lp)
+                if cfg.INCREMENTAL:
+                    overlapping = overlapping + 1 if known >= cfg.INCREMENTAL_OVERLAP * len(rows) else 0
+                    if overlapping >= cfg.INCREMENTAL_STOP_PAGES:
+                        log.info(f"[list:{page_num}] {overlapping} page(s) of already-known profiles; "
+                                 f"stopping the incremental pass.")
+                        break
+
+            if cfg.INCREMENTAL and cfg.RECHECK_AFTER_DAYS > 0 and not self.target_reached():
+                stale = fr.stale(cfg.RECHECK_AFTER_DAYS * 86400, cfg.RECHECK_LIMIT)
+                log.info(f"[frontier] re-checking {len(stale)} profiles last checked over "
+                         f"{cfg.RECHECK_AFTER_DAYS:g} days ago")
+                for lp in stale:
+                    self._rechecks.add(lp.profile_url)
+                    await self.profile_q.put(lp)
+        except Exception as e:
+            log.warning(f"Listing producer failed: {e}")
+        finally:
+            await pages.aclose()
+            if not self.target_reached():
+                for _ in range(cfg.PROFILE_CONCURRENCY):
+                    await self.profile_q.put(_DONE)
+
+    async def _queue_producer(self) -> None:
+        """
+        Distributed counterpart of _list_producer (WORK_QUEUE set): listing pages and
+        profile URLs are leased from the shared queue, so every node works on one
+        category without fetching anything twice. A fetched page adds its new cards
+        as profile tasks and, if it had any, the next LISTING_PREFETCH pages; the
+        pass ends once no node has listing or profile tasks left.
+        """
+        cfg = self.cfg
+        wq = self.wq
+        st = self.stages["listing"]
+        window = max(1, cfg.LISTING_PREFETCH)
+        if cfg.RESUME or cfg.INCREMENTAL:
+            log.info("[workqueue] --resume/--incremental are implied: the shared queue keeps its own state")
+        try:
+            await wq.put("listing", [(str(n), {}) for n in range(1, window + 1)])
+            while not self.target_reached():
+                worked = False
+                for key, _ in await wq.lease("listing", 1):
+                    worked = True
+                    self._leased["listing"].add(key)
+                    try:
+                        with st.busy():
+                            added = await self._queue_listing_page(int(key))
+                    except ListingFetchError:
+                        # handed straight back (not acked): any node retries the page without
+                        # waiting out the lease; the attempt counts toward max_attempts
+                        await wq.release("listing", [key], failed=True)
+                        self._leased["listing"].discard(key)
+                        continue
+                    if added:
+                        n = int(key)
+                        await wq.put("listing", [(str(p), {}) for p in range(n + 1, n + window + 1)])
+                    await wq.ack("listing", [key])
+                    self._leased["listing"].discard(key)
+
+                room = self.profile_q.maxsize - self.profile_q.qsize() if self.profile_q.maxsize else window
+                if room > 0:
+                    for key, p in await wq.lease("profile", room):
+                        worked = True
+                        self._leased["profile"].add(key)
+                        await self.profile_q.put(ListingProfile(username=p.get("username", ""),
+                                                                profile_url=key, name=p.get("name", "")))
+                if worked:
+                    continue
+                if (await wq.pending("listing"))["open"] == 0 and (await wq.pending("profile"))["open"] == 0:
+                    break
+                # other nodes (or our own workers) still hold leases that may come back
+                await asyncio.sleep(2.0)
+        except Exception as e:
+            log.warning(f"Queue producer failed: {e}")
+        finally:
+            if not self.target_reached():
+                for _ in range(cfg.PROFILE_CONCURRENCY):
+                    await self.profile_q.put(_DONE)
+
+    async def _queue_listing_page(self, page_num: int) -> int:
+        """Fetch one leased listing page and queue its cards; returns how many were new to the queue."""
+        rows = await self.listing.fetch_page(page_num)
+        if not rows:
+            log.info(f"[list:{page_num}] No items found.")
+            return 0
+        self.frontier.add_page(page_num, rows)
+        brands = BRAND_CLASSIFIER.classify_many([lp.name for lp in rows])
+        for lp, is_brand in zip(rows, brands):
+            if is_brand:
+                self.frontier.mark(lp.profile_url, BRAND_SKIPPED, name=lp.name)
+
+        def tasks(brand: bool):
+            return [(lp.profile_url, {"username": lp.username, "name": lp.name})
+                    for lp, is_brand in zip(rows, brands) if is_brand == brand]
+
+        queued = await self.wq.put("profile", tasks(False))
+        # brand cards count as seen (done) so a repeated page is still recognised
+        skipped = await self.wq.put("profile", tasks(True), done=True)
+        log.info(f"[list:{page_num}] Queued {queued} new profiles ({skipped} brand-like skipped, "
+                 f"{len(rows) - queued - skipped} already in the shared queue)")
+        return queued + skipped
+
+    def _recheck_age(self, lp: ListingProfile) -> Optional[float]:
+        """
+        Cache max_age for a profile's lookups: a re-check must not be answered by the
+        cache (negative Instagram results live CACHE_NEGATIVE_TTL_HOURS, 7 days by
+        default), so entries older than RECHECK_AFTER_DAYS don't count for it.
+        """
+        return self.cfg.RECHECK_AFTER_DAYS * 86400 if lp.profile_url in self._rechecks else None
+
+    async def _task_done(self, lp: ListingProfile) -> None:
+        if self.wq and lp.profile_url in self._leased["profile"]:
+            try:
+                await self.wq.ack("profile", [lp.profile_url])
+                self._leased["profile"].discard(lp.profile_url)
+            except Exception as e:
+                # the lease times out and another node redoes the profile; output stays at-most-once
+                log.warning(f"[workqueue] ack failed: {e}")
+
+    async def _heartbeat_loop(self) -> None:
+        """Keep this node's leases alive and follow the cluster-wide email count."""
+        while True:
+            await asyncio.sleep(self.wq.ttl / 3)
+            try:
+                for kind, keys in self._leased.items():
+                    if keys:
+                        await self.wq.heartbeat(kind, list(keys))
+                self.total_with_email = max(self.total_with_email, await self.wq.counter("emails"))
+            except Exception as e:
+                log.warning(f"[workqueue] heartbeat failed: {e}")
+                continue
+            if self.target_reached():
+                log.info(f"[workqueue] email target reached across nodes ({self.total_with_email}).")
+                self._cancel_stages()
+
+    async def _profile_worker(self) -> None:
+        st = self.stages["profile"]
+        while not self.target_reached():
+            lp = await self.profile_q.get()
+            if lp is _DONE:
+                return
+            if self.dedup and self.dedup.seen_profile(lp.profile_url):
+                log.info(f"[dedup] {lp.profile_url} already written; not fetching it again")
+                self.frontier.mark(lp.profile_url, DUPLICATE)
+                await self._task_done(lp)
+                continue
+            self.processed_total += 1
+            log.info(f"[profile #{self.processed_total}] {lp.profile_url}")
+
+            async with self.fair.slot(self.cfg.ROLE_TYPE):
+                with st.busy():
+                    try:
+                        name, insta_url = await self.listing.get_profile_details(
+                            lp.profile_url, max_age=self._recheck_age(lp))
+                        if name is None:
+                            self.frontier.mark(lp.profile_url, BRAND_SKIPPED)
+                        elif not name:
+                            self.frontier.mark(lp.profile_url, FAILED, error="no name on profile")
+                        else:
+                            self.frontier.mark(lp.profile_url, DETAILED, name=name, instagram=insta_url or "")
+                    except Exception as e:
+                        log.warning(f"Profile details failed: {e}")
+                        self.frontier.mark(lp.profile_url, FAILED, error=str(e)[:200])
+                        name, insta_url = None, None
+
+            if name and insta_url and self.dedup and self.dedup.seen_handle(insta_url):
+                log.info(f"[dedup] {insta_url} already written for another profile; skipping Instagram")
+                self.frontier.mark(lp.profile_url, DUPLICATE)
+                await self._task_done(lp)
+            elif name and insta_url:
+                await self.ig_q.put((lp, name, insta_url))
+            else:
+                await self._task_done(lp)
+
+    async def _ig_worker(self) -> None:
+        st = self.stages["instagram"]
+        while not self.target_reached():
+            item = await self.ig_q.get()
+            if item is _DONE:
+                return
+            self._ig_busy += 1
+            try:
+                lp, name, insta_url = item
+
+                email = ""
+                async with self.fair.slot(self.cfg.ROLE_TYPE):
+                    with st.busy():
+                        try:
+                            email = await self.ig.try_get_email(insta_url, max_age=self._recheck_age(lp)) or ""
+                        except CircuitOpen as e:
+                            self._park(item, e.retry_in)
+                            continue
+                        except Exception as e:
+                            log.warning(f"Instagram fetch failed: {e}")
+                            self.frontier.mark(lp.profile_url, FAILED, error=str(e)[:200])
+                            await self._task_done(lp)
+                            continue
+
+                if not email:
+                    self.frontier.mark(lp.profile_url, INSTAGRAM_CHECKED)
+                elif self.dedup and self.dedup.seen_email(email):
+                    log.info(f"[dedup] {email} already written; not writing {lp.profile_url}")
+                    self.frontier.mark(lp.profile_url, DUPLICATE, email=email)
+                else:
+                    row = CreatorRow(
+                        name=name or lp.username or "",
+                        email=email,
+                        profile_link=lp.profile_url,
+                        role_type=self.cfg.ROLE_TYPE
+                    )
+                    if not self.wq:
+                        self._record(row, instagram=insta_url)
+                    else:
+                        ok, count = await self.wq.emit(row.profile_link, self.target_emails)
+                        if ok:
+                            self._record(row, total=count, instagram=insta_url)
+                        else:
+                            log.info(f"[workqueue] {row.profile_link} not written: already emitted "
+                                     f"or target reached ({count}/{self.target_emails})")
+                            self.total_with_email = max(self.total_with_email, count)
+                            if self.target_reached():
+                                self._cancel_stages()
+                await self._task_done(lp)
+            finally:
+                self._ig_busy -= 1
+
+    def _park(self, item, retry_in: float) -> None:
+        self._park_seq += 1
+        self.parked.append((time.monotonic() + retry_in, self._park_seq, item))
+
+    async def _unpark_loop(self) -> None:
+        """Send parked Instagram lookups back to ig_q once their host's breaker may let one through."""
+        while True:
+            await asyncio.sleep(1.0)
+            while self.parked:
+                entry = min(self.parked)
+                if entry[0] > time.monotonic():
+                    break
+                await self.ig_q.put(entry[2])
+                self.parked.remove(entry)   # only now: the item is never in neither place
+
+    async def _wait_instagram(self, workers: List[asyncio.Task], unparker: asyncio.Task) -> None:
+        """
+        Before the Instagram workers are told to stop: let queued and in-flight
+        lookups finish and parked ones be retried, giving up on what is still
+        parked IG_PARK_MAX_SECONDS later (the frontier keeps it for --resume).
+        """
+        deadline = None
+        while not self.target_reached() and any(not w.done() for w in workers):
+            if self.parked:
+                deadline = deadline or time.monotonic() + self.cfg.IG_PARK_MAX_SECONDS
+                if time.monotonic() >= deadline:
+                    unparker.cancel()
+                    log.warning(f"[instagram] {len(self.parked)} lookups still parked behind an open circuit; "
+                                f"leaving them for --resume")
+                    self.parked.clear()
+                    return
+            elif not self.ig_q.qsize() and not self._ig_busy:
+                return
+            await asyncio.sleep(0.5)
+
+    async def _report_loop(self) -> None:
+        interval = self.cfg.PIPELINE_STATS_INTERVAL
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            self._log_stats()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(1.0)
+            try:
+                self.writer.tick()
+            except Exception as e:
+                log.warning(f"Output flush failed; rows stay buffered for the next one: {e}")
+
+    # ---------- output ----------
+    def _on_rows_flushed(self, rows) -> None:
+        # only rows that are on disk count as emitted for --resume
+        for row in rows:
+            self.frontier.mark(row.profile_link, EMAILED, email=row.email)
+        self.frontier.flush()
+        if self.dedup:
+            # only this sink's rows: other categories' reserved keys wait for their own sink
+            self.dedup.flush([k for row in rows for k in self._dedup_keys.pop(row.profile_link, ())])
+
+    def _record(self, row: CreatorRow, total: Optional[int] = None, instagram: str = "") -> None:
+        # runs without awaiting, so check + write + increment is atomic on the loop;
+        # with a work queue, emit() already reserved the row and total is the global count
+        if self.target_reached() and total is None:
+            return
+        if self.dedup:
+            # reserved before the write (which may flush at once), persisted by
+            # _on_rows_flushed once the row is on disk
+            self._dedup_keys[row.profile_link] = self.dedup.add(row.profile_link, row.email, instagram)
+        try:
+            self.writer.write(row)
+        except Exception as e:
+            # the row stays buffered and goes out with the next flush; the worker lives on
+            log.warning(f"Output flush failed; rows stay buffered for the next one: {e}")
+        self.total_with_email = total if total is not None else self.total_with_email + 1
+        log.info(f"✓ email found ({self.total_with_email}/{self.target_emails}) — {row.email}")
+        if self.target_reached():
+            self._cancel_stages()
+
+    def _cancel_stages(self) -> None:
+        current = asyncio.current_task()
+        pending = [t for t in self._tasks if t is not current and not t.done()]
+        if pending and self.target_reached():
+            log.info(f"Target reached; cancelling {len(pending)} pipeline tasks.")
+        for t in pending:
+            t.cancel()
@@ -0,0 +1,196 @@
+"""
+Page extraction, driven by the selectors in selectors.py:
+- *_JS / extract_*: in-page routines, one page.evaluate() round trip per page
+  instead of one IPC call per element handle
+- parse_*: the same extraction over raw server HTML (no browser)
+"""
+from typing import List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from selectolax.lexbor import LexborHTMLParser
+
+from .selectors import (LISTING_ITEM, LISTING_ITEM_FALLBACKS, LISTING_FALLBACK_MIN,
+                        PROFILE_LINK_REL, LISTING_NAME, NAME_ON_PROFILE, INSTAGRAM_LINK, BIO_META_NAMES, PAGER_LINK,
+                        BIO_REGIONS, BIO_EXCLUDE)
+
+# -> [{href, name}] for every listing card, honouring the fallback selector chain,
+#    plus the highest page number the pager links to (0 = no pager)
+LISTING_CARDS_JS = """
+(sel) => {
+    let items = Array.from(document.querySelectorAll(sel.item));
+    if (!items.length) {
+        for (const s of sel.fallbacks) {
+            const cand = document.querySelectorAll(s);
+            if (cand.length > sel.fallbackMin) { items = Array.from(cand); break; }
+        }
+    }
+    const out = [];
+    for (const el of items) {
+        const a = el.querySelector(sel.link);
+        const href = a && a.getAttribute('href');
+        const n = el.querySelector(sel.name);
+        if (href) out.push({href, name: n ? (n.innerText || '').trim() : ''});
+    }
+    let lastPage = 0;
+    for (const a of document.querySelectorAll(sel.pager)) {
+        const n = parseInt(new URL(a.getAttribute('href'), location.href).searchParams.get('pg'), 10);
+        if (n > lastPage) lastPage = n;
+    }
+    return {items: items.length, cards: out, lastPage};
+}
+"""
+
+# -> {name, instagram} from a Collabstr profile page
+PROFILE_JS = """
+(sel) => {
+    const n = document.querySelector(sel.name);
+    const a = document.querySelector(sel.instagram);
+    return {
+        name: n ? (n.innerText || '').trim() : '',
+        instagram: a ? (a.getAttribute('href') || '') : '',
+    };
+}
+"""
+
+# -> [content] of every bio-like <meta name|property>
+BIO_METAS_JS = """
+(names) => {
+    const out = [];
+    for (const m of document.querySelectorAll('meta')) {
+        const key = (m.getAttribute('name') || m.getAttribute('property') || '').toLowerCase();
+        if (!names.includes(key)) continue;
+        const c = m.getAttribute('content') || '';
+        if (c) out.push(c);
+    }
+    return out;
+}
+"""
+
+# -> bio text: the first BIO_REGIONS selector with matches, else the text of
+#    <main>/<body> outside BIO_EXCLUDE; walks text nodes and stops at `cap` chars,
+#    so neither the whole page's layout (innerText) nor its text crosses IPC
+BIO_TEXT_JS = """
+(sel) => {
+    const parts = [];
+    let n = 0;
+    const collect = (root) => {
+        const walker = document.createTreeWalker(root, NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT, {
+            acceptNode: (node) => node.nodeType === 1 && node.matches(sel.exclude)
+                ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT,
+        });
+        for (let node = walker.nextNode(); node && n < sel.cap; node = walker.nextNode()) {
+            if (node.nodeType !== 3) continue;
+            const t = node.nodeValue.replace(/\\s+/g, ' ').trim();
+            if (!t) continue;
+            parts.push(t.slice(0, sel.cap - n));
+            n += t.length + 1;
+        }
+    };
+    for (const s of sel.regions) {
+        const els = document.querySelectorAll(s);
+        if (!els.length) continue;
+        for (const el of els) collect(el);
+        break;
+    }
+    if (!parts.length) {
+        const root = document.querySelector('main') || document.body;
+        if (root) collect(root);
+    }
+    return parts.join(' ').slice(0, sel.cap);
+}
+"""
+
+
+async def extract_listing_cards(page) -> Tuple[int, List[Tuple[str, str]], int]:
+    """Return (number of matched card elements, [(profile href, card name)], highest pager page)."""
+    res = await page.evaluate(LISTING_CARDS_JS, {
+        "item": LISTING_ITEM,
+        "fallbacks": list(LISTING_ITEM_FALLBACKS),
+        "fallbackMin": LISTING_FALLBACK_MIN,
+        "link": PROFILE_LINK_REL,
+        "name": LISTING_NAME,
+        "pager": PAGER_LINK,
+    })
+    return res["items"], [(c["href"], c["name"]) for c in res["cards"]], res["lastPage"]
+
+
+async def extract_profile(page) -> Tuple[str, str]:
+    """Return (display name, instagram href) for a Collabstr profile page."""
+    res = await page.evaluate(PROFILE_JS, {"name": NAME_ON_PROFILE, "instagram": INSTAGRAM_LINK})
+    return res["name"], res["instagram"]
+
+
+async def extract_bio_metas(page) -> List[str]:
+    """Return the content of every description-like meta tag, in document order."""
+    return await page.evaluate(BIO_METAS_JS, list(BIO_META_NAMES))
+
+
+async def extract_bio_text(page, cap: int = 4000) -> str:
+    """Return at most `cap` chars of bio/header text (see BIO_TEXT_JS)."""
+    return await page.evaluate(BIO_TEXT_JS, {"regions": list(BIO_REGIONS), "exclude": BIO_EXCLUDE, "cap": cap})
+
+
+# ---------- raw HTML (same rules as the JS routines above) ----------
+def parse_listing_cards(html: str) -> Tuple[int, List[Tuple[str, str]], int]:
+    tree = LexborHTMLParser(html)
+    items = tree.css(LISTING_ITEM)
+    if not items:
+        for s in LISTING_ITEM_FALLBACKS:
+            cand = tree.css(s)
+            if len(cand) > LISTING_FALLBACK_MIN:
+                items = cand
+                break
+    cards = []
+    for el in items:
+        a = el.css_first(PROFILE_LINK_REL)
+        href = a.attributes.get("href") if a else None
+        if href:
+            n = el.css_first(LISTING_NAME)
+            cards.append((href, " ".join((n.text() or "").split()) if n else ""))
+    last_page = 0
+    for a in tree.css(PAGER_LINK):
+        pg = parse_qs(urlsplit(a.attributes.get("href") or "").query).get("pg", [""])[0]
+        if pg.isdigit():
+            last_page = max(last_page, int(pg))
+    return len(items), cards, last_page
+
+
+def parse_profile(html: str) -> Tuple[str, str]:
+    tree = LexborHTMLParser(html)
+    n = tree.css_first(NAME_ON_PROFILE)
+    a = tree.css_first(INSTAGRAM_LINK)
+    name = " ".join((n.text() or "").split()) if n else ""
+    insta = (a.attributes.get("href") or "") if a else ""
+    return name, insta
+
+
+def parse_bio_text(html: str, cap: int = 4000) -> str:
+    tree = LexborHTMLParser(html)
+    for node in tree.css(BIO_EXCLUDE):
+        node.decompose()
+    roots = []
+    for s in BIO_REGIONS:
+        roots = tree.css(s)
+        if roots:
+            break
+    if not roots:
+        root = tree.css_first("main") or tree.body
+        roots = [root] if root else []
+    parts, n = [], 0
+    for root in roots:
+        if n >= cap:
+            break
+        t = " ".join(root.text(separator=" ").split())
+        parts.append(t[:cap - n])
+        n += len(t) + 1
+    return " ".join(p for p in parts if p)[:cap]
+
+
+def parse_bio_metas(html: str) -> List[str]:
+    out = []
+    for m in LexborHTMLParser(html).css("meta"):
+        attrs = m.attributes
+        key = (attrs.get("name") or attrs.get("property") or "").lower()
+        if key in BIO_META_NAMES and attrs.get("content"):
+            out.append(attrs["content"])
+    return out
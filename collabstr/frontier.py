@@ -0,0 +1,219 @@
+import sqlite3
+import time
+from typing import Iterable, List, Optional, Set, Tuple
+
+from .models import ListingProfile
+from .utils import log
+
+# profile URL lifecycle
+PENDING = "pending"                       # discovered on a listing page
+DETAILED = "detailed"                     # profile page read (instagram may be empty)
+INSTAGRAM_CHECKED = "instagram-checked"   # instagram read, no email
+EMAILED = "emailed"                       # row written
+BRAND_SKIPPED = "brand-skipped"
+DUPLICATE = "duplicate"                   # creator (URL, handle or email) already written by any run
+FAILED = "failed"
+
+PAGE_FAILED = -1   # pages.profiles of a listing page that did not load (re-fetched on --resume)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    category   TEXT NOT NULL,
+    page_num   INTEGER NOT NULL,
+    profiles   INTEGER NOT NULL,
+    first_url  TEXT,
+    visited_at REAL NOT NULL,
+    PRIMARY KEY (category, page_num)
+);
+CREATE TABLE IF NOT EXISTS urls (
+    category   TEXT NOT NULL,
+    url        TEXT NOT NULL,
+    username   TEXT,
+    status     TEXT NOT NULL,
+    name       TEXT,
+    instagram  TEXT,
+    email      TEXT,
+    error      TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (category, url)
+);
+CREATE INDEX IF NOT EXISTS urls_status ON urls (category, status);
+"""
+
+
+class Frontier:
+    """
+    Durable crawl state for one category (START_URL), backed by SQLite in WAL mode.
+    Writes are queued and committed in batches (every flush_every ops or
+    flush_interval seconds); state that must survive a crash (an emitted row)
+    is flushed immediately.
+    """
+
+    def __init__(self, path: str, category: str, flush_every: int = 50, flush_interval: float = 2.0):
+        self.path = path
+        self.category = category
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self._pages: List[tuple] = []
+        self._urls: List[tuple] = []
+        self._last_flush = time.monotonic()
+        self.known: Set[str] = set(
+            r[0] for r in self.db.execute("SELECT url FROM urls WHERE category=?", (category,))
+        )
+
+    # ---------- lifecycle ----------
+    def reset(self) -> None:
+        """Forget this category's state (fresh, non-resumed run)."""
+        self.flush()
+        self.db.execute("DELETE FROM pages WHERE category=?", (self.category,))
+        self.db.execute("DELETE FROM urls WHERE category=?", (self.category,))
+        self.db.commit()
+        self.known.clear()
+
+    def new_pass(self) -> None:
+        """Start a fresh listing pass but keep every known URL (incremental runs)."""
+        self.flush()
+        self.db.execute("DELETE FROM pages WHERE category=?", (self.category,))
+        self.db.commit()
+
+    def close(self) -> None:
+        self.flush()
+        self.db.close()
+
+    # ---------- resume ----------
+    def last_page(self) -> Tuple[int, Optional[str]]:
+        """(highest listing page visited, its first profile URL) — (0, None) if none."""
+        self.flush()
+        row = self.db.execute(
+            "SELECT page_num, first_url FROM pages WHERE category=? AND profiles != ? "
+            "ORDER BY page_num DESC LIMIT 1",
+            (self.category, PAGE_FAILED),
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, None)
+
+    def failed_pages(self) -> List[int]:
+        """Listing pages that failed to load and have not loaded since."""
+        self.flush()
+        return [r[0] for r in self.db.execute(
+            "SELECT page_num FROM pages WHERE category=? AND profiles=? ORDER BY page_num",
+            (self.category, PAGE_FAILED),
+        )]
+
+    def pending_profiles(self) -> List[ListingProfile]:
+        rows = self.db.execute(
+            "SELECT username, url FROM urls WHERE category=? AND status=? ORDER BY rowid",
+            (self.category, PENDING),
+        )
+        return [ListingProfile(username=u or "", profile_url=url) for u, url in rows]
+
+    def pending_instagram(self) -> List[Tuple[ListingProfile, str, str]]:
+        rows = self.db.execute(
+            "SELECT username, url, name, instagram FROM urls "
+            "WHERE category=? AND status=? AND COALESCE(instagram, '') != '' ORDER BY rowid",
+            (self.category, DETAILED),
+        )
+        return [(ListingProfile(username=u or "", profile_url=url), name, insta) for u, url, name, insta in rows]
+
+    def stale(self, older_than: float, limit: int) -> List[ListingProfile]:
+        """
+        Profiles finished without an email whose last check is older than `older_than`
+        seconds, oldest first — candidates for a re-check.
+        """
+        rows = self.db.execute(
+            "SELECT username, url FROM urls WHERE category=? AND updated_at < ? "
+            "AND (status IN (?, ?) OR (status=? AND COALESCE(instagram, '') = '')) "
+            "ORDER BY updated_at LIMIT ?",
+            (self.category, time.time() - older_than, INSTAGRAM_CHECKED, FAILED, DETAILED, limit),
+        )
+        return [ListingProfile(username=u or "", profile_url=url) for u, url in rows]
+
+    def count(self, status: str) -> int:
+        return self.db.execute(
+            "SELECT COUNT(*) FROM urls WHERE category=? AND status=?", (self.category, status)
+        ).fetchone()[0]
+
+    # ---------- writes ----------
+    def add_page(self, page_num: int, profiles: Iterable[ListingProfile]) -> List[ListingProfile]:
+        """Record a visited listing page; returns the profiles not seen before."""
+        profiles = list(profiles)
+        now = time.time()
+        fresh = []
+        for lp in profiles:
+            if lp.profile_url in self.known:
+                continue
+            self.known.add(lp.profile_url)
+            fresh.append(lp)
+            self._urls.append((self.category, lp.profile_url, lp.username, PENDING, None, None, None, None, now))
+        first = profiles[0].profile_url if profiles else None
+        self._pages.append((self.category, page_num, len(profiles), first, now))
+        self._maybe_flush()
+        return fresh
+
+    def page_failed(self, page_num: int) -> None:
+        """Record a listing page that did not load; a later add_page for it replaces this."""
+        self._pages.append((self.category, page_num, PAGE_FAILED, None, time.time()))
+        self.flush()   # a crash before the retry must not forget it
+
+    def mark(self, url: str, status: str, name: str = None, instagram: str = None,
+             email: str = None, error: str = None, flush: bool = False) -> None:
+        self._urls.append((self.category, url, None, status, name, instagram, email, error, time.time()))
+        if flush:
+            self.flush()
+        else:
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if (len(self._urls) + len(self._pages) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._urls and not self._pages:
+            return
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)", self._pages
+            )
+            # upsert keeps fields a later status update leaves as NULL
+            self.db.executemany(
+                """INSERT INTO urls (category, url, username, status, name, instagram, email, error, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (category, url) DO UPDATE SET
+                       username   = COALESCE(excluded.username, urls.username),
+                       status     = excluded.status,
+                       name       = COALESCE(excluded.name, urls.name),
+                       instagram  = COALESCE(excluded.instagram, urls.instagram),
+                       email      = COALESCE(excluded.email, urls.email),
+                       error      = excluded.error,
+                       updated_at = excluded.updated_at""",
+                self._urls,
+            )
+        self._pages.clear()
+        self._urls.clear()
+        self._last_flush = time.monotonic()
+
+    def summary(self) -> str:
+        self.flush()
+        rows = self.db.execute(
+            "SELECT status, COUNT(*) FROM urls WHERE category=? GROUP BY status", (self.category,)
+        ).fetchall()
+        return ", ".join(f"{s}={n}" for s, n in sorted(rows)) or "empty"
+
+
+def open_frontier(cfg) -> Frontier:
+    fr = Frontier(cfg.FRONTIER_PATH, cfg.START_URL)
+    if cfg.RESUME:
+        last, _ = fr.last_page()
+        failed = fr.failed_pages()
+        log.info(f"[frontier] resuming {cfg.START_URL} after page {last}"
+                 + (f", re-fetching failed pages {failed}" if failed else "") + f" ({fr.summary()})")
+    elif cfg.INCREMENTAL:
+        fr.new_pass()
+        log.info(f"[frontier] incremental pass over {cfg.START_URL}: {len(fr.known)} profiles already known")
+    else:
+        fr.reset()
+    return fr
@@ -0,0 +1,160 @@
+import logging
+import time
+from collections import Counter
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import httpx
+
+from .extract import parse_listing_cards, parse_profile
+from .metrics import METRICS
+from .resilience import hedged
+from .utils import log, metric_host
+
+# httpx logs every request at INFO; the fetcher reports its own summary
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# body markers of a Cloudflare interstitial / managed challenge
+CHALLENGE_MARKERS = ("<title>Just a moment", "cf-challenge", "challenge-platform", "cf_chl_", "Attention Required! | Cloudflare")
+
+
+def is_challenge(status: int, html: str) -> bool:
+    if status in (403, 429, 503):
+        return True
+    head = html[:20000]
+    return any(m in head for m in CHALLENGE_MARKERS)
+
+
+class HttpFetcher:
+    """
+    Plain-HTTP fast path for Collabstr listing and profile pages.
+    - one pooled keep-alive client per process, same UA as the browser
+    - reuses the Collabstr session cookies (see set_cookies); with verify, the first
+      pages are checked for the login like the browser's, and a page fetched before a
+      re-login is fetched again with the new cookies
+    - every method returns None when the caller should fall back to Playwright
+      (challenge page, error status, transport error, or selectors missed)
+    - with a limiter, timeouts follow the host's latency and requests slower than
+      its p95 are hedged with a second request when a spare rate token allows
+    """
+
+    def __init__(self, cfg, limiter=None, archive=None,
+                 verify: Optional[Callable[[str], Awaitable[bool]]] = None):
+        self.cfg = cfg
+        self.limiter = limiter   # optional RateController shared with the browser path
+        self.archive = archive   # optional PageArchive; every page that loaded is stored raw
+        self.verify = verify     # html -> True when it predates a re-login (SessionManager.verify_html)
+        self.client = httpx.AsyncClient(
+            headers={
+                "User-Agent": cfg.USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+            },
+            follow_redirects=True,
+            timeout=httpx.Timeout(cfg.HTTP_TIMEOUT),
+            limits=httpx.Limits(max_connections=cfg.HTTP_MAX_CONNECTIONS,
+                                max_keepalive_connections=cfg.HTTP_MAX_CONNECTIONS),
+        )
+        self.counts: Counter = Counter()
+
+    def set_cookies(self, cookies: List[dict]) -> None:
+        """Load Playwright-format cookies (context.cookies() / the save_cookies file)."""
+        for c in cookies:
+            self.client.cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+
+    async def get(self, url: str) -> Optional[str]:
+        labels = {"host": metric_host(url)} if METRICS.enabled else {}
+        if self.limiter:
+            await self.limiter.wait_allowed(url)
+            with METRICS.timer("rate_wait", **labels):
+                await self.limiter.acquire(url)
+        t = time.monotonic()
+        try:
+            with METRICS.timer("http_get", **labels):
+                r = await self._request(url)
+        except httpx.HTTPError as e:
+            METRICS.inc("http_requests", outcome="error", **labels)
+            self.counts["fallback:error"] += 1
+            if self.limiter:
+                timed_out = isinstance(e, httpx.TimeoutException)
+                self.limiter.report(url, problem="timeout" if timed_out else "nav_error")
+            log.info(f"[http] {url} failed ({e.__class__.__name__}); using browser.")
+            return None
+        if self.limiter:
+            self.limiter.observe(url, time.monotonic() - t, stage="http")
+        METRICS.inc("bytes", len(r.content), source="http", **labels)
+        html = r.text
+        challenged = is_challenge(r.status_code, html)
+        if self.limiter:
+            self.limiter.report(url, status=r.status_code, problem="challenge" if challenged else None)
+        METRICS.inc("http_requests", outcome="challenge" if challenged else str(r.status_code), **labels)
+        if challenged:
+            self.counts["fallback:challenge"] += 1
+            log.info(f"[http] {url} -> {r.status_code} challenge; using browser.")
+            return None
+        if r.status_code >= 400:
+            self.counts["fallback:status"] += 1
+            return None
+        if self.verify and await self.verify(html):
+            # fetched logged out; on_refresh has loaded the new session's cookies
+            self.counts["relogin"] += 1
+            return await self.get(url)
+        return html
+
+    async def _request(self, url: str) -> httpx.Response:
+        if not self.limiter:
+            return await self.client.get(url)
+        health = self.limiter.health(url)
+        timeout = self.limiter.timeout(url, self.cfg.HTTP_TIMEOUT, stage="http")
+
+        def hedge_ok() -> bool:
+            # the hedge is an extra request: only when the host's budget has a token to spare
+            if not self.limiter.try_acquire(url):
+                return False
+            health.hedges += 1
+            self.counts["hedged"] += 1
+            METRICS.inc("hedges", stage="http")
+            return True
+
+        return await hedged(lambda: self.client.get(url, timeout=timeout), health.hedge_delay("http"), hedge_ok)
+
+    async def listing_page(self, url: str, role: str = "",
+                           empty_ok: bool = False) -> Optional[Tuple[List[Tuple[str, str]], int]]:
+        """
+        ([(profile href, card name)], highest pager page), or None to fall back to the browser.
+        With empty_ok (pages past the first), a page that has a pager but no cards is a real
+        empty page (past the end of the listing) and comes back as ([], last_page); without a
+        pager either, the markup is not recognised and the browser gets to try.
+        """
+        html = await self.get(url)
+        if html is None:
+            return None
+        if self.archive:   # before parsing: a selector miss is exactly what a re-parse fixes
+            self.archive.put("listing", url, html, role)
+        items, cards, last_page = parse_listing_cards(html)
+        if not items and empty_ok and last_page:
+            self.counts["ok:listing_empty"] += 1
+            return [], last_page
+        if not items or not cards:
+            self.counts["fallback:selectors"] += 1
+            return None
+        self.counts["ok:listing"] += 1
+        return cards, last_page
+
+    async def profile_fields(self, url: str, role: str = "") -> Optional[Tuple[str, str]]:
+        html = await self.get(url)
+        if html is None:
+            return None
+        if self.archive:
+            self.archive.put("profile", url, html, role)
+        name, insta = parse_profile(html)
+        if not name:
+            self.counts["fallback:selectors"] += 1
+            return None
+        self.counts["ok:profile"] += 1
+        return name, insta
+
+    def summary(self) -> str:
+        return ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items())) or "no requests"
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import time
+import uuid
+from typing import Optional
+from urllib.parse import urlsplit
+
+# first path segments that are Instagram features, not usernames
+_NON_HANDLES = {"p", "reel", "reels", "tv", "explore", "accounts", "about", "direct", "developer", "legal"}
+
+
+def canonical_handle(url: str) -> Optional[str]:
+    """
+    'https://www.instagram.com/Jane.Doe/?hl=en' -> 'jane.doe'.
+    Returns None for anything that is not an Instagram profile link.
+    """
+    if not url:
+        return None
+    raw = url.strip()
+    if "://" not in raw:
+        raw = "https://" + raw.lstrip("/")
+    parts = urlsplit(raw)
+    host = parts.netloc.lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    if host not in ("instagram.com", "m.instagram.com", "instagr.am"):
+        return None
+    segs = [s for s in parts.path.split("/") if s]
+    if segs[:1] == ["stories"]:
+        segs = segs[1:]
+    if not segs:
+        return None
+    handle = segs[0].lstrip("@").lower()
+    if handle in _NON_HANDLES:
+        return None
+    return handle or None
+
+
+def canonical_url(handle: str) -> str:
+    return f"https://instagram.com/{handle}"
+
+
+class HandleLeases:
+    """
+    Cross-process in-flight markers for Instagram handles.
+    A worker claims a handle before fetching it; others see the claim and wait for
+    the result to land in the shared ResponseCache instead of fetching it again.
+    Leases expire, so a crashed owner only delays the handle by `ttl` seconds.
+    """
+
+    def __init__(self, path: str, ttl: float = 120.0):
+        self.ttl = ttl
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS ig_leases ("
+            " handle TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def claim(self, handle: str) -> bool:
+        now = time.time()
+        with self.db:
+            # single statement: insert, or take over an expired / own lease
+            cur = self.db.execute(
+                """INSERT INTO ig_leases (handle, owner, expires_at) VALUES (?, ?, ?)
+                   ON CONFLICT (handle) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                   WHERE ig_leases.expires_at <= ? OR ig_leases.owner = excluded.owner""",
+                (handle, self.owner, now + self.ttl, now),
+            )
+        return cur.rowcount == 1
+
+    def release(self, handle: str) -> None:
+        with self.db:
+            self.db.execute("DELETE FROM ig_leases WHERE handle=? AND owner=?", (handle, self.owner))
+
+    def close(self) -> None:
+        self.db.close()
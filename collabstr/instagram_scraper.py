@@ -1,55 +1,157 @@
-from typing import Optional
-from .utils import extract_emails, jitter, log
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+from .emails import rank_emails
+from .extract import extract_bio_metas, extract_bio_text
+from .instagram_lookup import canonical_handle, canonical_url
+from .metrics import METRICS
+from .ratelimit import host_key
+from .resilience import CircuitOpen
+from .utils import goto_paced, log
+
+_RETRY = object()   # owner of an in-flight lookup was cancelled; waiters redo it
+
+
+async def _login_wall(page, status: Optional[int] = None) -> Optional[str]:
+    url = page.url.lower()
+    if "/accounts/login" in url or "/challenge" in url:
+        return "login_wall"
+    return None
 
 class InstagramEmailFinder:
     """
     Conservative Instagram email extraction:
     - Try <meta property|name content> set (og:description, description, etc.)
-    - Fallback to body innerText
+    - Fallback to the header/bio text regions (capped, see extract.BIO_TEXT_JS)
+    - Emails are ranked (plain > "[at]"/"dot" obfuscations, contact keywords help,
+      platform and no-reply addresses dropped) and the best one is kept
     - Do not login to Instagram (avoid blocks); best-effort only.
+    - While Instagram's circuit breaker is open (login walls / timeouts in a row),
+      lookups raise CircuitOpen without touching a tab; the engine parks them.
+    - Lookups are keyed by canonical handle: concurrent requests for one handle share
+      a single fetch in-process, and across processes via HandleLeases + the shared
+      ResponseCache (misses are cached too, for the negative TTL).
     """
-    META_SELECT = "meta"
 
-    def __init__(self, cfg, context):
+    def __init__(self, cfg, pages, cache=None, leases=None, limiter=None, archive=None):
         self.cfg = cfg
-        self.context = context
+        self.pages = pages
+        self.cache = cache
+        self.leases = leases
+        self.limiter = limiter
+        self.archive = archive   # optional PageArchive of the raw pages
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.counts: Counter = Counter()
+
+    async def try_get_email(self, instagram_url: str, max_age: Optional[float] = None) -> Optional[str]:
+        """Email in the profile's bio, or None; cached results older than max_age seconds are refetched."""
+        handle = canonical_handle(instagram_url)
+        if not handle:
+            self.counts["not_a_profile"] += 1
+            return (await self._fetch_email(instagram_url))[1]
+
+        while handle in self._inflight:
+            self.counts["deduped_local"] += 1
+            res = await asyncio.shield(self._inflight[handle])
+            if res is not _RETRY:
+                return res
 
-    def try_get_email(self, instagram_url: str) -> Optional[str]:
-        ipage = self.context.new_page()
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[handle] = fut
         try:
-            ipage.goto(instagram_url, wait_until="domcontentloaded", timeout=45000)
-            jitter(3.0, 5.0)
+            email = await self._lookup(handle, instagram_url, max_age)
+        except BaseException:
+            fut.set_result(_RETRY)
+            raise
+        else:
+            fut.set_result(email)
+        finally:
+            self._inflight.pop(handle, None)
+        return email
+
+    async def _lookup(self, handle: str, instagram_url: str, max_age: Optional[float] = None) -> Optional[str]:
+        key = canonical_url(handle)
+        if self.cache is None:
+            return (await self._fetch_email(instagram_url))[1]
+
+        waited = False
+        while True:
+            cached = self.cache.get("instagram", key, max_age=max_age)
+            if cached is not None:
+                if waited:
+                    self.counts["deduped_remote"] += 1
+                return cached["email"] or None
+            if self.leases is None or self.leases.claim(handle):
+                break
+            # another process is fetching this handle; its result lands in the cache
+            waited = True
+            await asyncio.sleep(1.0)
 
-            bio_text = ""
+        try:
+            self.counts["fetched"] += 1
+            loaded, email = await self._fetch_email(instagram_url)
+            # only a page that actually loaded proves "no email"; errors stay uncached
+            if loaded:
+                self.cache.put("instagram", key, {"email": email or ""}, negative=not email)
+            return email
+        finally:
+            if self.leases:
+                self.leases.release(handle)
+
+    def summary(self) -> str:
+        return ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items())) or "no lookups"
+
+    async def _fetch_email(self, instagram_url: str) -> Tuple[bool, Optional[str]]:
+        if self.limiter and not self.limiter.allow(instagram_url):
+            self.counts["circuit_open"] += 1
+            raise CircuitOpen(host_key(instagram_url), self.limiter.retry_in(instagram_url))
+        with METRICS.timer("fetch", kind="instagram", via="browser"):
+            loaded, email = await self._fetch_email_page(instagram_url)
+        METRICS.inc("instagram", result="email" if email else "no_email" if loaded else "failed")
+        return loaded, email
+
+    async def _fetch_email_page(self, instagram_url: str) -> Tuple[bool, Optional[str]]:
+        async with self.pages.page() as ipage:
             try:
-                metas = ipage.query_selector_all(self.META_SELECT)
-                parts = []
-                for m in metas:
-                    name = (m.get_attribute("name") or m.get_attribute("property") or "").lower()
-                    if name in ("description", "og:description", "twitter:description"):
-                        c = m.get_attribute("content") or ""
-                        if c:
-                            parts.append(c)
-                bio_text = " ".join(parts)
-            except Exception:
-                bio_text = ""
+                if await goto_paced(ipage, instagram_url, self.limiter, timeout=45000, check=_login_wall,
+                                    gated=True):
+                    return False, None
 
-            if not bio_text:
+                bio_text = ""
                 try:
-                    bio_text = ipage.inner_text("body", timeout=8000) or ""
+                    with METRICS.timer("extract", kind="bio_meta"):
+                        bio_text = " ".join(await extract_bio_metas(ipage))
                 except Exception:
                     bio_text = ""
 
-            emails = extract_emails(bio_text)
-            if emails:
-                return emails[0]
+                if not bio_text:
+                    body_s = self.limiter.timeout(instagram_url, 8.0, stage="body") if self.limiter else 8.0
+                    t = time.monotonic()
+                    try:
+                        # the bio is client-rendered when the metas are missing
+                        with METRICS.timer("extract", kind="bio_body"):
+                            await ipage.wait_for_load_state("load", timeout=body_s * 1000)
+                            # header/bio regions only, capped: not the whole body's innerText
+                            bio_text = await extract_bio_text(ipage, self.cfg.BIO_TEXT_MAX_CHARS) or ""
+                        METRICS.inc("bytes", len(bio_text.encode("utf-8")), source="bio_text")
+                    except Exception:
+                        bio_text = ""
+                    if self.limiter and bio_text:
+                        self.limiter.observe(instagram_url, time.monotonic() - t, stage="body")
 
-            return None
-        except Exception as e:
-            log.warning(f"Instagram fetch error: {e}")
-            return None
-        finally:
-            try:
-                ipage.close()
-            except:
-                pass
+                if self.archive:   # after the body fallback, so the rendered bio is in it
+                    self.archive.put("instagram", instagram_url, await ipage.content())
+
+                ranked = rank_emails(bio_text)
+                if len(ranked) > 1:
+                    self.counts["several_emails"] += 1
+                    log.debug(f"[instagram] {instagram_url} candidates: "
+                              + ", ".join(f"{c.email} ({c.score})" for c in ranked))
+                if ranked:
+                    return True, ranked[0].email
+
+                return bool(bio_text), None
+            except Exception as e:
+                log.warning(f"Instagram fetch error: {e}")
+                return False, None
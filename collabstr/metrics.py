@@ -0,0 +1,221 @@
+"""
+Lightweight run instrumentation: counters, gauges and timers keyed by name + labels.
+
+    from .metrics import METRICS
+    with METRICS.timer("goto", kind="profile"):
+        ...
+    METRICS.inc("bytes", n, source="http")
+
+Disabled (the default) every call returns right after one flag check. Enabled,
+a Prometheus text file is rewritten every METRICS_INTERVAL seconds and a JSON
+summary with percentiles is written at the end of the run.
+"""
+import json
+import logging
+import os
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+log = logging.getLogger("collabstr")   # utils' logger; importing utils here would be circular
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: dict) -> Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile (0 for no samples)."""
+    if not samples:
+        return 0.0
+    s = sorted(samples)
+    return s[min(len(s) - 1, max(0, int(round(p / 100 * len(s) + 0.5)) - 1))]
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+class _Timer:
+    __slots__ = ("m", "key", "t")
+
+    def __init__(self, m: "Metrics", key: Key):
+        self.m = m
+        self.key = key
+
+    def __enter__(self):
+        self.t = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.m._observe(self.key, time.perf_counter() - self.t)
+        return False
+
+
+class _Series:
+    """count/sum/max exact; samples capped by reservoir sampling for the percentiles."""
+
+    __slots__ = ("count", "total", "max", "samples")
+    CAP = 20_000
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+
+    def add(self, v: float) -> None:
+        self.count += 1
+        self.total += v
+        self.max = max(self.max, v)
+        if len(self.samples) < self.CAP:
+            self.samples.append(v)
+        else:
+            i = random.randrange(self.count)
+            if i < self.CAP:
+                self.samples[i] = v
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_s": round(self.total, 4),
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            **{f"p{p}_ms": round(percentile(self.samples, p) * 1000, 2) for p in (50, 95, 99)},
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.prom_path = ""
+        self.json_path = ""
+        self.interval = 15.0
+        self.counters: Dict[Key, float] = {}
+        self.gauges: Dict[Key, float] = {}
+        self.timers: Dict[Key, _Series] = {}
+        self.gauge_sources = []   # callables run before each export, e.g. browser RSS
+        self._t0 = time.time()
+
+    def configure(self, cfg) -> None:
+        self.enabled = cfg.METRICS_ENABLED
+        if not self.enabled:
+            return
+        os.makedirs(cfg.METRICS_DIR, exist_ok=True)
+        self.prom_path = os.path.join(cfg.METRICS_DIR, f"collabstr_{os.getpid()}.prom")
+        self.json_path = os.path.join(cfg.METRICS_DIR, f"summary_{os.getpid()}.json")
+        self.interval = cfg.METRICS_INTERVAL
+        self._t0 = time.time()
+
+    # ---------- recording ----------
+    def timer(self, name: str, **labels):
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, _key(name, labels))
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        if self.enabled:
+            self._observe(_key(name, labels), seconds)
+
+    def _observe(self, key: Key, seconds: float) -> None:
+        s = self.timers.get(key)
+        if s is None:
+            s = self.timers[key] = _Series()
+        s.add(seconds)
+
+    def inc(self, name: str, n: float = 1, **labels) -> None:
+        if self.enabled:
+            key = _key(name, labels)
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def set(self, name: str, value: float, **labels) -> None:
+        if self.enabled:
+            self.gauges[_key(name, labels)] = value
+
+    # ---------- export ----------
+    def _sample_gauges(self) -> None:
+        for fn in self.gauge_sources:
+            try:
+                fn()
+            except Exception as e:
+                log.debug(f"[metrics] gauge source failed: {e}")
+
+    @staticmethod
+    def _fmt(name: str, labels, extra: Optional[dict] = None) -> str:
+        pairs = list(labels) + list((extra or {}).items())
+        if not pairs:
+            return name
+        return name + "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def prometheus(self) -> str:
+        lines = []
+        typed = set()
+
+        def head(metric, kind):
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} {kind}")
+
+        for (name, labels), v in sorted(self.counters.items()):
+            metric = f"collabstr_{name}_total"
+            head(metric, "counter")
+            lines.append(f"{self._fmt(metric, labels)} {v:g}")
+        for (name, labels), v in sorted(self.gauges.items()):
+            metric = f"collabstr_{name}"
+            head(metric, "gauge")
+            lines.append(f"{self._fmt(metric, labels)} {v:g}")
+        for (name, labels), s in sorted(self.timers.items(), key=lambda kv: kv[0]):
+            metric = f"collabstr_{name}_seconds"
+            head(metric, "summary")
+            for q in (0.5, 0.95, 0.99):
+                lines.append(f"{self._fmt(metric, labels, {'quantile': q})} {percentile(s.samples, q * 100):.6f}")
+            lines.append(f"{self._fmt(metric + '_sum', labels)} {s.total:.6f}")
+            lines.append(f"{self._fmt(metric + '_count', labels)} {s.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        def name(key: Key) -> str:
+            n, labels = key
+            return n + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+        return {
+            "pid": os.getpid(),
+            "started_at": self._t0,
+            "elapsed_s": round(time.time() - self._t0, 2),
+            "timers": {name(k): s.summary() for k, s in sorted(self.timers.items(), key=lambda kv: kv[0])},
+            "counters": {name(k): v for k, v in sorted(self.counters.items())},
+            "gauges": {name(k): v for k, v in sorted(self.gauges.items())},
+        }
+
+    @staticmethod
+    def _write(path: str, text: str) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)   # scrapers never read half a file
+
+    def export_prometheus(self) -> None:
+        if self.enabled:
+            self._sample_gauges()
+            self._write(self.prom_path, self.prometheus())
+
+    def write_summary(self) -> None:
+        if not self.enabled:
+            return
+        self.export_prometheus()
+        self._write(self.json_path, json.dumps(self.summary(), indent=2))
+        log.info(f"[metrics] summary -> {self.json_path}")
+
+
+METRICS = Metrics()
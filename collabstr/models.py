@@ -4,6 +4,7 @@ from dataclasses import dataclass
 class ListingProfile:
     username: str
     profile_url: str
+    name: str = ""   # as shown on the listing card, when the card has one
 
 @dataclass
 class CreatorRow:
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from .utils import log
+
+
+def browser_rss_mb() -> Optional[float]:
+    """Resident memory of every child process (Playwright driver + Chromium), in MB."""
+    try:
+        import psutil
+        procs = psutil.Process().children(recursive=True)
+        total = 0
+        for p in procs:
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+    except ImportError:
+        pass
+    if not os.path.isdir("/proc"):
+        return None
+    parents: Dict[int, int] = {}
+    for d in os.listdir("/proc"):
+        if not d.isdigit():
+            continue
+        try:
+            with open(f"/proc/{d}/stat", "rb") as f:
+                # "pid (comm) state ppid ..."; comm may contain spaces, so split after ')'
+                fields = f.read().rsplit(b")", 1)[1].split()
+            parents[int(d)] = int(fields[1])
+        except (OSError, IndexError, ValueError):
+            pass
+    mine = {os.getpid()}
+    changed = True
+    while changed:
+        changed = False
+        for pid, ppid in parents.items():
+            if ppid in mine and pid not in mine:
+                mine.add(pid)
+                changed = True
+    mine.discard(os.getpid())
+    total_kb = 0
+    for pid in mine:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            pass
+    return total_kb / 1024
+
+
+class PagePool:
+    """
+    Reusable tabs on BrowserMgr's context.
+    - page() leases a tab; it goes back to about:blank and into the idle list afterwards
+    - after max_navigations leases, or once browser RSS passes max_rss_mb, new leases
+      wait, in-flight ones drain, and the context is recycled with its storage state
+      (cookies + localStorage), so the Collabstr login survives
+    """
+
+    RSS_CHECK_EVERY = 10.0   # seconds; walking the process tree is not free
+
+    def __init__(self, bm, size: int, max_navigations: int = 500, max_rss_mb: float = 0):
+        self.bm = bm
+        self.size = size
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self.navigations = 0
+        self.recycles = 0
+        self.rss_mb: Optional[float] = None
+        self._idle: List = []
+        self._leased = 0
+        self._generation = 0
+        self._recycling = False
+        self._last_rss_check = 0.0
+        self._cond: Optional[asyncio.Condition] = None   # created on the running loop
+
+    @asynccontextmanager
+    async def page(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            await self._cond.wait_for(lambda: not self._recycling)
+            self._leased += 1
+            gen = self._generation
+        page = None
+        try:
+            page = self._idle.pop() if self._idle else await self.bm.context.new_page()
+            yield page
+        finally:
+            self.navigations += 1
+            if page is not None:
+                await self._release(page, gen)
+            async with self._cond:
+                self._leased -= 1
+                self._cond.notify_all()
+            if self._should_recycle():
+                await self._recycle()
+
+    async def _release(self, page, gen: int) -> None:
+        if self.bm.blocker:
+            stats = self.bm.blocker.take_page_stats(page)
+            if stats["blocked"]:
+                log.debug(f"[block] blocked {stats['blocked']} requests (~{stats['blocked_bytes_est'] // 1024} KB)")
+        reusable = gen == self._generation and len(self._idle) < self.size and not page.is_closed()
+        if reusable:
+            try:
+                await page.goto("about:blank", timeout=5000)
+            except Exception:
+                reusable = False
+        if reusable:
+            self._idle.append(page)
+        else:
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    def _should_recycle(self) -> bool:
+        if self._recycling:
+            return False
+        if self.max_navigations and self.navigations >= self.max_navigations:
+            return True
+        now = time.monotonic()
+        if self.max_rss_mb and now - self._last_rss_check >= self.RSS_CHECK_EVERY:
+            self._last_rss_check = now
+            self.rss_mb = browser_rss_mb()
+            return self.rss_mb is not None and self.rss_mb >= self.max_rss_mb
+        return False
+
+    async def _recycle(self) -> None:
+        async with self._cond:
+            if self._recycling:
+                return
+            self._recycling = True
+            try:
+                await self._cond.wait_for(lambda: self._leased == 0)
+                before = browser_rss_mb()
+                idle, self._idle = self._idle, []
+                for p in idle:
+                    try:
+                        await p.close()
+                    except Exception:
+                        pass
+                await self.bm.recycle_context()
+                self._generation += 1
+                self.recycles += 1
+                self.rss_mb = browser_rss_mb()
+                log.info(f"[pool] recycled context #{self.recycles} after {self.navigations} navigations "
+                         f"(browser RSS {before or 0:.0f} -> {self.rss_mb or 0:.0f} MB)")
+                self.navigations = 0
+            finally:
+                self._recycling = False
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        if self.rss_mb is None or time.monotonic() - self._last_rss_check >= self.RSS_CHECK_EVERY:
+            self._last_rss_check = time.monotonic()
+            self.rss_mb = browser_rss_mb()
+        return {
+            "idle": len(self._idle),
+            "leased": self._leased,
+            "navigations": self.navigations,
+            "recycles": self.recycles,
+            "browser_rss_mb": round(self.rss_mb, 1) if self.rss_mb is not None else None,
+        }
@@ -0,0 +1,201 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .metrics import METRICS
+from .resilience import HealthPolicy, HostHealth
+from .utils import log, metric_host
+
+# host -> (initial, max, min) requests/second
+DEFAULT_RATES = "collabstr.com=0.5:2.0:0.05,instagram.com=0.25:0.5:0.02"
+_FALLBACK_RATE = (0.5, 1.0, 0.05)
+
+
+def parse_rates(spec: str) -> Dict[str, Tuple[float, float, float]]:
+    """'host=initial:max:min,...' -> {host: (initial, max, min)}"""
+    out = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        host, nums = part.split("=", 1)
+        initial, hi, lo = (float(x) for x in nums.split(":"))
+        out[host.strip().lower()] = (initial, hi, lo)
+    return out
+
+
+def host_key(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class HostLimiter:
+    """
+    Token bucket whose refill rate follows AIMD:
+    - every clean response adds `increase` req/s (up to max_rate)
+    - a push-back signal multiplies the rate by `decrease` (down to min_rate),
+      empties the bucket and holds the rate for `cooldown` seconds
+    Waits are stretched by a random factor so requests never land on a fixed beat.
+    """
+
+    def __init__(self, host: str, rate: float, max_rate: float, min_rate: float,
+                 burst: float = 2.0, jitter: float = 0.3, increase: float = 0.02,
+                 decrease: float = 0.5, cooldown: float = 30.0):
+        self.host = host
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.jitter = jitter
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.tokens = 1.0
+        self.ok_count = 0
+        self.backoff_count = 0
+        self._last = time.monotonic()
+        self._hold_until = 0.0
+        self._last_backoff = 0.0
+        self._lock: Optional[asyncio.Lock] = None   # created on the running loop
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                self._refill(time.monotonic())
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+                await asyncio.sleep(wait * random.uniform(1.0, 1.0 + self.jitter))
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is available right now (used for optional extra requests)."""
+        if self._lock is not None and self._lock.locked():
+            return False   # someone is already waiting for the next token
+        self._refill(time.monotonic())
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    def ok(self) -> None:
+        self.ok_count += 1
+        if time.monotonic() >= self._hold_until:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def backoff(self, reason: str) -> bool:
+        """Multiplicative decrease; a burst of failures from one incident only counts once."""
+        now = time.monotonic()
+        self._hold_until = now + self.cooldown
+        self.tokens = 0.0
+        if now - self._last_backoff < 5.0:
+            return False
+        self._last_backoff = now
+        self.backoff_count += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        return True
+
+    def snapshot(self) -> dict:
+        return {"rate": round(self.rate, 3), "ok": self.ok_count, "backoffs": self.backoff_count}
+
+
+class RateController:
+    """
+    Per-host HostLimiters plus a log of recent backoff events, and each host's
+    HostHealth (latency-derived timeouts, hedging, circuit breaker; see resilience.py).
+    """
+
+    def __init__(self, rates: Dict[str, Tuple[float, float, float]], jitter: float = 0.3,
+                 policy: Optional[HealthPolicy] = None):
+        self.rates = rates
+        self.jitter = jitter
+        self.policy = policy or HealthPolicy()
+        self.hosts: Dict[str, HostLimiter] = {}
+        self.health_by_host: Dict[str, HostHealth] = {}
+        self.events: Deque[tuple] = deque(maxlen=200)
+
+    @classmethod
+    def from_cfg(cls, cfg) -> "RateController":
+        return cls(parse_rates(cfg.RATE_LIMITS), jitter=cfg.RATE_JITTER, policy=HealthPolicy.from_cfg(cfg))
+
+    def limiter(self, url: str) -> HostLimiter:
+        host = host_key(url)
+        lim = self.hosts.get(host)
+        if lim is None:
+            spec = next((v for h, v in self.rates.items() if host == h or host.endswith("." + h)),
+                        _FALLBACK_RATE)
+            lim = self.hosts[host] = HostLimiter(host, *spec, jitter=self.jitter)
+        return lim
+
+    def health(self, url: str) -> HostHealth:
+        host = host_key(url)
+        h = self.health_by_host.get(host)
+        if h is None:
+            h = self.health_by_host[host] = HostHealth(host, self.policy)
+        return h
+
+    async def acquire(self, url: str) -> None:
+        await self.limiter(url).acquire()
+
+    def try_acquire(self, url: str) -> bool:
+        return self.limiter(url).try_acquire()
+
+    def timeout(self, url: str, default: float, stage: str = "goto", attempt: int = 0) -> float:
+        return self.health(url).timeout(default, stage, attempt)
+
+    def observe(self, url: str, seconds: float, stage: str = "goto") -> None:
+        """Latency of a request that succeeded (failures would drag the percentiles to the timeout)."""
+        self.health(url).window(stage).add(seconds)
+
+    def allow(self, url: str) -> bool:
+        """False while the host's circuit is open (counts as the half-open probe when True)."""
+        return self.health(url).breaker.allow()
+
+    async def wait_allowed(self, url: str) -> None:
+        """Sleep while the host's circuit is open, then take the request slot (or the half-open probe)."""
+        waited = False
+        while not self.allow(url):
+            if not waited:
+                log.info(f"[breaker] {host_key(url)}: circuit open; waiting {self.retry_in(url):.0f}s")
+                waited = True
+            with METRICS.timer("circuit_wait", **({"host": metric_host(url)} if METRICS.enabled else {})):
+                await asyncio.sleep(self.retry_in(url))
+
+    def circuit_open(self, url: str) -> bool:
+        return self.health(url).breaker.is_open()
+
+    def retry_in(self, url: str) -> float:
+        return self.health(url).breaker.retry_in()
+
+    def report(self, url: str, status: Optional[int] = None, problem: Optional[str] = None) -> None:
+        """Feed back one response: an HTTP status and/or a detected problem (challenge, login_wall...)."""
+        lim = self.limiter(url)
+        if problem is None and status in (403, 429):
+            problem = f"http_{status}"
+        if problem is None:
+            lim.ok()
+            self.health(url).breaker.success()
+            return
+        self.health(url).breaker.failure(problem)
+        if lim.backoff(problem):
+            self.events.append((time.time(), lim.host, problem, lim.rate))
+            log.warning(f"[rate] {lim.host}: {problem} -> backing off to {lim.rate:.3f} req/s")
+
+    def stats(self) -> dict:
+        return {h: {**lim.snapshot(), **(self.health_by_host[h].snapshot() if h in self.health_by_host else {})}
+                for h, lim in self.hosts.items()}
+
+    def summary(self) -> str:
+        return "  ".join(f"{h} {s['rate']}/s ok={s['ok']} backoffs={s['backoffs']}"
+                         + (f" trips={s['trips']}" if s.get("trips") else "")
+                         + (f" hedges={s['hedges']}" if s.get("hedges") else "")
+                         + (f" retries={s['retries']}" if s.get("retries") else "")
+                         for h, s in self.stats().items()) or "idle"
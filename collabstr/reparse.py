@@ -0,0 +1,149 @@
+"""
+Regenerate the creator list from a page archive (ARCHIVE_ENABLED) with no browser:
+
+    python -m collabstr.reparse --archive archive --out reparsed_creators.csv
+
+The newest copy of every archived page is parsed on a process pool with the
+same extraction as a live run (listing cards, profile name + Instagram link,
+bio metas then capped bio text, ranked emails, the brand filter); profiles are
+then joined to their Instagram emails and written as CreatorRows. Profiles that
+listing pages link to but that were never archived are reported (--missing
+writes them out) so only those need a re-crawl.
+"""
+import argparse
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from .archive import LISTING, PROFILE, latest_records, read_record
+from .brand import BRAND_CLASSIFIER
+from .collabstr_scraper import _normalize_profile
+from .config import Settings
+from .dedup import normalize_email, normalize_profile
+from .emails import rank_emails
+from .extract import parse_bio_metas, parse_bio_text, parse_listing_cards, parse_profile
+from .instagram_lookup import canonical_handle
+from .models import CreatorRow
+from .storage import CsvSink
+from .utils import log
+
+CHUNK = 200   # records per pool task
+
+
+def _parse(head: dict, html: str) -> tuple:
+    kind, url, role = head["kind"], head["url"], head.get("role", "")
+    if kind == LISTING:
+        items, cards, _ = parse_listing_cards(html)
+        brands = BRAND_CLASSIFIER.classify_many([name for _, name in cards])
+        return (kind, url, role,
+                [(_normalize_profile(href, url), name, b) for (href, name), b in zip(cards, brands)], items)
+    if kind == PROFILE:
+        name, insta = parse_profile(html)
+        return kind, url, role, name, insta, BRAND_CLASSIFIER.is_brand(name)
+    bio = " ".join(parse_bio_metas(html)) or parse_bio_text(html, Settings.BIO_TEXT_MAX_CHARS)
+    ranked = rank_emails(bio)
+    return kind, url, ranked[0].email if ranked else ""
+
+
+def parse_chunk(task: Tuple[str, List[Tuple[int, int]]]) -> List[tuple]:
+    """Parse the given (offset, length) records of one segment (runs in a pool worker)."""
+    path, recs = task
+    out = []
+    with open(path, "rb") as f:
+        for offset, length in recs:
+            try:
+                out.append(_parse(*read_record(f, offset, length)))
+            except Exception as e:
+                log.warning(f"[reparse] {os.path.basename(path)}@{offset}: {e}")
+    return out
+
+
+def _tasks(root: str) -> List[Tuple[str, List[Tuple[int, int]]]]:
+    tasks = []
+    for seg, recs in sorted(latest_records(root).items()):
+        path = os.path.join(root, seg)
+        tasks += [(path, recs[i:i + CHUNK]) for i in range(0, len(recs), CHUNK)]
+    return tasks
+
+
+def reparse(root: str, out_path: str, workers: int = 0, missing_path: str = "") -> Counter:
+    counts: Counter = Counter()
+    t = time.perf_counter()
+    tasks = _tasks(root)
+    if workers == 1:
+        chunks = map(parse_chunk, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers or None)
+        chunks = pool.map(parse_chunk, tasks)
+
+    cards: Dict[str, Tuple[str, bool]] = {}        # profile url -> (listing role, card looks like a brand)
+    profiles: Dict[str, tuple] = {}                # profile url -> (role, name, instagram, is_brand)
+    emails: Dict[str, str] = {}                    # handle (or url) -> email, "" = page had none
+    try:
+        for chunk in chunks:
+            for rec in chunk:
+                kind = rec[0]
+                counts[f"pages:{kind}"] += 1
+                if kind == LISTING:
+                    _, _, role, found, items = rec
+                    if not items:
+                        counts["listing:no_cards"] += 1
+                    for url, _, brand in found:
+                        cards[url] = (role, brand)
+                elif kind == PROFILE:
+                    profiles[rec[1]] = rec[2:]
+                else:
+                    _, url, email = rec
+                    emails[canonical_handle(url) or url] = email
+    finally:
+        if pool:
+            pool.shutdown()
+    parsed_s = time.perf_counter() - t
+
+    sink = CsvSink(out_path, flush_rows=1000)
+    seen = set()
+    for url in sorted(profiles):
+        role, name, insta, brand = profiles[url]
+        card_role, card_brand = cards.get(url, ("", False))
+        if not name:
+            counts["skip:no_name"] += 1
+        elif brand or card_brand:
+            counts["skip:brand"] += 1
+        elif not insta:
+            counts["skip:no_instagram"] += 1
+        else:
+            email = emails.get(canonical_handle(insta) or insta)
+            if email is None:
+                counts["skip:instagram_not_archived"] += 1
+            elif not email:
+                counts["skip:no_email"] += 1
+            elif {normalize_profile(url), normalize_email(email)} & seen:
+                counts["skip:duplicate"] += 1
+            else:
+                seen |= {normalize_profile(url), normalize_email(email)}
+                sink.write(CreatorRow(name=name, email=email, profile_link=url, role_type=role or card_role))
+    sink.close()
+    counts["rows"] = sink.rows_written
+
+    # card-level brands were never fetched on purpose
+    missing = sorted(u for u, (_, brand) in cards.items() if not brand and u not in profiles)
+    counts["profiles_not_archived"] = len(missing)
+    if missing_path and missing:
+        with open(missing_path, "w", encoding="utf-8") as f:
+            f.writelines(u + "\n" for u in missing)
+    log.info(f"[reparse] {len(tasks)} chunks parsed in {parsed_s:.1f}s; "
+             + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    return counts
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Re-run extraction over a page archive and write the creator list.")
+    ap.add_argument("--archive", default="archive", help="ARCHIVE_DIR of the crawl")
+    ap.add_argument("--out", default="reparsed_creators.csv", help="CSV to write (appended to if it exists)")
+    ap.add_argument("--workers", type=int, default=0, help="parser processes (0 = one per CPU, 1 = in-process)")
+    ap.add_argument("--missing", default="", help="write profile URLs seen on listings but never archived here")
+    args = ap.parse_args()
+    reparse(args.archive, args.out, workers=args.workers, missing_path=args.missing)
@@ -0,0 +1,232 @@
+"""
+Per-host resilience, kept by the RateController next to each host's rate:
+- timeouts follow the host's observed latency (TIMEOUT_MULTIPLIER x p99 of the
+  last successful requests, between TIMEOUT_MIN_SECONDS and the fixed default),
+  doubling with each retry; a breaker trip forgets the latencies, so a host that
+  really got slower is re-learned from the fixed default
+- isolated navigation failures are retried with full-jitter exponential backoff;
+  once the host's requests fail in a row it is an outage, not a blip, and
+  retrying would only stack more timeouts
+- slow HTTP requests are hedged: past the host's p95 a second copy is raised,
+  only when the rate budget has a spare token, and the first answer wins
+- a circuit breaker opens after BREAKER_FAILURES failures in a row; while open,
+  no request goes to the host: Instagram lookups get CircuitOpen and are parked,
+  Collabstr navigations and HTTP gets wait it out. After a cooldown one probe is
+  let through; a failed probe reopens the breaker with twice the cooldown, up to
+  BREAKER_MAX_COOLDOWN_SECONDS.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from .utils import log
+
+T = TypeVar("T")
+
+MIN_SAMPLES = 20   # latency samples a host needs before its percentiles are trusted
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class CircuitOpen(Exception):
+    """The host's breaker is open; retry the request after retry_in seconds."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} circuit open; retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+@dataclass(frozen=True)
+class HealthPolicy:
+    adaptive_timeouts: bool = True
+    timeout_multiplier: float = 3.0
+    timeout_min: float = 5.0          # seconds
+    retries: int = 2                  # extra attempts after a transient navigation failure
+    retry_backoff: float = 2.0        # seconds; attempt n waits uniform(0, backoff * 2**n)
+    retry_backoff_max: float = 30.0
+    hedge: bool = True
+    hedge_budget: float = 0.1         # at most this share of a host's requests is hedged
+    breaker_failures: int = 5         # 0 = no breaker
+    breaker_cooldown: float = 120.0
+    breaker_max_cooldown: float = 1800.0
+
+    @classmethod
+    def from_cfg(cls, cfg) -> "HealthPolicy":
+        return cls(
+            adaptive_timeouts=cfg.ADAPTIVE_TIMEOUTS,
+            timeout_multiplier=cfg.TIMEOUT_MULTIPLIER,
+            timeout_min=cfg.TIMEOUT_MIN_SECONDS,
+            retries=cfg.RETRY_ATTEMPTS,
+            retry_backoff=cfg.RETRY_BACKOFF_SECONDS,
+            hedge=cfg.HEDGE_ENABLED,
+            hedge_budget=cfg.HEDGE_BUDGET,
+            breaker_failures=cfg.BREAKER_FAILURES,
+            breaker_cooldown=cfg.BREAKER_COOLDOWN_SECONDS,
+            breaker_max_cooldown=cfg.BREAKER_MAX_COOLDOWN_SECONDS,
+        )
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.retry_backoff_max, self.retry_backoff * 2 ** attempt))
+
+
+class LatencyWindow:
+    """The last `size` latencies of one host and stage (goto, body, http)."""
+
+    def __init__(self, size: int = 200):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        s = sorted(self.samples)
+        return s[min(len(s) - 1, int(q * len(s)))]
+
+
+class CircuitBreaker:
+    def __init__(self, host: str, policy: HealthPolicy, on_open: Optional[Callable[[], None]] = None):
+        self.host = host
+        self.policy = policy
+        self.on_open = on_open
+        self.state = CLOSED
+        self.failures = 0          # in a row
+        self.trips = 0
+        self.cooldown = policy.breaker_cooldown
+        self._open_until = 0.0
+        self._probe_at = 0.0       # when the half-open probe was let through
+
+    def is_open(self) -> bool:
+        """Side-effect free: would a request be refused right now?"""
+        now = time.monotonic()
+        if self.state == OPEN:
+            return now < self._open_until
+        if self.state == HALF_OPEN:
+            return now - self._probe_at < self.cooldown   # a probe is (still) in flight
+        return False
+
+    def allow(self) -> bool:
+        """May a request go out? In half-open state only one probe at a time does."""
+        if self.is_open():
+            return False
+        if self.state != CLOSED:
+            self.state = HALF_OPEN
+            self._probe_at = time.monotonic()
+        return True
+
+    def retry_in(self) -> float:
+        now = time.monotonic()
+        if self.state == OPEN:
+            return max(1.0, self._open_until - now)
+        if self.state == HALF_OPEN:
+            return max(1.0, self._probe_at + self.cooldown - now)
+        return 0.0
+
+    def success(self) -> None:
+        if self.state != CLOSED:
+            log.info(f"[breaker] {self.host}: probe succeeded; closing the circuit")
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = self.policy.breaker_cooldown
+
+    def failure(self, reason: str) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.policy.breaker_max_cooldown, self.cooldown * 2)
+            self._open(f"probe failed ({reason})")
+        elif self.state == CLOSED and self.policy.breaker_failures and self.failures >= self.policy.breaker_failures:
+            self._open(f"{self.failures} failures in a row (last: {reason})")
+
+    def _open(self, why: str) -> None:
+        self.state = OPEN
+        self.trips += 1
+        self._open_until = time.monotonic() + self.cooldown
+        if self.on_open:
+            self.on_open()
+        log.warning(f"[breaker] {self.host}: {why}; pausing it for {self.cooldown:.0f}s")
+
+
+class HostHealth:
+    """Latency windows, hedge budget and breaker of one host."""
+
+    def __init__(self, host: str, policy: HealthPolicy):
+        self.host = host
+        self.policy = policy
+        self.latency: Dict[str, LatencyWindow] = {}
+        self.breaker = CircuitBreaker(host, policy, on_open=self.latency.clear)
+        self.requests = 0
+        self.hedges = 0
+        self.retries = 0
+
+    def window(self, stage: str) -> LatencyWindow:
+        w = self.latency.get(stage)
+        if w is None:
+            w = self.latency[stage] = LatencyWindow()
+        return w
+
+    def timeout(self, default: float, stage: str, attempt: int = 0) -> float:
+        """
+        Seconds to allow a `stage` request (attempt = retries so far); `default`
+        until enough latencies are known, and always the ceiling.
+        """
+        p99 = self.window(stage).quantile(0.99) if self.policy.adaptive_timeouts else None
+        if p99 is None:
+            return default
+        t = max(self.policy.timeout_min, p99 * self.policy.timeout_multiplier) * 2 ** attempt
+        return min(default, t)
+
+    def retryable(self, own_failures: int = 1) -> bool:
+        """
+        Is a failure worth retrying? Not during an outage: the circuit is open, or
+        other requests failed in a row too. own_failures is how many of the failures
+        in a row are this request's own attempts (its retries don't make an outage).
+        """
+        return self.breaker.failures <= own_failures and not self.breaker.is_open()
+
+    def hedge_delay(self, stage: str) -> Optional[float]:
+        """Seconds after which a `stage` request gets a hedge, or None (off, too few samples, over budget)."""
+        self.requests += 1
+        if not self.policy.hedge or self.hedges >= self.policy.hedge_budget * self.requests:
+            return None
+        return self.window(stage).quantile(0.95)
+
+    def snapshot(self) -> dict:
+        out = {"breaker": self.breaker.state, "trips": self.breaker.trips,
+               "hedges": self.hedges, "retries": self.retries}
+        for stage, w in self.latency.items():
+            p = w.quantile(0.99)
+            if p is not None:
+                out[f"{stage}_p99_s"] = round(p, 2)
+        return out
+
+
+async def hedged(make: Callable[[], Awaitable[T]], delay: Optional[float],
+                 may_hedge: Callable[[], bool]) -> T:
+    """
+    Await make(); if it is still running after `delay` seconds and may_hedge()
+    agrees, start a second make() and return whichever succeeds first.
+    """
+    running = [asyncio.ensure_future(make())]
+    try:
+        if delay is None:
+            return await running[0]
+        done, _ = await asyncio.wait(running, timeout=delay)
+        if done or not may_hedge():
+            return await running[0]
+        running.append(asyncio.ensure_future(make()))
+        pending = set(running)
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            ok = [t for t in done if t.exception() is None]
+            if ok:
+                return ok[0].result()
+            if not pending:
+                return done.pop().result()   # both failed: raise the error
+    finally:
+        for t in running:
+            if not t.done():
+                t.cancel()
@@ -0,0 +1,255 @@
+"""
+Runs several Collabstr targets (START_URL / ROLE_TYPE pairs) in one process:
+one Chromium, one login, one tab pool, rate budget and cache, with browser work
+fair-shared across targets under a global worker budget.
+"""
+import asyncio
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List, Optional
+
+from .archive import PageArchive, open_archive
+from .browser import BrowserMgr
+from .cache import open_cache
+from .dedup import DedupIndex, open_dedup
+from .engine import ScrapeEngine
+from .http_client import HttpFetcher
+from .instagram_lookup import HandleLeases
+from .instagram_scraper import InstagramEmailFinder
+from .metrics import METRICS
+from .pool import PagePool
+from .ratelimit import RateController
+from .session import SessionManager
+from .utils import log
+
+
+class FairShare:
+    """
+    Global worker budget split evenly between targets: a free slot goes to the
+    waiting target that currently holds the fewest (ties: least recently served).
+    """
+
+    def __init__(self, budget: int):
+        self.budget = max(1, budget)
+        self.used = 0
+        self.active: Counter = Counter()
+        self.granted: Counter = Counter()
+        self._waiting: Dict[str, Deque[asyncio.Future]] = {}
+        self._served: Dict[str, int] = {}
+        self._tick = 0
+
+    @asynccontextmanager
+    async def slot(self, key: str):
+        await self._acquire(key)
+        try:
+            yield
+        finally:
+            self._release(key)
+
+    async def _acquire(self, key: str) -> None:
+        if self.used < self.budget and not any(self._waiting.values()):
+            self._take(key)
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(key, deque()).append(fut)
+        self._grant()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self._release(key)   # granted just as we were cancelled: hand it on
+            elif fut in self._waiting[key]:   # _grant may already have dropped it
+                self._waiting[key].remove(fut)
+            raise
+
+    def _take(self, key: str) -> None:
+        self.used += 1
+        self.active[key] += 1
+        self.granted[key] += 1
+        self._tick += 1
+        self._served[key] = self._tick
+
+    def _release(self, key: str) -> None:
+        self.used -= 1
+        self.active[key] -= 1
+        self._grant()
+
+    def _grant(self) -> None:
+        while self.used < self.budget:
+            keys = [k for k, q in self._waiting.items() if q]
+            if not keys:
+                return
+            key = min(keys, key=lambda k: (self.active[k], self._served.get(k, 0)))
+            fut = self._waiting[key].popleft()
+            if fut.done():
+                continue
+            self._take(key)
+            fut.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "budget": self.budget,
+            "used": self.used,
+            "active": {k: v for k, v in self.active.items() if v},
+            "waiting": {k: len(q) for k, q in self._waiting.items() if q},
+        }
+
+
+class Runtime:
+    """Process-wide pieces every target's ScrapeEngine borrows (closed here, not by the engines)."""
+
+    def __init__(self, cfg, budget: int):
+        self.cfg = cfg
+        self.budget = budget
+        self.bm: Optional[BrowserMgr] = None
+        self.pages: Optional[PagePool] = None
+        self.limiter: Optional[RateController] = None
+        self.http: Optional[HttpFetcher] = None
+        self.cache = None
+        self.leases: Optional[HandleLeases] = None
+        self.ig: Optional[InstagramEmailFinder] = None
+        self.dedup: Optional[DedupIndex] = None
+        self.archive: Optional[PageArchive] = None
+        self.session = SessionManager(cfg)
+        self.fair = FairShare(budget)
+
+    async def __aenter__(self):
+        cfg = self.cfg
+        METRICS.configure(cfg)
+        log.info("Booting browser...")
+        # a fresh saved session boots straight in; the first real page validates it
+        state = self.session.boot_state()
+        self.bm = await BrowserMgr(cfg, storage_state=state).__aenter__()
+        try:
+            if state is None:
+                await self.session.login(self.bm.context)
+            # one per-host pacing budget for the browser and HTTP paths alike
+            self.limiter = RateController.from_cfg(cfg)
+            self.archive = open_archive(cfg)
+            if cfg.HTTP_FETCH:
+                # plain-HTTP fast path with the session cookies the login settled on
+                self.http = HttpFetcher(cfg, limiter=self.limiter, archive=self.archive,
+                                        verify=lambda html: self.session.verify_html(html, self.bm.context))
+                self.http.set_cookies(await self.bm.context.cookies())
+                self.session.on_refresh.append(self.http.set_cookies)
+            self.cache = open_cache(cfg)
+            self.dedup = open_dedup(cfg)
+            if self.cache and cfg.IG_SHARED_LOOKUP:
+                # handle claims live next to the cache so every process sees them
+                self.leases = HandleLeases(cfg.CACHE_PATH)
+            # every slot holds at most one tab
+            self.pages = PagePool(self.bm, cfg.PAGE_POOL_SIZE or self.budget,
+                                  max_navigations=cfg.CONTEXT_MAX_NAVIGATIONS,
+                                  max_rss_mb=cfg.CONTEXT_MAX_RSS_MB)
+            self.ig = InstagramEmailFinder(cfg, self.pages, cache=self.cache, leases=self.leases,
+                                           limiter=self.limiter, archive=self.archive)
+            METRICS.gauge_sources.append(self._sample_gauges)
+        except BaseException:
+            if self.archive:
+                self.archive.close()
+            await self.bm.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if self.ig:
+                log.info(f"[instagram] {self.ig.summary()}")
+            if self.http:
+                log.info(f"[http] {self.http.summary()}")
+                await self.http.aclose()
+            if self.leases:
+                self.leases.close()
+            if self.dedup:
+                log.info(f"[dedup] {self.dedup.summary()}")
+                self.dedup.close()
+            if self.cache:
+                log.info(f"[cache] {self.cache.summary()}")
+                self.cache.close()
+            if self.archive:
+                log.info(f"[archive] {self.archive.summary()}")
+                self.archive.close()
+        finally:
+            await self.bm.__aexit__(exc_type, exc, tb)
+
+    def _sample_gauges(self) -> None:
+        p = self.pages.stats()
+        if p["browser_rss_mb"] is not None:
+            METRICS.set("browser_rss_mb", p["browser_rss_mb"])
+        METRICS.set("tabs", p["leased"], state="leased")
+        METRICS.set("tabs", p["idle"], state="idle")
+        METRICS.set("context_recycles", p["recycles"])
+        METRICS.set("worker_slots_used", self.fair.used)
+
+    def log_stats(self, prefix: str = "[runtime]") -> None:
+        f = self.fair.stats()
+        log.info(f"{prefix} workers {f['used']}/{f['budget']} active={f['active']} waiting={f['waiting']}")
+        log.info(f"{prefix} rate: {self.limiter.summary()}")
+        p = self.pages.stats()
+        log.info(f"{prefix} tabs: {p['leased']} leased, {p['idle']} idle | "
+                 f"{p['navigations']} navigations since recycle, {p['recycles']} recycles, "
+                 f"browser RSS {p['browser_rss_mb']} MB")
+
+
+def default_budget(targets) -> int:
+    """Enough slots for every target's workers plus its listing producer."""
+    return sum(t.PROFILE_CONCURRENCY + t.INSTAGRAM_CONCURRENCY + 1 for t in targets)
+
+
+class Scheduler:
+    """
+    Runs a list of targets concurrently on one Runtime. Browser-level settings
+    (headless, user agent, login, rates, cache...) come from the first target.
+    """
+
+    def __init__(self, targets: List, budget: int = 0):
+        if not targets:
+            raise RuntimeError("No targets to scrape.")
+        self.targets = targets
+        self.budget = budget or targets[0].WORKER_BUDGET or default_budget(targets)
+
+    async def run(self) -> Dict[str, int]:
+        roles = ", ".join(t.ROLE_TYPE for t in self.targets)
+        log.info(f"[scheduler] {len(self.targets)} targets ({roles}) on {self.budget} worker slots")
+        async with Runtime(self.targets[0], self.budget) as rt:
+            engines = [ScrapeEngine(cfg) for cfg in self.targets]
+            reporter = asyncio.create_task(self._report_loop(rt))
+            exporter = asyncio.create_task(self._metrics_loop())
+            try:
+                results = await asyncio.gather(*(e.run(rt) for e in engines), return_exceptions=True)
+            finally:
+                reporter.cancel()
+                exporter.cancel()
+                rt.log_stats("[runtime:final]")
+                METRICS.write_summary()
+        out = {}
+        for cfg, res in zip(self.targets, results):
+            if isinstance(res, BaseException):
+                log.warning(f"[scheduler] {cfg.ROLE_TYPE} failed: {res}")
+                res = 0
+            out[cfg.ROLE_TYPE] = res
+        return out
+
+    async def _report_loop(self, rt: Runtime) -> None:
+        interval = self.targets[0].PIPELINE_STATS_INTERVAL
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            rt.log_stats()
+
+    async def _metrics_loop(self) -> None:
+        if not METRICS.enabled or METRICS.interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(METRICS.interval)
+            try:
+                METRICS.export_prometheus()
+            except OSError as e:
+                log.warning(f"[metrics] export failed: {e}")
+
+
+def split_targets(targets: List, processes: int) -> List[List]:
+    """Round-robin targets over at most `processes` groups (one browser each)."""
+    n = max(1, min(processes, len(targets)))
+    return [targets[i::n] for i in range(n)]
@@ -2,8 +2,26 @@
 LISTING_ITEM = "div.profile-listing-holder"
 PROFILE_LINK_REL = "a[href^='/'']".replace("''","'")  # ensure raw single quote in file
 NAME_ON_PROFILE = "span.profile-name-desktop"
+# creator name inside a listing card (first match wins; cards without one are left to the profile page).
+# No generic h2/h3: a card's heading can be a headline or niche ("Beauty Media Creator"), and a
+# card-level brand verdict is final, so only elements that hold the name may be used.
+LISTING_NAME = ".profile-listing-name, .profile-listing-title, [class*='listing-name']"
 INSTAGRAM_LINK = "a[data-platform='instagram']"
 
 USERNAME_INPUT = "input[name='email'], input[type='email'], input#email"
 PASSWORD_INPUT = "input[name='password'], input[type='password'], input#password"
 LOGIN_BUTTON   = "button[type='submit'], button:has-text('Login'), button:has-text('Sign in')"
+# present only on pages rendered for a logged-in user (plain CSS: also checked on HTTP-fetched HTML)
+LOGGED_IN = ".dashboard-menu-holder, .dashboard-img, a.header-btn.dashboard-btn, a[href='/dashboard'], .profile-avatar"
+
+# tried in order when LISTING_ITEM matches nothing; a fallback needs > LISTING_FALLBACK_MIN hits
+LISTING_ITEM_FALLBACKS = ("div[class*='profile']", "div[class*='listing']", "div[class*='card']", "a[href*='/']")
+LISTING_FALLBACK_MIN = 5
+# pager links on listing pages; the largest ?pg= among them bounds the page count
+PAGER_LINK = "a[href*='pg=']"
+# <meta name|property> values whose content is treated as the Instagram bio
+BIO_META_NAMES = ("description", "og:description", "twitter:description")
+# Instagram profile regions that hold the bio, tried in order (the first with matches wins);
+# without any, text of <main> (else <body>) outside BIO_EXCLUDE is used. Both capped in size.
+BIO_REGIONS = ("main header", "header", "[data-testid*='bio']")
+BIO_EXCLUDE = "footer, nav, script, style, noscript, template, svg, [role='contentinfo'], [role='navigation']"
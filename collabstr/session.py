@@ -0,0 +1,165 @@
+"""
+One validated Collabstr session shared by every worker and process.
+
+SESSION_PATH holds the Playwright storage state (cookies + localStorage), the
+time it was last seen logged in and the earliest expiry of its Collabstr
+cookies. While that is recent (SESSION_MAX_AGE_HOURS) and unexpired, a process
+boots straight into it with no homepage check; the first real Collabstr page is
+checked instead (over HTTP_FETCH too: the HTML of the first page fetched carries
+the same login markers), and only if it shows the user logged out is the login redone.
+Logins are serialized across processes by a lock file, so one process logs in
+and the others pick up what it saved.
+"""
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, List, Optional
+
+from .auth import is_logged_in, is_logged_in_html, login_if_needed
+from .metrics import METRICS
+from .utils import log
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_EXPIRY_MARGIN = 300.0   # treat cookies this close to expiring as expired
+
+
+def _cookie_expiry(state: dict) -> Optional[float]:
+    """Earliest expiry of the Collabstr cookies with one (None: session cookies only)."""
+    times = [c["expires"] for c in state.get("cookies", [])
+             if "collabstr" in c.get("domain", "") and c.get("expires", -1) > 0]
+    return min(times) if times else None
+
+
+class SessionManager:
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.path = cfg.SESSION_PATH
+        self.max_age = cfg.SESSION_MAX_AGE_HOURS * 3600
+        self.verified = False     # has a real page shown us logged in since boot?
+        self.generation = 0       # bumped on every re-login; pages loaded before it are stale
+        self.validated_at = 0.0   # of the session this process is using
+        self.on_refresh: List[Callable[[List[dict]], None]] = []   # e.g. HttpFetcher.set_cookies
+        self._lock: Optional[asyncio.Lock] = None          # created in the running loop
+        self._verify_lock: Optional[asyncio.Lock] = None
+
+    # ---------- the session file ----------
+    def _read(self) -> Optional[dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def fresh_state(self, newer_than: float = 0.0) -> Optional[dict]:
+        """
+        The saved storage state if it was validated recently (and after newer_than)
+        and none of its cookies has expired.
+        """
+        saved = self._read()
+        if not saved or "storage_state" not in saved or saved.get("validated_at", 0) <= newer_than:
+            return None
+        now = time.time()
+        if now - saved.get("validated_at", 0) > self.max_age:
+            log.info("[session] saved session is older than SESSION_MAX_AGE_HOURS; re-checking the login.")
+            return None
+        expires = saved.get("expires_at")
+        if expires and expires - _EXPIRY_MARGIN < now:
+            log.info("[session] saved session cookies have expired; re-checking the login.")
+            return None
+        self.validated_at = saved["validated_at"]
+        return saved["storage_state"]
+
+    async def save(self, context) -> None:
+        state = await context.storage_state()
+        self.validated_at = time.time()
+        data = {"storage_state": state, "validated_at": self.validated_at, "expires_at": _cookie_expiry(state)}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)   # other processes never read half a session
+
+    @asynccontextmanager
+    async def _login_lock(self):
+        """Held across processes while logging in (the flock on COOKIES_PATH.lock)."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not fcntl:
+                yield
+                return
+            fd = os.open(self.cfg.COOKIES_PATH + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, fcntl.flock, fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)   # drops the lock
+
+    # ---------- bootstrap ----------
+    def boot_state(self) -> Optional[dict]:
+        """Storage state to start the browser with, or None when a login check is needed."""
+        state = self.fresh_state()
+        if state:
+            METRICS.inc("login", method="session", result="fresh")
+            log.info("[session] saved session is fresh; skipping the homepage login check.")
+        return state
+
+    async def login(self, context, force: bool = False) -> None:
+        """
+        Make context logged in: adopt a fresh session another process saved while
+        we waited for the lock, else run the login flow and save the result.
+        force: the current session was just seen logged out, so only a session
+        validated after it is adopted and the old cookies are not re-checked.
+        """
+        async with self._login_lock():
+            state = self.fresh_state(newer_than=self.validated_at if force else 0.0)
+            if state:
+                await context.add_cookies(state.get("cookies", []))
+                METRICS.inc("login", method="session", result="adopted")
+                log.info("[session] using the session another process just validated.")
+            else:
+                await login_if_needed(context, self.cfg, try_cookies=not force)
+                await self.save(context)
+                self.verified = True
+            self.generation += 1
+        cookies = await context.cookies()
+        for fn in self.on_refresh:
+            fn(cookies)
+
+    async def verify(self, page) -> bool:
+        """
+        Check the first real Collabstr page after boot. Returns True when the page
+        was loaded under a session that has since been replaced (caller reloads it).
+        """
+        return await self._verify(lambda: is_logged_in(page), page.context)
+
+    async def verify_html(self, html: str, context) -> bool:
+        """verify for a page fetched over HTTP; context is the browser's, which a re-login refreshes."""
+        async def logged_in() -> bool:
+            return is_logged_in_html(html)
+        return await self._verify(logged_in, context)
+
+    async def _verify(self, logged_in: Callable[[], Awaitable[bool]], context) -> bool:
+        if self.verified:
+            return False
+        seen = self.generation
+        if self._verify_lock is None:
+            self._verify_lock = asyncio.Lock()
+        async with self._verify_lock:
+            if self.verified:
+                return self.generation != seen   # another worker re-logged in meanwhile
+            if await logged_in():
+                self.verified = True
+                METRICS.inc("login", method="session", result="verified")
+                log.info("[session] first page confirms the saved session.")
+                await self.save(context)
+                return False
+            METRICS.inc("login", method="session", result="logged_out")
+            log.warning("[session] first page shows a logged-out session; logging in again.")
+            await self.login(context, force=True)
+            return True
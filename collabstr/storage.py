@@ -1,27 +1,201 @@
+import atexit
 import csv
+import io
+import json
 import os
+import signal
+import time
+from dataclasses import asdict
+from typing import Callable, List, Optional
+
+from .metrics import METRICS
 from .models import CreatorRow
+from .utils import log
 
-class CsvWriter:
-    def __init__(self, path: str):
-        self.path = path
-        file_exists = os.path.exists(self.path)
-        if not file_exists:
-            with open(self.path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(
-                    f, fieldnames=["name", "email", "profile_link", "role_type"]
-                )
-                writer.writeheader()
+try:
+    import fcntl
+except ImportError:   # Windows: appends are still single writes, just not cross-process locked
+    fcntl = None
+
+FIELDS = ["name", "email", "profile_link", "role_type"]
+
+
+def _append_atomic(path: str, data: bytes, header: bytes = b"") -> None:
+    """One locked O_APPEND write (+ header if the file is new), fsynced before returning."""
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        if header and os.fstat(fd).st_size == 0:
+            data = header + data
+        os.write(fd, data)
+        os.fsync(fd)
+        METRICS.inc("bytes", len(data), source="output")
+    finally:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class Sink:
+    """
+    Buffered row output. Rows are flushed every `flush_rows` rows, when the oldest
+    buffered row is `flush_seconds` old (see tick), and on close/shutdown.
+    `on_flush(rows)` runs after the rows are durably on disk. A failed flush (disk
+    full, pyarrow error) raises with the rows back in the buffer for the next one.
+    """
+
+    def __init__(self, flush_rows: int = 20, flush_seconds: float = 5.0,
+                 on_flush: Optional[Callable[[List[CreatorRow]], None]] = None):
+        self.flush_rows = max(1, flush_rows)
+        self.flush_seconds = flush_seconds
+        self.on_flush = on_flush
+        self._buf: List[CreatorRow] = []
+        self._first_at = 0.0
+        self.rows_written = 0
 
     def write(self, r: CreatorRow) -> None:
-        with open(self.path, "a", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(
-                f, fieldnames=["name", "email", "profile_link", "role_type"]
-            )
-            writer.writerow({
-                "name": r.name,
-                "email": r.email,
-                "profile_link": r.profile_link,
-                "role_type": r.role_type
-            })
-        print("Wrote to csv")
+        if not self._buf:
+            self._first_at = time.monotonic()
+        self._buf.append(r)
+        if len(self._buf) >= self.flush_rows:
+            self.flush()
+        else:
+            self.tick()
+
+    def tick(self) -> None:
+        """Time-based flush; call periodically while rows may be sitting in the buffer."""
+        if self._buf and time.monotonic() - self._first_at >= self.flush_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        rows, self._buf = self._buf, []
+        try:
+            with METRICS.timer("sink_flush"):
+                self._write_rows(rows)
+        except BaseException:
+            self._buf = rows + self._buf
+            METRICS.inc("sink_errors")
+            raise
+        self.rows_written += len(rows)
+        METRICS.inc("rows_written", len(rows))
+        if self.on_flush:
+            self.on_flush(rows)
+
+    def close(self) -> None:
+        self.flush()
+
+    def _write_rows(self, rows: List[CreatorRow]) -> None:
+        raise NotImplementedError
+
+
+class CsvSink(Sink):
+    def __init__(self, path: str, **kw):
+        super().__init__(**kw)
+        self.path = path
+
+    @staticmethod
+    def _encode(rows, header: bool = False) -> bytes:
+        out = io.StringIO()
+        w = csv.DictWriter(out, fieldnames=FIELDS, lineterminator="\n")
+        if header:
+            w.writeheader()
+        for r in rows:
+            w.writerow(asdict(r))
+        return out.getvalue().encode("utf-8")
+
+    def _write_rows(self, rows: List[CreatorRow]) -> None:
+        _append_atomic(self.path, self._encode(rows), header=self._encode([], header=True))
+
+
+class JsonlSink(Sink):
+    def __init__(self, path: str, **kw):
+        super().__init__(**kw)
+        self.path = path
+
+    def _write_rows(self, rows: List[CreatorRow]) -> None:
+        data = "".join(json.dumps(asdict(r), ensure_ascii=False) + "\n" for r in rows)
+        _append_atomic(self.path, data.encode("utf-8"))
+
+
+class ParquetSink(Sink):
+    """Parquet can't be appended to, so every flush lands as a new part file in `path/`."""
+
+    def __init__(self, path: str, **kw):
+        super().__init__(**kw)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow).")
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.path = path
+        self._part = 0
+        os.makedirs(path, exist_ok=True)
+
+    def _write_rows(self, rows: List[CreatorRow]) -> None:
+        table = self._pa.Table.from_pylist([asdict(r) for r in rows])
+        self._part += 1
+        name = f"part-{int(time.time() * 1000)}-{os.getpid()}-{self._part:05d}.parquet"
+        tmp = os.path.join(self.path, "." + name + ".tmp")
+        self._pq.write_table(table, tmp)
+        os.replace(tmp, os.path.join(self.path, name))   # readers never see half a file
+
+
+class MultiSink(Sink):
+    """
+    One buffer and flush policy fanned out to several formats. If one format fails,
+    the batch is retried later; formats that already took its first rows skip them.
+    """
+
+    def __init__(self, sinks: List[Sink], **kw):
+        super().__init__(**kw)
+        self.sinks = sinks
+        self._taken = [0] * len(sinks)   # leading rows of the pending batch each sink already wrote
+
+    def _write_rows(self, rows: List[CreatorRow]) -> None:
+        for i, s in enumerate(self.sinks):
+            if self._taken[i] < len(rows):
+                s._write_rows(rows[self._taken[i]:])
+                self._taken[i] = len(rows)
+        self._taken = [0] * len(self.sinks)
+
+
+def open_sink(cfg, on_flush: Optional[Callable[[List[CreatorRow]], None]] = None) -> Sink:
+    """Sinks for every OUTPUT_FORMATS entry; JSONL/Parquet paths derive from OUTPUT_CSV."""
+    base = os.path.splitext(cfg.OUTPUT_CSV)[0]
+    makers = {
+        "csv": lambda: CsvSink(cfg.OUTPUT_CSV),
+        "jsonl": lambda: JsonlSink(base + ".jsonl"),
+        "parquet": lambda: ParquetSink(base + ".parquet"),
+    }
+    sinks = []
+    for fmt in cfg.OUTPUT_FORMATS:
+        if fmt not in makers:
+            raise RuntimeError(f"Unknown output format {fmt!r} (expected csv, jsonl or parquet).")
+        sinks.append(makers[fmt]())
+    sink = MultiSink(sinks, flush_rows=cfg.OUTPUT_FLUSH_ROWS,
+                     flush_seconds=cfg.OUTPUT_FLUSH_SECONDS, on_flush=on_flush)
+    _flush_on_shutdown(sink)
+    return sink
+
+
+def _flush_on_shutdown(sink: Sink) -> None:
+    atexit.register(sink.flush)
+    try:
+        prev = signal.getsignal(signal.SIGTERM)
+
+        def _on_term(signum, frame):
+            log.warning("SIGTERM: flushing buffered rows.")
+            sink.flush()
+            if callable(prev):
+                prev(signum, frame)
+            else:
+                raise SystemExit(128 + signum)
+
+        signal.signal(signal.SIGTERM, _on_term)
+    except ValueError:
+        pass   # not the main thread; atexit still covers normal exits
@@ -1,13 +1,16 @@
+import asyncio
 import json
-import time
-import random
 import re
+import time
 from pathlib import Path
-from playwright.sync_api import Page
-from typing import List
+from urllib.parse import urlsplit
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeout
+from typing import List, Optional
 import logging
-import re
-from rapidfuzz import fuzz, process
+
+from .brand import BRAND_CLASSIFIER, BrandClassifier
+from .challenge import detect_challenge, CLEAN, SOLVED
+from .metrics import METRICS
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,72 +20,97 @@ log = logging.getLogger("collabstr")
 
 EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
 
-def jitter(min_s=1.5, max_s=3.5):
-    time.sleep(random.uniform(min_s, max_s))
-
 def extract_emails(text: str) -> List[str]:
     if not text:
         return []
     return list(dict.fromkeys(EMAIL_RE.findall(text)))
 
-def save_cookies(context, path: Path):
+async def save_cookies(context, path: Path):
     try:
-        cookies = context.cookies()
+        cookies = await context.cookies()
         path.write_text(json.dumps(cookies), encoding="utf-8")
         log.info(f"Saved cookies -> {path}")
     except Exception as e:
         log.warning(f"Failed to save cookies: {e}")
 
-def load_cookies(context, path: Path) -> bool:
+async def load_cookies(context, path: Path) -> bool:
     try:
         if not path.exists():
             return False
         cookies = json.loads(path.read_text(encoding="utf-8"))
-        context.add_cookies(cookies)
+        await context.add_cookies(cookies)
         log.info(f"Loaded cookies from {path}")
         return True
     except Exception as e:
         log.warning(f"Failed to load cookies: {e}")
         return False
 
-def wait_for_cloudflare(page: Page, max_wait=45) -> bool:
-    start = time.time()
-    while time.time() - start < max_wait:
-        try:
-            title = page.title()
-            if "Just a moment" not in title and "Cloudflare" not in title:
-                return True
-            if len(page.query_selector_all("div")) > 10:
-                return True
-        except Exception:
-            pass
-        time.sleep(1.25)
-    return False
+async def wait_for_cloudflare(page: Page, max_wait=45) -> bool:
+    """True once the page shows real content (see challenge.detect_challenge)."""
+    return await detect_challenge(page, max_wait=max_wait) in (CLEAN, SOLVED)
 
+async def cloudflare_problem(page: Page, status: Optional[int] = None) -> Optional[str]:
+    verdict = await detect_challenge(page, status=status)
+    return None if verdict == CLEAN else verdict
 
+async def goto_paced(page: Page, url: str, limiter=None, timeout: int = 60000, check=None,
+                     gated: bool = False) -> Optional[str]:
+    """
+    Navigate under the host's rate limiter (a RateController) and report the outcome back.
+    check(page, status) -> problem name or None. Returns the problem seen (None = clean).
+    timeout (ms) is the ceiling: the limiter shortens it to what the host's latency
+    warrants, and retries isolated timeouts / network errors with jittered backoff.
+    While the host's circuit is open each attempt waits for it; gated=True means the
+    caller already took the first attempt's breaker slot (limiter.allow).
+    """
+    labels = {"host": metric_host(url)} if METRICS.enabled else {}
+    attempts = 1 + (limiter.policy.retries if limiter else 0)
+    for attempt in range(attempts):
+        if limiter:
+            if attempt or not gated:
+                await limiter.wait_allowed(url)
+            with METRICS.timer("rate_wait", **labels):
+                await limiter.acquire(url)
+        nav_timeout = limiter.timeout(url, timeout / 1000, attempt=attempt) * 1000 if limiter else timeout
+        t = time.monotonic()
+        try:
+            with METRICS.timer("goto", **labels):
+                resp = await page.goto(url, wait_until="domcontentloaded", timeout=nav_timeout)
+        except Exception as e:
+            problem = "timeout" if isinstance(e, PlaywrightTimeout) else "nav_error"
+            METRICS.inc("navigations", outcome=problem, **labels)
+            if not limiter:
+                raise
+            limiter.report(url, problem=problem)
+            if attempt + 1 >= attempts or not limiter.health(url).retryable(own_failures=attempt + 1):
+                raise
+            delay = limiter.policy.backoff(attempt)
+            limiter.health(url).retries += 1
+            METRICS.inc("retries", stage="goto", **labels)
+            log.info(f"[retry] {url}: {problem}; attempt {attempt + 2}/{attempts} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        if limiter:
+            limiter.observe(url, time.monotonic() - t)
+        break
+    status = resp.status if resp else None
+    with METRICS.timer("page_check", **labels):   # Cloudflare wait / login-wall check
+        problem = await check(page, status) if check else None
+    if problem is None and status in (403, 429):
+        problem = f"http_{status}"
+    METRICS.inc("navigations", outcome=problem or "ok", **labels)
+    if limiter:
+        limiter.report(url, status=status, problem=problem)
+    return problem
 
-BRAND_KEYWORDS = [
-    "studio","media","agency","productions","designs","labs","official",
-    "channel","team","llc","inc","ltd","pvt","gmbh","plc","co","company","group"
-]
 
-def is_brand_like_fuzzy(name: str, threshold: int = 85) -> bool:
-    if not name:
-        return False
-    n = re.sub(r"[\W_]+", " ", name).strip().lower()
+def metric_host(url: str) -> str:
+    """Low-cardinality host label: 'collabstr.com', 'instagram.com', ..."""
+    host = (urlsplit(url).hostname or "").lower()
+    return ".".join(host.split(".")[-2:]) if host.count(".") >= 1 else host
 
-    if n.startswith("the "):
-        return True
-    if re.search(r"\b(" + "|".join(BRAND_KEYWORDS) + r")\b", n):
-        return True
 
-    tokens = n.split()
-    for t in tokens:
-        score = process.extractOne(
-            t,
-            BRAND_KEYWORDS,
-            scorer=fuzz.WRatio   # robust combined scorer
-        )
-        if score and score[1] >= threshold:
-            return True
-    return False
+def is_brand_like_fuzzy(name: str, threshold: int = 85) -> bool:
+    if threshold != BRAND_CLASSIFIER.threshold:
+        return BrandClassifier(threshold=threshold).is_brand(name)
+    return BRAND_CLASSIFIER.is_brand(name)
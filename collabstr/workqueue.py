@@ -0,0 +1,409 @@
+"""
+Lease-based work queue shared by every scraper node crawling one category.
+
+    WORK_QUEUE=workqueue.sqlite3          # nodes on one host (SQLite file)
+    WORK_QUEUE=http://10.0.0.5:8780       # nodes anywhere (python -m collabstr.workqueue)
+
+Tasks are (kind, key, payload) rows, "listing" pages and "profile" URLs, named
+by queue (the category's START_URL). A node leases tasks for a visibility timeout
+and heartbeats while it works. When a lease expires, the task goes back to the
+other nodes, up to max_attempts times. Putting a key that already exists does
+nothing, so no page or profile is fetched twice.
+Each CreatorRow is emitted at most once: `emit` claims the profile URL and
+increments the queue's global email counter in one transaction, and refuses
+once the target is reached.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from .utils import log
+
+# task states
+READY = "ready"
+LEASED = "leased"
+DONE = "done"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    queue       TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    state       TEXT NOT NULL,
+    owner       TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (queue, kind, key)
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (queue, kind, state, lease_until);
+CREATE TABLE IF NOT EXISTS emitted (
+    queue      TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    owner      TEXT,
+    emitted_at REAL NOT NULL,
+    PRIMARY KEY (queue, key)
+);
+CREATE TABLE IF NOT EXISTS counters (
+    queue TEXT NOT NULL,
+    name  TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (queue, name)
+);
+"""
+
+Task = Tuple[str, dict]   # (key, payload)
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class QueueStore:
+    """
+    The queue state in one SQLite file. Every operation is a single transaction
+    (BEGIN IMMEDIATE), so processes on one host and the HTTP server's threads
+    can share it.
+    """
+
+    OPS = ("put", "lease", "heartbeat", "ack", "release", "pending", "emit", "counter")
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max(1, max_attempts)
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self._lock = threading.Lock()   # one connection, many server threads
+
+    def _tx(self, fn):
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(self.db)
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+            return out
+
+    def put(self, queue: str, kind: str, items: List[Task], done: bool = False) -> int:
+        """Add tasks whose key is new to this queue; returns how many were added."""
+        now = time.time()
+        state = DONE if done else READY
+
+        def run(db):
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO tasks (queue, kind, key, payload, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(queue, kind, key, json.dumps(payload or {}), state, now) for key, payload in items],
+            )
+            return db.total_changes - before
+
+        return self._tx(run)
+
+    def lease(self, queue: str, kind: str, owner: str, n: int, ttl: float) -> List[Task]:
+        """Up to n ready (or lease-expired) tasks, oldest first, leased to owner for ttl seconds."""
+        now = time.time()
+
+        def run(db):
+            rows = db.execute(
+                "SELECT key, payload FROM tasks WHERE queue=? AND kind=? AND attempts < ? "
+                "AND (state=? OR (state=? AND lease_until < ?)) ORDER BY rowid LIMIT ?",
+                (queue, kind, self.max_attempts, READY, LEASED, now, max(0, n)),
+            ).fetchall()
+            db.executemany(
+                "UPDATE tasks SET state=?, owner=?, lease_until=?, attempts=attempts+1, updated_at=? "
+                "WHERE queue=? AND kind=? AND key=?",
+                [(LEASED, owner, now + ttl, now, queue, kind, key) for key, _ in rows],
+            )
+            return [(key, json.loads(payload)) for key, payload in rows]
+
+        return self._tx(run)
+
+    def heartbeat(self, queue: str, kind: str, owner: str, keys: List[str], ttl: float) -> int:
+        """Extend owner's leases on keys; returns how many are still held."""
+        now = time.time()
+
+        def run(db):
+            before = db.total_changes
+            db.executemany(
+                "UPDATE tasks SET lease_until=?, updated_at=? "
+                "WHERE queue=? AND kind=? AND key=? AND state=? AND owner=?",
+                [(now + ttl, now, queue, kind, key, LEASED, owner) for key in keys],
+            )
+            return db.total_changes - before
+
+        return self._tx(run)
+
+    def ack(self, queue: str, kind: str, owner: str, keys: List[str]) -> int:
+        """Mark tasks done, even if the lease was lost meanwhile: the work happened."""
+        now = time.time()
+
+        def run(db):
+            before = db.total_changes
+            db.executemany(
+                "UPDATE tasks SET state=?, owner=?, updated_at=? WHERE queue=? AND kind=? AND key=? AND state!=?",
+                [(DONE, owner, now, queue, kind, key, DONE) for key in keys],
+            )
+            return db.total_changes - before
+
+        return self._tx(run)
+
+    def release(self, queue: str, kind: str, owner: str, keys: List[str], failed: bool = False) -> int:
+        """
+        Hand unfinished leases back right away. After a clean shutdown the attempt is
+        not counted; after a failure (failed=True) it is, so a task that keeps failing
+        goes dead after max_attempts like one whose lease keeps expiring.
+        """
+        now = time.time()
+        undo = 0 if failed else 1
+
+        def run(db):
+            before = db.total_changes
+            db.executemany(
+                "UPDATE tasks SET state=?, owner=NULL, lease_until=0, attempts=MAX(0, attempts-?), updated_at=? "
+                "WHERE queue=? AND kind=? AND key=? AND state=? AND owner=?",
+                [(READY, undo, now, queue, kind, key, LEASED, owner) for key in keys],
+            )
+            return db.total_changes - before
+
+        return self._tx(run)
+
+    def pending(self, queue: str, kind: str) -> Dict[str, int]:
+        """Task counts: ready, leased (live leases), done, dead (out of attempts), open = ready + leased."""
+        now = time.time()
+
+        def run(db):
+            ready, leased, done, dead = db.execute(
+                """SELECT
+                     SUM(attempts < :max AND (state=:ready OR (state=:leased AND lease_until < :now))),
+                     SUM(state=:leased AND lease_until >= :now),
+                     SUM(state=:done),
+                     SUM(attempts >= :max AND (state=:ready OR (state=:leased AND lease_until < :now)))
+                   FROM tasks WHERE queue=:queue AND kind=:kind""",
+                {"max": self.max_attempts, "ready": READY, "leased": LEASED, "done": DONE,
+                 "now": now, "queue": queue, "kind": kind},
+            ).fetchone()
+            counts = {"ready": ready or 0, "leased": leased or 0, "done": done or 0, "dead": dead or 0}
+            counts["open"] = counts["ready"] + counts["leased"]
+            return counts
+
+        return self._tx(run)
+
+    def emit(self, queue: str, key: str, owner: str, target: int = 0) -> dict:
+        """
+        Claim the right to write the row for key. ok is False if it was already
+        emitted or the target is reached. count is the queue's global email count.
+        """
+        now = time.time()
+
+        def run(db):
+            row = db.execute("SELECT value FROM counters WHERE queue=? AND name='emails'", (queue,)).fetchone()
+            count = row[0] if row else 0
+            if target and count >= target:
+                return {"ok": False, "count": count}
+            cur = db.execute("INSERT OR IGNORE INTO emitted VALUES (?, ?, ?, ?)", (queue, key, owner, now))
+            if cur.rowcount != 1:
+                return {"ok": False, "count": count}
+            db.execute(
+                "INSERT INTO counters VALUES (?, 'emails', 1) "
+                "ON CONFLICT (queue, name) DO UPDATE SET value = value + 1",
+                (queue,),
+            )
+            return {"ok": True, "count": count + 1}
+
+        return self._tx(run)
+
+    def counter(self, queue: str, name: str) -> int:
+        row = self._tx(lambda db: db.execute(
+            "SELECT value FROM counters WHERE queue=? AND name=?", (queue, name)).fetchone())
+        return row[0] if row else 0
+
+    def close(self) -> None:
+        self.db.close()
+
+
+class WorkQueue:
+    """
+    One node's view of one queue. Backends only implement _call(op, **kwargs),
+    which runs a QueueStore operation locally or remotely.
+    """
+
+    def __init__(self, queue: str, owner: str = "", ttl: float = 300.0):
+        self.queue = queue
+        self.owner = owner or default_owner()
+        self.ttl = ttl
+
+    async def _call(self, op: str, **kw):
+        raise NotImplementedError
+
+    async def put(self, kind: str, items: List[Task], done: bool = False) -> int:
+        return await self._call("put", kind=kind, items=items, done=done)
+
+    async def lease(self, kind: str, n: int = 1) -> List[Task]:
+        return [tuple(t) for t in await self._call("lease", kind=kind, owner=self.owner, n=n, ttl=self.ttl)]
+
+    async def heartbeat(self, kind: str, keys: List[str]) -> int:
+        return await self._call("heartbeat", kind=kind, owner=self.owner, keys=keys, ttl=self.ttl)
+
+    async def ack(self, kind: str, keys: List[str]) -> int:
+        return await self._call("ack", kind=kind, owner=self.owner, keys=keys)
+
+    async def release(self, kind: str, keys: List[str], failed: bool = False) -> int:
+        return await self._call("release", kind=kind, owner=self.owner, keys=keys, failed=failed)
+
+    async def pending(self, kind: str) -> Dict[str, int]:
+        return await self._call("pending", kind=kind)
+
+    async def emit(self, key: str, target: int = 0) -> Tuple[bool, int]:
+        res = await self._call("emit", key=key, owner=self.owner, target=target)
+        return res["ok"], res["count"]
+
+    async def counter(self, name: str) -> int:
+        return await self._call("counter", name=name)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class SqliteWorkQueue(WorkQueue):
+    """Nodes on one host sharing a SQLite file (operations are short, so they run inline)."""
+
+    def __init__(self, path: str, queue: str, max_attempts: int = 3, **kw):
+        super().__init__(queue, **kw)
+        self.store = QueueStore(path, max_attempts=max_attempts)
+
+    async def _call(self, op: str, **kw):
+        return getattr(self.store, op)(queue=self.queue, **kw)
+
+    async def aclose(self) -> None:
+        self.store.close()
+
+
+class HttpWorkQueue(WorkQueue):
+    """Nodes anywhere, talking JSON to a WorkQueueServer (python -m collabstr.workqueue)."""
+
+    def __init__(self, url: str, queue: str, timeout: float = 30.0, **kw):
+        super().__init__(queue, **kw)
+        import httpx
+        logging.getLogger("httpx").setLevel(logging.WARNING)   # one INFO line per queue call otherwise
+        self.url = url.rstrip("/")
+        self._httpx = httpx
+        self.client = httpx.AsyncClient(timeout=timeout)
+
+    async def _call(self, op: str, **kw):
+        body = {"queue": self.queue, **kw}
+        for attempt in range(3):
+            try:
+                r = await self.client.post(f"{self.url}/{op}", json=body)
+                r.raise_for_status()
+                return r.json()["result"]
+            except self._httpx.TransportError as e:
+                if attempt == 2:
+                    raise
+                log.warning(f"[workqueue] {op} failed ({e.__class__.__name__}); retrying")
+                await asyncio.sleep(1.0 + attempt)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class WorkQueueServer:
+    """Serves a QueueStore over HTTP: POST /<op> with a JSON body -> {"result": ...}."""
+
+    def __init__(self, store: QueueStore):
+        self.store = store
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        store = self.store
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                op = self.path.strip("/")
+                try:
+                    if op not in QueueStore.OPS:
+                        raise KeyError(op)
+                    body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                    status, res = 200, {"result": getattr(store, op)(**body)}
+                except KeyError as e:
+                    status, res = 404, {"error": f"unknown op {e}"}
+                except (TypeError, ValueError) as e:
+                    status, res = 400, {"error": str(e)}
+                data = json.dumps(res).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+# URL scheme -> backend; anything without a scheme is a SQLite path
+BACKENDS = {
+    "sqlite": lambda target, queue, cfg, **kw: SqliteWorkQueue(
+        target, queue, max_attempts=cfg.WORK_QUEUE_MAX_ATTEMPTS, **kw),
+    "http": lambda target, queue, cfg, **kw: HttpWorkQueue(target, queue, **kw),
+    "https": lambda target, queue, cfg, **kw: HttpWorkQueue(target, queue, **kw),
+}
+
+
+def open_work_queue(cfg) -> Optional[WorkQueue]:
+    """The WORK_QUEUE backend for cfg's category, or None when nodes don't coordinate."""
+    spec = cfg.WORK_QUEUE
+    if not spec:
+        return None
+    scheme, sep, rest = spec.partition("://")
+    if not sep:
+        scheme, rest = "sqlite", spec[len("sqlite:"):] if spec.startswith("sqlite:") else spec
+    elif scheme in ("http", "https"):
+        rest = spec
+    if scheme not in BACKENDS:
+        raise RuntimeError(f"Unknown WORK_QUEUE backend {scheme!r} (expected {', '.join(sorted(BACKENDS))}).")
+    wq = BACKENDS[scheme](rest, cfg.START_URL, cfg, owner=cfg.NODE_ID, ttl=cfg.WORK_QUEUE_LEASE_SECONDS)
+    log.info(f"[workqueue] {scheme} backend {rest} as node {wq.owner}")
+    return wq
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serve a shared crawl work queue to scraper nodes over HTTP.")
+    ap.add_argument("--db", default="workqueue.sqlite3", help="SQLite file holding the queue")
+    ap.add_argument("--host", default="127.0.0.1", help="interface to bind (0.0.0.0 for other hosts)")
+    ap.add_argument("--port", type=int, default=8780)
+    ap.add_argument("--max-attempts", type=int, default=3, help="leases per task before it is dropped")
+    args = ap.parse_args()
+    server = WorkQueueServer(QueueStore(args.db, max_attempts=args.max_attempts))
+    print(f"work queue {args.db} at {server.start(args.host, args.port)}  (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()